@@ -1,14 +1,22 @@
+import os
 import sys
 import numpy as np
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QGridLayout, QSlider, QLabel,
     QPushButton, QCheckBox, QDoubleSpinBox, QHBoxLayout, QGroupBox, QFrame,
-    QSizePolicy, QSplitter
+    QSizePolicy, QSplitter, QShortcut
 )
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor, QPalette, QFont
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QPalette, QFont, QKeySequence
 import pyqtgraph as pg
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pslab import PhasorEvaluator, Trajectory, t, dt, clarke_k, frame_segments
+from pslab.qt import (
+    DIRTY_SIGNALS, DIRTY_FRAME, FieldRenderer, PerfHud, PlaybackClock, RecomputeScheduler, SessionRecorder, export_main,
+    time_markers, vector_style
+)
+
 # --- Styling & Parameters ---
 
 # Modern Dark Theme Colors
@@ -25,11 +33,6 @@ COLOR_NEG_SEQ = ['#FF55FF', '#55FFFF', '#FFFF55']  # Magenta, Cyan, Yellow (Brig
 COLOR_RES_POS = '#FFFFFF'
 COLOR_RES_NEG = '#AAAAAA'
 
-# Parameters
-omega = 2 * np.pi
-t = np.linspace(0, 2, 200)
-angles = np.array([0, 120, 240]) * np.pi / 180
-
 # Configure PyQtGraph global look
 pg.setConfigOption('background', COLOR_BG)
 pg.setConfigOption('foreground', COLOR_TEXT)
@@ -42,6 +45,12 @@ class SequenceVisualizer(QWidget):
         self.resize(1400, 900)
         self.apply_stylesheet()
 
+        # Control events only mark what went stale; the scheduler recomputes once per refresh
+        self.scheduler = RecomputeScheduler([
+            (DIRTY_SIGNALS, self.refresh_signals),
+            (DIRTY_FRAME, self.refresh_frame),
+        ], parent=self)
+
         # Default amplitudes
         self.amp_pos = 1.0
         self.amp_neg = 0.1
@@ -73,7 +82,7 @@ class SequenceVisualizer(QWidget):
         self.slider = QSlider(Qt.Horizontal)
         self.slider.setMinimum(0)
         self.slider.setMaximum(len(t)-1)
-        self.slider.valueChanged.connect(self.update_plots)
+        self.slider.valueChanged.connect(self.scheduler.marker(DIRTY_FRAME))
 
         hbox_buttons = QHBoxLayout()
         self.play_button = QPushButton("Play")
@@ -121,13 +130,13 @@ class SequenceVisualizer(QWidget):
         layout_viz = QVBoxLayout()
 
         self.decomposition_checkbox = QCheckBox("Decomposition Mode")
-        self.decomposition_checkbox.stateChanged.connect(self.update_plots)
+        self.decomposition_checkbox.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
         
         self.trajectory_checkbox = QCheckBox("Show Trajectory")
         self.trajectory_checkbox.stateChanged.connect(self.toggle_trajectory)
 
         self.show_rotating_fields_checkbox = QCheckBox("Show Pos/Neg in Combined")
-        self.show_rotating_fields_checkbox.stateChanged.connect(self.update_plots)
+        self.show_rotating_fields_checkbox.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
 
         self.extra_trajectory_checkbox = QCheckBox("Trajectory for Extra Fields")
         self.extra_trajectory_checkbox.setEnabled(False)
@@ -180,26 +189,21 @@ class SequenceVisualizer(QWidget):
 
         # --- Initialization of Graphics Items ---
         
-        # Vectors
-        self.lines_pos, self.tips_pos = self.create_vectors(self.field_pos, COLOR_POS_SEQ)
-        self.resultant_line_pos, self.resultant_tip_pos = self.create_resultant(self.field_pos)
+        # Vectors: one renderer per field draws all of its lines and tips
+        self.renderer_pos = FieldRenderer(self.field_pos)
+        self.styles_pos = self.create_vector_styles(COLOR_POS_SEQ)
 
-        self.lines_neg, self.tips_neg = self.create_vectors(self.field_neg, COLOR_NEG_SEQ)
-        self.resultant_line_neg, self.resultant_tip_neg = self.create_resultant(self.field_neg)
+        self.renderer_neg = FieldRenderer(self.field_neg)
+        self.styles_neg = self.create_vector_styles(COLOR_NEG_SEQ)
 
-        self.lines_combined, self.tips_combined = self.create_vectors(self.field_combined, COLOR_POS_SEQ + COLOR_NEG_SEQ)
-        self.resultant_line_combined, self.resultant_tip_combined = self.create_resultant(self.field_combined)
+        self.renderer_combined = FieldRenderer(self.field_combined)
+        self.styles_combined = self.create_vector_styles(COLOR_POS_SEQ + COLOR_NEG_SEQ)
 
         # Extra rotating fields for combined
-        self.extra_line_pos = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=2, style=Qt.DashLine))
-        self.extra_tip_pos = pg.ScatterPlotItem(size=10, brush=COLOR_RES_POS)
-        self.field_combined.addItem(self.extra_line_pos)
-        self.field_combined.addItem(self.extra_tip_pos)
-
-        self.extra_line_neg = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_NEG, width=2, style=Qt.DashLine))
-        self.extra_tip_neg = pg.ScatterPlotItem(size=10, brush=COLOR_RES_NEG)
-        self.field_combined.addItem(self.extra_line_neg)
-        self.field_combined.addItem(self.extra_tip_neg)
+        self.styles_extra = [
+            vector_style(COLOR_RES_POS, width=2, size=10, style=Qt.DashLine),
+            vector_style(COLOR_RES_NEG, width=2, size=10, style=Qt.DashLine)
+        ]
 
         # Trajectories
         self.trajectory_pos = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=1))
@@ -215,32 +219,48 @@ class SequenceVisualizer(QWidget):
         self.extra_trajectory_neg = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_NEG, width=1, style=Qt.DotLine))
         self.field_combined.addItem(self.extra_trajectory_neg)
 
-        self.traj_points_pos = []
-        self.traj_points_neg = []
-        self.traj_points_combined = []
-        self.traj_points_extra_pos = []
-        self.traj_points_extra_neg = []
+        self.traj_pos = Trajectory()
+        self.traj_neg = Trajectory()
+        self.traj_combined = Trajectory()
+        self.traj_extra_pos = Trajectory()
+        self.traj_extra_neg = Trajectory()
+        # Frame of t that last added trajectory points (None: none since the last clear)
+        self.trajectory_frame = None
 
         # Initialize signals
         self.compute_signals()
 
         # Signal curves and markers
         self.curves_pos = [self.plot_pos.plot(t, self.signals_pos[:, i], pen=pg.mkPen(c, width=2), name=f"{chr(65+i)}+") for i, c in enumerate(COLOR_POS_SEQ)]
-        self.marker_pos = [self.plot_pos.plot([t[0]], [self.signals_pos[0, i]], pen=None, symbol='o', symbolBrush=c, symbolSize=8) for i, c in enumerate(COLOR_POS_SEQ)]
+        self.marker_pos = time_markers(self.plot_pos, COLOR_POS_SEQ)
+        self.marker_pos.setPoints(t[0], self.signals_pos[0])
 
         self.curves_neg = [self.plot_neg.plot(t, self.signals_neg[:, i], pen=pg.mkPen(c, width=2), name=f"{chr(65+i)}-") for i, c in enumerate(COLOR_NEG_SEQ)]
-        self.marker_neg = [self.plot_neg.plot([t[0]], [self.signals_neg[0, i]], pen=None, symbol='o', symbolBrush=c, symbolSize=8) for i, c in enumerate(COLOR_NEG_SEQ)]
+        self.marker_neg = time_markers(self.plot_neg, COLOR_NEG_SEQ)
+        self.marker_neg.setPoints(t[0], self.signals_neg[0])
 
         self.curves_combined = [self.plot_combined.plot(t, self.signals_combined[:, i], pen=pg.mkPen(c, width=2), name=f"{chr(65+i)}") for i, c in enumerate(COLOR_POS_SEQ)]
-        self.marker_combined = [self.plot_combined.plot([t[0]], [self.signals_combined[0, i]], pen=None, symbol='o', symbolBrush=c, symbolSize=8) for i, c in enumerate(COLOR_POS_SEQ)]
-
-        # Timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.advance_frame)
+        self.marker_combined = time_markers(self.plot_combined, COLOR_POS_SEQ)
+        self.marker_combined.setPoints(t[0], self.signals_combined[0])
+
+        # Playback clock: redraws at display rate, 1x = 20 frames of t per second
+        self.clock = PlaybackClock(len(t), parent=self)
+        self.clock.set_loop(self.loop_checkbox.isChecked())
+        self.clock.frameChanged.connect(self.slider.setValue)
+        self.clock.positionChanged.connect(self.on_clock_position)
+        self.clock.wrapped.connect(self.on_clock_wrapped)
+        self.clock.finished.connect(self.on_playback_finished)
+        self.loop_checkbox.toggled.connect(self.clock.set_loop)
+        self.slider.sliderMoved.connect(self.clock.seek)
         self.is_playing = False
+        self.play_position = 0.0
 
         self.update_plots(0)
 
+        # Performance HUD, toggled with F12; the hot paths are only instrumented while it is shown
+        self.perf_hud = PerfHud(self)
+        QShortcut(QKeySequence(Qt.Key_F12), self, self.perf_hud.toggle)
+
     def apply_stylesheet(self):
         self.setStyleSheet(f"""
             QWidget {{
@@ -341,44 +361,56 @@ class SequenceVisualizer(QWidget):
         plot.getPlotItem().setTitle(title, color=COLOR_TEXT, size='11pt')
         return plot
 
-    def create_vectors(self, field, colors):
-        lines = [pg.PlotDataItem(pen=pg.mkPen(c, width=3)) for c in colors]
-        tips = [pg.ScatterPlotItem(size=12, brush=c, pen=None) for c in colors]
-        for line, tip in zip(lines, tips):
-            field.addItem(line)
-            field.addItem(tip)
-        return lines, tips
-
-    def create_resultant(self, field):
-        line = pg.PlotDataItem(pen=pg.mkPen('w', width=4))
-        tip = pg.ScatterPlotItem(size=16, brush='w', pen=None)
-        field.addItem(line)
-        field.addItem(tip)
-        return line, tip
+    def create_vector_styles(self, colors):
+        # Styles of the field vectors, followed by the resultant
+        return [vector_style(c) for c in colors] + [vector_style('w', width=4, size=16)]
 
     def compute_signals(self):
-        self.signals_pos = np.array([[self.amp_pos * np.cos(omega * ti - angle) for angle in angles] for ti in t])
-        self.signals_neg = np.array([[self.amp_neg * np.cos(omega * ti + angle) for angle in angles] for ti in t])
-        self.signals_combined = self.signals_pos + self.signals_neg
+        # Geometry of every frame of t, so a paused update_plots only indexes into it
+        self.evaluator = PhasorEvaluator([self.amp_pos], self.amp_neg, clarke_k())
+        self.frames = self.evaluator.evaluate(t)
+        self.signals_pos = self.frames.signals.pos
+        self.signals_neg = self.frames.signals.neg
+        self.signals_combined = self.frames.signals.combined
 
     def update_amplitudes(self):
         self.amp_pos = self.amp_pos_input.value()
         self.amp_neg = self.amp_neg_input.value()
+        self.scheduler.mark(DIRTY_SIGNALS | DIRTY_FRAME)
+
+    def refresh_signals(self):
         self.compute_signals()
         for i in range(3):
             self.curves_pos[i].setData(t, self.signals_pos[:, i])
             self.curves_neg[i].setData(t, self.signals_neg[:, i])
             self.curves_combined[i].setData(t, self.signals_combined[:, i])
-        self.update_plots(self.slider.value())
 
-    def update_plots(self, frame):
+    def refresh_frame(self):
+        # While playing, draw at the exact clock position between the frames of t
+        self.update_plots(self.slider.value(), self.play_position if self.is_playing else None)
+
+    def on_clock_position(self, position):
+        self.play_position = position
+        self.scheduler.mark(DIRTY_FRAME)
+
+    def phasor_state(self, position):
+        # Frames of t are precomputed, positions between them are evaluated
+        position %= len(t)
+        if position == int(position):
+            return self.frames, int(position)
+        return self.evaluator.evaluate(position * dt), 0
+
+    def update_plots(self, frame, position=None):
         # Handle slider vs direct call
         if isinstance(frame, int):
             pass
         else:
             frame = self.slider.value()
             
-        self.slider_label.setText(f"Time: {t[frame]:.2f} s")
+        # position: fractional frame to draw instead of ``frame`` (playback, export)
+        state, i = self.phasor_state(frame if position is None else position)
+        crossed = self.crossed_frames(int((frame if position is None else position) % len(t)), position is not None)
+        self.slider_label.setText(f"Time: {state.time[i]:.2f} s")
 
         # Enable extra trajectory checkbox only if conditions are met
         self.extra_trajectory_checkbox.setEnabled(
@@ -386,90 +418,53 @@ class SequenceVisualizer(QWidget):
         )
 
         # Update markers
-        for i in range(3):
-            self.marker_pos[i].setData([t[frame]], [self.signals_pos[frame, i]])
-            self.marker_neg[i].setData([t[frame]], [self.signals_neg[frame, i]])
-            self.marker_combined[i].setData([t[frame]], [self.signals_combined[frame, i]])
-
-        # Compute vectors
-        vectors_pos = [(self.signals_pos[frame, i]*np.cos(angles[i]), self.signals_pos[frame, i]*np.sin(angles[i])) for i in range(3)]
-        vectors_neg = [(self.signals_neg[frame, i]*np.cos(angles[i]), self.signals_neg[frame, i]*np.sin(angles[i])) for i in range(3)]
-        vectors_combined = vectors_pos + vectors_neg
+        self.marker_pos.setPoints(state.time[i], state.signals.pos[i])
+        self.marker_neg.setPoints(state.time[i], state.signals.neg[i])
+        self.marker_combined.setPoints(state.time[i], state.signals.combined[i])
 
         decomposition = self.decomposition_checkbox.isChecked()
 
         # Update fields
-        self.update_field_vectors(self.lines_pos, self.tips_pos, vectors_pos, self.resultant_line_pos, self.resultant_tip_pos, decomposition)
-        self.update_field_vectors(self.lines_neg, self.tips_neg, vectors_neg, self.resultant_line_neg, self.resultant_tip_neg, decomposition)
-        self.update_field_vectors(self.lines_combined, self.tips_combined, vectors_combined, self.resultant_line_combined, self.resultant_tip_combined, decomposition)
+        self.renderer_pos.draw(frame_segments(state.positive, i, decomposition), self.styles_pos)
+        self.renderer_neg.draw(frame_segments(state.negative, i, decomposition), self.styles_neg)
 
-        # Extra rotating fields in combined
+        # Extra rotating fields in combined: positive resultant, then negative resultant added on top of it
+        segments_combined = frame_segments(state.combined, i, decomposition)
+        styles_combined = self.styles_combined
+        extra_pos, extra_neg = state.extra.chain[i]
         if self.show_rotating_fields_checkbox.isChecked():
-            # Positive resultant
-            x_pos = self.resultant_line_pos.xData[-1]
-            y_pos = self.resultant_line_pos.yData[-1]
-            self.extra_line_pos.setData([0, x_pos], [0, y_pos])
-            self.extra_tip_pos.setData([x_pos], [y_pos])
-
-            # Negative resultant (added on top of positive)
-            x_neg = self.resultant_line_neg.xData[-1]
-            y_neg = self.resultant_line_neg.yData[-1]
-            self.extra_line_neg.setData([x_pos, x_pos + x_neg], [y_pos, y_pos + y_neg])
-            self.extra_tip_neg.setData([x_pos + x_neg], [y_pos + y_neg])
-        else:
-            self.extra_line_pos.setData([], [])
-            self.extra_tip_pos.setData([], [])
-            self.extra_line_neg.setData([], [])
-            self.extra_tip_neg.setData([], [])
+            segments_combined = (segments_combined, state.extra.chain[i])
+            styles_combined = styles_combined + self.styles_extra
+        self.renderer_combined.draw(segments_combined, styles_combined)
 
         # Update trajectory if enabled
-        if self.trajectory_checkbox.isChecked():
-            self.update_trajectory(self.resultant_line_pos, self.traj_points_pos, self.trajectory_pos)
-            self.update_trajectory(self.resultant_line_neg, self.traj_points_neg, self.trajectory_neg)
-            self.update_trajectory(self.resultant_line_combined, self.traj_points_combined, self.trajectory_combined)
+        if self.trajectory_checkbox.isChecked() and len(crossed):
+            self.update_trajectory(self.frames.positive.resultant[crossed], self.traj_pos, self.trajectory_pos)
+            self.update_trajectory(self.frames.negative.resultant[crossed], self.traj_neg, self.trajectory_neg)
+            self.update_trajectory(self.frames.combined.resultant[crossed], self.traj_combined, self.trajectory_combined)
 
             # Extra trajectories if enabled
             if self.extra_trajectory_checkbox.isChecked() and self.show_rotating_fields_checkbox.isChecked():
-                # Positive extra trajectory
-                x_pos = self.extra_line_pos.xData[-1]
-                y_pos = self.extra_line_pos.yData[-1]
-                self.traj_points_extra_pos.append((x_pos, y_pos))
-                xs, ys = zip(*self.traj_points_extra_pos)
-                self.extra_trajectory_pos.setData(xs, ys)
-
-                # Negative extra trajectory
-                x_neg = self.extra_line_neg.xData[-1]
-                y_neg = self.extra_line_neg.yData[-1]
-                self.traj_points_extra_neg.append((x_neg, y_neg))
-                xs, ys = zip(*self.traj_points_extra_neg)
-                self.extra_trajectory_neg.setData(xs, ys)
-
-    def update_field_vectors(self, lines, tips, vectors, resultant_line, resultant_tip, decomposition):
-        if decomposition:
-            points = [(0, 0)]
-            for vec in vectors:
-                last = points[-1]
-                points.append((last[0] + vec[0], last[1] + vec[1]))
-            for i, (line, tip) in enumerate(zip(lines, tips)):
-                line.setData([points[i][0], points[i+1][0]], [points[i][1], points[i+1][1]])
-                tip.setData([points[i+1][0]], [points[i+1][1]])
-            resultant_line.setData([0, points[-1][0]], [0, points[-1][1]])
-            resultant_tip.setData([points[-1][0]], [points[-1][1]])
-        else:
-            x_sum = sum(v[0] for v in vectors)
-            y_sum = sum(v[1] for v in vectors)
-            for line, tip, vec in zip(lines, tips, vectors):
-                line.setData([0, vec[0]], [0, vec[1]])
-                tip.setData([vec[0]], [vec[1]])
-            resultant_line.setData([0, x_sum], [0, y_sum])
-            resultant_tip.setData([x_sum], [y_sum])
-
-    def update_trajectory(self, resultant_line, traj_points, trajectory_item):
-        x = resultant_line.xData[-1]
-        y = resultant_line.yData[-1]
-        traj_points.append((x, y))
-        xs, ys = zip(*traj_points)
-        trajectory_item.setData(xs, ys)
+                extra = self.frames.extra.chain[crossed]
+                self.update_trajectory(extra[:, 0], self.traj_extra_pos, self.extra_trajectory_pos)
+                self.update_trajectory(extra[:, 1], self.traj_extra_neg, self.extra_trajectory_neg)
+
+    def crossed_frames(self, frame, playing):
+        # Frames of t due a trajectory point: while playing, every frame passed since the
+        # last redraw (however often the clock redraws), otherwise the shown frame if it
+        # changed. Points come from the precomputed frames, so a loop holds len(t) exact points.
+        last = self.trajectory_frame
+        self.trajectory_frame = frame
+        if last == frame:
+            return np.arange(0)
+        if last is None or not playing:
+            return np.array([frame])
+        return (last + 1 + np.arange((frame - last) % len(t))) % len(t)
+
+    def update_trajectory(self, resultants, traj, trajectory_item):
+        # resultants: segments from the origin to the resultant tips, one per frame
+        traj.extend(resultants[:, 0, 1], resultants[:, 1, 1])
+        trajectory_item.setData(*traj.data())
 
     def toggle_trajectory(self):
         if not self.trajectory_checkbox.isChecked():
@@ -477,17 +472,23 @@ class SequenceVisualizer(QWidget):
 
     def toggle_extra_trajectory(self):
         if not self.extra_trajectory_checkbox.isChecked():
-            self.traj_points_extra_pos.clear()
-            self.traj_points_extra_neg.clear()
+            self.traj_extra_pos.clear()
+            self.traj_extra_neg.clear()
             self.extra_trajectory_pos.setData([], [])
             self.extra_trajectory_neg.setData([], [])
 
+    def on_clock_wrapped(self):
+        # A new loop: its trajectory starts from frame 0, whichever frame is drawn first
+        self.clear_trajectories()
+        self.trajectory_frame = -1
+
     def clear_trajectories(self):
-        self.traj_points_pos.clear()
-        self.traj_points_neg.clear()
-        self.traj_points_combined.clear()
-        self.traj_points_extra_pos.clear()
-        self.traj_points_extra_neg.clear()
+        self.trajectory_frame = None
+        self.traj_pos.clear()
+        self.traj_neg.clear()
+        self.traj_combined.clear()
+        self.traj_extra_pos.clear()
+        self.traj_extra_neg.clear()
         self.trajectory_pos.setData([], [])
         self.trajectory_neg.setData([], [])
         self.trajectory_combined.setData([], [])
@@ -495,7 +496,7 @@ class SequenceVisualizer(QWidget):
         self.extra_trajectory_neg.setData([], [])
 
     def reset_all(self):
-        self.timer.stop()
+        self.clock.stop()
         self.is_playing = False
         self.play_button.setText("Play")
         self.slider.setValue(0)
@@ -503,28 +504,27 @@ class SequenceVisualizer(QWidget):
 
     def toggle_play(self):
         if self.is_playing:
-            self.timer.stop()
+            self.clock.stop()
             self.play_button.setText("Play")
         else:
-            self.timer.start(50)
+            self.clock.start(self.slider.value())
             self.play_button.setText("Pause")
         self.is_playing = not self.is_playing
 
-    def advance_frame(self):
-        current = self.slider.value()
-        if current < self.slider.maximum():
-            self.slider.setValue(current + 1)
-        else:
-            if self.loop_checkbox.isChecked():
-                self.slider.setValue(0)
-                self.clear_trajectories()
-            else:
-                self.timer.stop()
-                self.play_button.setText("Play")
-                self.is_playing = False
+    def on_playback_finished(self):
+        # Reached the last frame with looping off
+        self.play_button.setText("Play")
+        self.is_playing = False
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     win = SequenceVisualizer()
+    if '--export' in sys.argv or '--pipe' in sys.argv:
+        # Offscreen frame export instead of the interactive window
+        sys.exit(export_main(win, sys.argv[1:]))
+    if '--record' in sys.argv:
+        # Log control changes for benchmarks/replay_session.py
+        recorder = SessionRecorder(win, sys.argv[sys.argv.index('--record') + 1])
+        app.aboutToQuit.connect(recorder.close)
     win.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,14 +1,22 @@
+import os
 import sys
 import numpy as np
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QGridLayout, QSlider, QLabel,
     QPushButton, QCheckBox, QDoubleSpinBox, QHBoxLayout, QGroupBox, QFrame,
-    QSizePolicy, QSplitter, QRadioButton
+    QSizePolicy, QSplitter, QShortcut, QRadioButton
 )
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor, QPalette, QFont
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QPalette, QFont, QKeySequence
 import pyqtgraph as pg
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pslab import PhasorEvaluator, Trajectory, t, dt, clarke_k, frame_segments
+from pslab.qt import (
+    DIRTY_SIGNALS, DIRTY_FRAME, FieldRenderer, PerfHud, PlaybackClock, RecomputeScheduler, SessionRecorder, export_main,
+    time_markers, vector_style
+)
+
 # --- Styling & Parameters ---
 
 # Modern Dark Theme Colors
@@ -25,11 +33,6 @@ COLOR_NEG_SEQ = ['#FF55FF', '#55FFFF', '#FFFF55']  # Magenta, Cyan, Yellow (Brig
 COLOR_RES_POS = '#FFFFFF'
 COLOR_RES_NEG = '#AAAAAA'
 
-# Parameters
-omega = 2 * np.pi
-t = np.linspace(0, 2, 200)
-angles = np.array([0, 120, 240]) * np.pi / 180
-
 # Configure PyQtGraph global look
 pg.setConfigOption('background', COLOR_BG)
 pg.setConfigOption('foreground', COLOR_TEXT)
@@ -42,6 +45,12 @@ class ClarkeTransformWidget(QWidget):
         self.resize(1200, 800)
         self.apply_stylesheet()
 
+        # Control events only mark what went stale; the scheduler recomputes once per refresh
+        self.scheduler = RecomputeScheduler([
+            (DIRTY_SIGNALS, self.refresh_signals),
+            (DIRTY_FRAME, self.refresh_frame),
+        ], parent=self)
+
         # Default amplitudes
         # Default amplitudes
         self.amp_pos_harmonics = [1.0, 0.0, 0.0, 0.0, 0.0] # H1 to H5
@@ -75,7 +84,7 @@ class ClarkeTransformWidget(QWidget):
         self.slider = QSlider(Qt.Horizontal)
         self.slider.setMinimum(0)
         self.slider.setMaximum(len(t)-1)
-        self.slider.valueChanged.connect(self.update_plots)
+        self.slider.valueChanged.connect(self.scheduler.marker(DIRTY_FRAME))
 
         hbox_buttons = QHBoxLayout()
         self.play_button = QPushButton("Play")
@@ -145,13 +154,13 @@ class ClarkeTransformWidget(QWidget):
         layout_viz = QVBoxLayout()
 
         self.decomposition_checkbox = QCheckBox("Decomposition Mode")
-        self.decomposition_checkbox.stateChanged.connect(self.update_plots)
+        self.decomposition_checkbox.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
         
         self.trajectory_checkbox = QCheckBox("Show Trajectory")
         self.trajectory_checkbox.stateChanged.connect(self.toggle_trajectory)
 
         self.show_rotating_fields_checkbox = QCheckBox("Show Pos/Neg in Combined")
-        self.show_rotating_fields_checkbox.stateChanged.connect(self.update_plots)
+        self.show_rotating_fields_checkbox.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
 
         self.extra_trajectory_checkbox = QCheckBox("Trajectory for Extra Fields")
         self.extra_trajectory_checkbox.setEnabled(False)
@@ -200,20 +209,15 @@ class ClarkeTransformWidget(QWidget):
         # --- Initialization of Graphics Items ---
         
         # --- ABC Items ---
-        # Vectors
-        self.lines_combined, self.tips_combined = self.create_vectors(self.field_combined, COLOR_POS_SEQ + COLOR_NEG_SEQ)
-        self.resultant_line_combined, self.resultant_tip_combined = self.create_resultant(self.field_combined)
+        # Vectors: one renderer draws all lines and tips of the field
+        self.renderer_combined = FieldRenderer(self.field_combined)
+        self.styles_combined = self.create_vector_styles(COLOR_POS_SEQ + COLOR_NEG_SEQ)
 
         # Extra rotating fields for combined
-        self.extra_line_pos = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=2, style=Qt.DashLine))
-        self.extra_tip_pos = pg.ScatterPlotItem(size=10, brush=COLOR_RES_POS)
-        self.field_combined.addItem(self.extra_line_pos)
-        self.field_combined.addItem(self.extra_tip_pos)
-
-        self.extra_line_neg = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_NEG, width=2, style=Qt.DashLine))
-        self.extra_tip_neg = pg.ScatterPlotItem(size=10, brush=COLOR_RES_NEG)
-        self.field_combined.addItem(self.extra_line_neg)
-        self.field_combined.addItem(self.extra_tip_neg)
+        self.styles_extra = [
+            vector_style(COLOR_RES_POS, width=2, size=10, style=Qt.DashLine),
+            vector_style(COLOR_RES_NEG, width=2, size=10, style=Qt.DashLine)
+        ]
 
         # Trajectories ABC
         self.trajectory_combined = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=1))
@@ -230,41 +234,54 @@ class ClarkeTransformWidget(QWidget):
         # Using Orange for Alpha, Cyan for Beta
         COLOR_ALPHA = '#FFA500'
         COLOR_BETA = '#00FFFF'
-        self.lines_clarke, self.tips_clarke = self.create_vectors(self.field_clarke, [COLOR_ALPHA, COLOR_BETA])
-        self.resultant_line_clarke, self.resultant_tip_clarke = self.create_resultant(self.field_clarke)
+        self.renderer_clarke = FieldRenderer(self.field_clarke)
+        self.styles_clarke = self.create_vector_styles([COLOR_ALPHA, COLOR_BETA])
         
         # Trajectory Clarke
         self.trajectory_clarke = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=1))
         self.field_clarke.addItem(self.trajectory_clarke)
 
-        self.traj_points_combined = []
-        self.traj_points_extra_pos = []
-        self.traj_points_extra_neg = []
-        self.traj_points_clarke = []
+        self.traj_combined = Trajectory()
+        self.traj_extra_pos = Trajectory()
+        self.traj_extra_neg = Trajectory()
+        self.traj_clarke = Trajectory()
+        # Frame of t that last added trajectory points (None: none since the last clear)
+        self.trajectory_frame = None
 
         # Initialize signals
         self.compute_signals()
 
         # Signal curves and markers (ABC)
         self.curves_combined = [self.plot_combined.plot(t, self.signals_combined[:, i], pen=pg.mkPen(c, width=2), name=f"{chr(65+i)}") for i, c in enumerate(COLOR_POS_SEQ)]
-        self.marker_combined = [self.plot_combined.plot([t[0]], [self.signals_combined[0, i]], pen=None, symbol='o', symbolBrush=c, symbolSize=8) for i, c in enumerate(COLOR_POS_SEQ)]
+        self.marker_combined = time_markers(self.plot_combined, COLOR_POS_SEQ)
+        self.marker_combined.setPoints(t[0], self.signals_combined[0])
 
         # Signal curves and markers (Clarke)
         self.curves_clarke = []
         self.curves_clarke.append(self.plot_clarke.plot(t, self.signals_alpha, pen=pg.mkPen(COLOR_ALPHA, width=2), name="α"))
         self.curves_clarke.append(self.plot_clarke.plot(t, self.signals_beta, pen=pg.mkPen(COLOR_BETA, width=2), name="β"))
         
-        self.marker_clarke = []
-        self.marker_clarke.append(self.plot_clarke.plot([t[0]], [self.signals_alpha[0]], pen=None, symbol='o', symbolBrush=COLOR_ALPHA, symbolSize=8))
-        self.marker_clarke.append(self.plot_clarke.plot([t[0]], [self.signals_beta[0]], pen=None, symbol='o', symbolBrush=COLOR_BETA, symbolSize=8))
-
-        # Timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.advance_frame)
+        self.marker_clarke = time_markers(self.plot_clarke, [COLOR_ALPHA, COLOR_BETA])
+        self.marker_clarke.setPoints(t[0], [self.signals_alpha[0], self.signals_beta[0]])
+
+        # Playback clock: redraws at display rate, 1x = 20 frames of t per second
+        self.clock = PlaybackClock(len(t), parent=self)
+        self.clock.set_loop(self.loop_checkbox.isChecked())
+        self.clock.frameChanged.connect(self.slider.setValue)
+        self.clock.positionChanged.connect(self.on_clock_position)
+        self.clock.wrapped.connect(self.on_clock_wrapped)
+        self.clock.finished.connect(self.on_playback_finished)
+        self.loop_checkbox.toggled.connect(self.clock.set_loop)
+        self.slider.sliderMoved.connect(self.clock.seek)
         self.is_playing = False
+        self.play_position = 0.0
 
         self.update_plots(0)
 
+        # Performance HUD, toggled with F12; the hot paths are only instrumented while it is shown
+        self.perf_hud = PerfHud(self)
+        QShortcut(QKeySequence(Qt.Key_F12), self, self.perf_hud.toggle)
+
     def apply_stylesheet(self):
         self.setStyleSheet(f"""
             QWidget {{
@@ -365,56 +382,32 @@ class ClarkeTransformWidget(QWidget):
         plot.getPlotItem().setTitle(title, color=COLOR_TEXT, size='11pt')
         return plot
 
-    def create_vectors(self, field, colors):
-        lines = [pg.PlotDataItem(pen=pg.mkPen(c, width=3)) for c in colors]
-        tips = [pg.ScatterPlotItem(size=12, brush=c, pen=None) for c in colors]
-        for line, tip in zip(lines, tips):
-            field.addItem(line)
-            field.addItem(tip)
-        return lines, tips
-
-    def create_resultant(self, field):
-        line = pg.PlotDataItem(pen=pg.mkPen('w', width=4))
-        tip = pg.ScatterPlotItem(size=16, brush='w', pen=None)
-        field.addItem(line)
-        field.addItem(tip)
-        return line, tip
+    def create_vector_styles(self, colors):
+        # Styles of the field vectors, followed by the resultant
+        return [vector_style(c) for c in colors] + [vector_style('w', width=4, size=16)]
 
     def compute_signals(self):
         # Positive Sequence: Sum of Harmonics 1-5
         # V_pos = Sum( A_h * cos(h * (omega*t - angle)) )
-        self.signals_pos = np.zeros((len(t), 3))
-        
-        for h_idx, amp in enumerate(self.amp_pos_harmonics):
-            h_order = h_idx + 1
-            if amp > 0.001:
-                # Calculate harmonic component for all time and phases
-                # Shape: (200, 3)
-                component = np.array([[amp * np.cos(h_order * (omega * ti - angle)) for angle in angles] for ti in t])
-                self.signals_pos += component
-
-        self.signals_neg = np.array([[self.amp_neg * np.cos(omega * ti + angle) for angle in angles] for ti in t])
-        self.signals_combined = self.signals_pos + self.signals_neg
-        
-        # Clarke Transform (Power Invariant)
-        # alpha = sqrt(2/3) * (a - 0.5b - 0.5c)
-        # beta  = sqrt(2/3) * (sqrt(3)/2 * b - sqrt(3)/2 * c)
-        
-        a = self.signals_combined[:, 0]
-        b = self.signals_combined[:, 1]
-        c = self.signals_combined[:, 2]
-        
-        if self.radio_amp_inv.isChecked():
-            k = 2/3
-        else:
-            k = np.sqrt(2/3)
-            
-        self.signals_alpha = k * (a - 0.5*b - 0.5*c)
-        self.signals_beta  = k * (np.sqrt(3)/2 * b - np.sqrt(3)/2 * c)
+        # Clarke Transform: power invariant (k=sqrt(2/3)) or amplitude invariant (k=2/3)
+        k = clarke_k(power_invariant=not self.radio_amp_inv.isChecked())
+        # Geometry of every frame of t, so a paused update_plots only indexes into it
+        self.evaluator = PhasorEvaluator(self.amp_pos_harmonics, self.amp_neg, k)
+        self.frames = self.evaluator.evaluate(t)
+        signals = self.frames.signals
+
+        self.signals_pos = signals.pos
+        self.signals_neg = signals.neg
+        self.signals_combined = signals.combined
+        self.signals_alpha = signals.alpha
+        self.signals_beta = signals.beta
 
     def update_amplitudes(self):
         self.amp_pos_harmonics = [spin.value() for spin in self.amp_pos_inputs]
         self.amp_neg = self.amp_neg_input.value()
+        self.scheduler.mark(DIRTY_SIGNALS | DIRTY_FRAME)
+
+    def refresh_signals(self):
         self.compute_signals()
         
         # Update ABC curves
@@ -424,17 +417,33 @@ class ClarkeTransformWidget(QWidget):
         # Update Clarke curves
         self.curves_clarke[0].setData(t, self.signals_alpha)
         self.curves_clarke[1].setData(t, self.signals_beta)
-        
-        self.update_plots(self.slider.value())
 
-    def update_plots(self, frame):
+    def refresh_frame(self):
+        # While playing, draw at the exact clock position between the frames of t
+        self.update_plots(self.slider.value(), self.play_position if self.is_playing else None)
+
+    def on_clock_position(self, position):
+        self.play_position = position
+        self.scheduler.mark(DIRTY_FRAME)
+
+    def phasor_state(self, position):
+        # Frames of t are precomputed, positions between them are evaluated
+        position %= len(t)
+        if position == int(position):
+            return self.frames, int(position)
+        return self.evaluator.evaluate(position * dt), 0
+
+    def update_plots(self, frame, position=None):
         # Handle slider vs direct call
         if isinstance(frame, int):
             pass
         else:
             frame = self.slider.value()
             
-        self.slider_label.setText(f"Time: {t[frame]:.2f} s")
+        # position: fractional frame to draw instead of ``frame`` (playback, export)
+        state, i = self.phasor_state(frame if position is None else position)
+        crossed = self.crossed_frames(int((frame if position is None else position) % len(t)), position is not None)
+        self.slider_label.setText(f"Time: {state.time[i]:.2f} s")
 
         # Enable extra trajectory checkbox only if conditions are met
         self.extra_trajectory_checkbox.setEnabled(
@@ -445,139 +454,60 @@ class ClarkeTransformWidget(QWidget):
 
         # --- ABC Mode Updates ---
         # Update markers
-        for i in range(3):
-            self.marker_combined[i].setData([t[frame]], [self.signals_combined[frame, i]])
-
-        # Compute vectors
-        vectors_pos = [(self.signals_pos[frame, i]*np.cos(angles[i]), self.signals_pos[frame, i]*np.sin(angles[i])) for i in range(3)]
-        vectors_neg = [(self.signals_neg[frame, i]*np.cos(angles[i]), self.signals_neg[frame, i]*np.sin(angles[i])) for i in range(3)]
-        vectors_combined = vectors_pos + vectors_neg
-        
-        sum_pos = (sum(v[0] for v in vectors_pos), sum(v[1] for v in vectors_pos))
-        sum_neg = (sum(v[0] for v in vectors_neg), sum(v[1] for v in vectors_neg))
-        
-        # Update combined vectors
-        self.update_field_vectors(self.lines_combined, self.tips_combined, vectors_combined, self.resultant_line_combined, self.resultant_tip_combined, decomposition)
+        self.marker_combined.setPoints(state.time[i], state.signals.combined[i])
 
         # Fix for artifact when amplitude is 0: Hide vectors if amplitude is 0
-        # Positive Sequence (Indices 0-2)
-        # Fix for artifact when amplitude is 0: Hide vectors if amplitude is 0
-        # Positive Sequence (Indices 0-2)
+        # Positive Sequence (Indices 0-2), Negative Sequence (Indices 3-5), then the resultant
         # Check if any harmonic has amplitude
         total_pos_amp = sum(self.amp_pos_harmonics)
-        if total_pos_amp < 0.01:
-            for i in range(3):
-                self.lines_combined[i].setVisible(False)
-                self.tips_combined[i].setVisible(False)
-        else:
-            for i in range(3):
-                self.lines_combined[i].setVisible(True)
-                self.tips_combined[i].setVisible(True)
-
-        # Negative Sequence (Indices 3-5)
-        if self.amp_neg < 0.01:
-            for i in range(3, 6):
-                self.lines_combined[i].setVisible(False)
-                self.tips_combined[i].setVisible(False)
-        else:
-            for i in range(3, 6):
-                self.lines_combined[i].setVisible(True)
-                self.tips_combined[i].setVisible(True)
+        show_pos = total_pos_amp >= 0.01
+        show_neg = self.amp_neg >= 0.01
+        shown = [show_pos] * 3 + [show_neg] * 3 + [True]
+
+        # Combined vectors, plus the extra rotating fields (negative resultant added on top of positive)
+        segments_combined = frame_segments(state.combined, i, decomposition)
+        styles_combined = self.styles_combined
+        extra_pos, extra_neg = state.extra.chain[i]
+        if self.show_rotating_fields_checkbox.isChecked():
+            segments_combined = (segments_combined, state.extra.chain[i])
+            styles_combined = styles_combined + self.styles_extra
+            shown += [show_pos, show_neg]
+        self.renderer_combined.draw(segments_combined, styles_combined, shown)
 
         # --- Clarke Mode Updates ---
         # Update markers
-        self.marker_clarke[0].setData([t[frame]], [self.signals_alpha[frame]])
-        self.marker_clarke[1].setData([t[frame]], [self.signals_beta[frame]])
+        self.marker_clarke.setPoints(state.time[i], [state.signals.alpha[i], state.signals.beta[i]])
         
         # Vectors: Alpha is on X axis, Beta is on Y axis
-        val_alpha = self.signals_alpha[frame]
-        val_beta = self.signals_beta[frame]
-        
-        vec_alpha = (val_alpha, 0)
-        vec_beta = (0, val_beta)
-        vectors_clarke = [vec_alpha, vec_beta]
-        
-        self.update_field_vectors(self.lines_clarke, self.tips_clarke, vectors_clarke, self.resultant_line_clarke, self.resultant_tip_clarke, decomposition)
-        
-        # Extra rotating fields in combined (Applicable to both modes if desired, but usually for ABC)
-        if self.show_rotating_fields_checkbox.isChecked():
-            # Positive resultant (reconstructed)
-            if total_pos_amp >= 0.01:
-                x_pos = sum_pos[0]
-                y_pos = sum_pos[1]
-                self.extra_line_pos.setData([0, x_pos], [0, y_pos])
-                self.extra_tip_pos.setData([x_pos], [y_pos])
-            else:
-                self.extra_line_pos.setData([], [])
-                self.extra_tip_pos.setData([], [])
-                x_pos, y_pos = 0, 0 # Needed for negative offset
-
-            # Negative resultant (added on top of positive)
-            if self.amp_neg >= 0.01:
-                x_neg = sum_neg[0]
-                y_neg = sum_neg[1]
-                self.extra_line_neg.setData([x_pos, x_pos + x_neg], [y_pos, y_pos + y_neg])
-                self.extra_tip_neg.setData([x_pos + x_neg], [y_pos + y_neg])
-            else:
-                self.extra_line_neg.setData([], [])
-                self.extra_tip_neg.setData([], [])
-        else:
-            self.extra_line_pos.setData([], [])
-            self.extra_tip_pos.setData([], [])
-            self.extra_line_neg.setData([], [])
-            self.extra_tip_neg.setData([], [])
+        self.renderer_clarke.draw(frame_segments(state.clarke, i, decomposition), self.styles_clarke)
 
         # Update trajectory if enabled
-        if self.trajectory_checkbox.isChecked():
-            self.update_trajectory(self.resultant_line_combined, self.traj_points_combined, self.trajectory_combined)
-            self.update_trajectory(self.resultant_line_clarke, self.traj_points_clarke, self.trajectory_clarke)
+        if self.trajectory_checkbox.isChecked() and len(crossed):
+            self.update_trajectory(self.frames.combined.resultant[crossed], self.traj_combined, self.trajectory_combined)
+            self.update_trajectory(self.frames.clarke.resultant[crossed], self.traj_clarke, self.trajectory_clarke)
 
             # Extra trajectories if enabled
             if self.extra_trajectory_checkbox.isChecked() and self.show_rotating_fields_checkbox.isChecked():
-                # Positive extra trajectory
-                x_pos = sum_pos[0]
-                y_pos = sum_pos[1]
-                self.traj_points_extra_pos.append((x_pos, y_pos))
-                xs, ys = zip(*self.traj_points_extra_pos)
-                self.extra_trajectory_pos.setData(xs, ys)
-
-                # Negative extra trajectory
-                x_neg = sum_neg[0]
-                y_neg = sum_neg[1]
-                
-                tip_x = x_pos + x_neg
-                tip_y = y_pos + y_neg
-                
-                self.traj_points_extra_neg.append((tip_x, tip_y))
-                xs, ys = zip(*self.traj_points_extra_neg)
-                self.extra_trajectory_neg.setData(xs, ys)
-
-    def update_field_vectors(self, lines, tips, vectors, resultant_line, resultant_tip, decomposition):
-        if decomposition:
-            points = [(0, 0)]
-            for vec in vectors:
-                last = points[-1]
-                points.append((last[0] + vec[0], last[1] + vec[1]))
-            for i, (line, tip) in enumerate(zip(lines, tips)):
-                line.setData([points[i][0], points[i+1][0]], [points[i][1], points[i+1][1]])
-                tip.setData([points[i+1][0]], [points[i+1][1]])
-            resultant_line.setData([0, points[-1][0]], [0, points[-1][1]])
-            resultant_tip.setData([points[-1][0]], [points[-1][1]])
-        else:
-            x_sum = sum(v[0] for v in vectors)
-            y_sum = sum(v[1] for v in vectors)
-            for line, tip, vec in zip(lines, tips, vectors):
-                line.setData([0, vec[0]], [0, vec[1]])
-                tip.setData([vec[0]], [vec[1]])
-            resultant_line.setData([0, x_sum], [0, y_sum])
-            resultant_tip.setData([x_sum], [y_sum])
-
-    def update_trajectory(self, resultant_line, traj_points, trajectory_item):
-        x = resultant_line.xData[-1]
-        y = resultant_line.yData[-1]
-        traj_points.append((x, y))
-        xs, ys = zip(*traj_points)
-        trajectory_item.setData(xs, ys)
+                extra = self.frames.extra.chain[crossed]
+                self.update_trajectory(extra[:, 0], self.traj_extra_pos, self.extra_trajectory_pos)
+                self.update_trajectory(extra[:, 1], self.traj_extra_neg, self.extra_trajectory_neg)
+
+    def crossed_frames(self, frame, playing):
+        # Frames of t due a trajectory point: while playing, every frame passed since the
+        # last redraw (however often the clock redraws), otherwise the shown frame if it
+        # changed. Points come from the precomputed frames, so a loop holds len(t) exact points.
+        last = self.trajectory_frame
+        self.trajectory_frame = frame
+        if last == frame:
+            return np.arange(0)
+        if last is None or not playing:
+            return np.array([frame])
+        return (last + 1 + np.arange((frame - last) % len(t))) % len(t)
+
+    def update_trajectory(self, resultants, traj, trajectory_item):
+        # resultants: segments from the origin to the resultant tips, one per frame
+        traj.extend(resultants[:, 0, 1], resultants[:, 1, 1])
+        trajectory_item.setData(*traj.data())
 
     def toggle_trajectory(self):
         if not self.trajectory_checkbox.isChecked():
@@ -585,23 +515,29 @@ class ClarkeTransformWidget(QWidget):
 
     def toggle_extra_trajectory(self):
         if not self.extra_trajectory_checkbox.isChecked():
-            self.traj_points_extra_pos.clear()
-            self.traj_points_extra_neg.clear()
+            self.traj_extra_pos.clear()
+            self.traj_extra_neg.clear()
             self.extra_trajectory_pos.setData([], [])
             self.extra_trajectory_neg.setData([], [])
 
+    def on_clock_wrapped(self):
+        # A new loop: its trajectory starts from frame 0, whichever frame is drawn first
+        self.clear_trajectories()
+        self.trajectory_frame = -1
+
     def clear_trajectories(self):
-        self.traj_points_combined.clear()
-        self.traj_points_extra_pos.clear()
-        self.traj_points_extra_neg.clear()
-        self.traj_points_clarke.clear()
+        self.trajectory_frame = None
+        self.traj_combined.clear()
+        self.traj_extra_pos.clear()
+        self.traj_extra_neg.clear()
+        self.traj_clarke.clear()
         self.trajectory_combined.setData([], [])
         self.extra_trajectory_pos.setData([], [])
         self.extra_trajectory_neg.setData([], [])
         self.trajectory_clarke.setData([], [])
 
     def reset_all(self):
-        self.timer.stop()
+        self.clock.stop()
         self.is_playing = False
         self.play_button.setText("Play")
         self.slider.setValue(0)
@@ -609,28 +545,27 @@ class ClarkeTransformWidget(QWidget):
 
     def toggle_play(self):
         if self.is_playing:
-            self.timer.stop()
+            self.clock.stop()
             self.play_button.setText("Play")
         else:
-            self.timer.start(50)
+            self.clock.start(self.slider.value())
             self.play_button.setText("Pause")
         self.is_playing = not self.is_playing
 
-    def advance_frame(self):
-        current = self.slider.value()
-        if current < self.slider.maximum():
-            self.slider.setValue(current + 1)
-        else:
-            if self.loop_checkbox.isChecked():
-                self.slider.setValue(0)
-                self.clear_trajectories()
-            else:
-                self.timer.stop()
-                self.play_button.setText("Play")
-                self.is_playing = False
+    def on_playback_finished(self):
+        # Reached the last frame with looping off
+        self.play_button.setText("Play")
+        self.is_playing = False
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     win = ClarkeTransformWidget()
+    if '--export' in sys.argv or '--pipe' in sys.argv:
+        # Offscreen frame export instead of the interactive window
+        sys.exit(export_main(win, sys.argv[1:]))
+    if '--record' in sys.argv:
+        # Log control changes for benchmarks/replay_session.py
+        recorder = SessionRecorder(win, sys.argv[sys.argv.index('--record') + 1])
+        app.aboutToQuit.connect(recorder.close)
     win.show()
     sys.exit(app.exec_())
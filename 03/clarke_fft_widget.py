@@ -1,15 +1,27 @@
+import os
 import sys
+from collections import namedtuple
 import numpy as np
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QGridLayout, QSlider, QLabel,
     QPushButton, QCheckBox, QDoubleSpinBox, QHBoxLayout, QGroupBox, QFrame,
-    QSizePolicy, QSplitter, QRadioButton, QComboBox, QColorDialog
+    QSizePolicy, QSplitter, QShortcut, QRadioButton, QComboBox, QColorDialog
 )
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor, QPalette, QFont, QPixmap, QIcon, QPainter, QPen, QBrush, QPolygonF
+from PyQt5.QtGui import QColor, QPalette, QFont, QKeySequence, QPixmap, QIcon, QPainter, QPen, QBrush, QPolygonF
 from PyQt5.QtCore import QPointF, QRectF
 import pyqtgraph as pg
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pslab import (
+    t, dt, clarke_k, HarmonicCache, PhasorEvaluator, Signals, Trajectory, sequence_signals, harmonic_spectra, measured_spectra,
+    analytic_spectra, coherent_spectra, interpolated_spectra, zoom_spectrum, select_signal, line_sources, WINDOW_NAMES, get_window, chain_terms, chain_vectors, tip_to_tail, frame_segments, segments
+)
+from pslab.qt import (
+    DIRTY_SIGNALS, DIRTY_SPECTRUM, DIRTY_FRAME, DIRTY_ZOOM, ComputeWorker, FieldRenderer, PerfHud, PlaybackClock,
+    RecomputeScheduler, SessionRecorder, StyleCache, export_main, time_markers
+)
+
 # --- Styling & Parameters ---
 
 # Modern Dark Theme Colors
@@ -26,11 +38,20 @@ COLOR_NEG_SEQ = ['#FF55FF', '#55FFFF', '#FFFF55']  # Magenta, Cyan, Yellow (Brig
 COLOR_RES_POS = '#FFFFFF'
 COLOR_RES_NEG = '#AAAAAA'
 
-# Parameters
-omega = 2 * np.pi
-t = np.linspace(0, 2, 200)
-dt = t[1] - t[0]
-angles = np.array([0, 120, 240]) * np.pi / 180
+# Immutable inputs of one recompute, and what the worker hands back for them
+ComputeRequest = namedtuple('ComputeRequest', ['amp_pos_harmonics', 'amp_neg', 'k', 'spectrum_mode', 'window'])
+ComputeResult = namedtuple(
+    'ComputeResult', ['request', 'signals', 'spectra', 'sources', 'record', 'measured', 'evaluator', 'frames']
+)
+
+# The FFT plot shows a chirp-z zoom spectrum of the measured record once its
+# visible band is at most this many orders wide, sampled at ZOOM_POINTS
+ZOOM_MAX_ORDERS = 2.0
+ZOOM_POINTS = 400
+
+# The interpolated mode measures only the first INTERPOLATED_SECONDS of the
+# record (7.5 fundamental cycles: not whole, as an unsynchronized acquisition)
+INTERPOLATED_SECONDS = 7.5
 
 # Configure PyQtGraph global look
 pg.setConfigOption('background', COLOR_BG)
@@ -132,6 +153,14 @@ class ClarkeFFTWidget(QWidget):
         self.resize(1200, 900) # Increased height for 3rd row
         self.apply_stylesheet()
 
+        # Control events only mark what went stale; the scheduler recomputes once per refresh
+        self.scheduler = RecomputeScheduler([
+            (DIRTY_SIGNALS, self.request_compute),
+            (DIRTY_SPECTRUM, self.show_spectrum),
+            (DIRTY_SPECTRUM | DIRTY_ZOOM, self.show_zoom),
+            (DIRTY_FRAME, self.refresh_frame),
+        ], parent=self)
+
         # Default amplitudes
         self.amp_pos_harmonics = [1.0] + [0.0] * 12 # H1 to H13
         self.amp_neg = 0.1
@@ -166,7 +195,7 @@ class ClarkeFFTWidget(QWidget):
         self.slider = QSlider(Qt.Horizontal)
         self.slider.setMinimum(0)
         self.slider.setMaximum(len(t)-1)
-        self.slider.valueChanged.connect(self.update_plots)
+        self.slider.valueChanged.connect(self.scheduler.marker(DIRTY_FRAME))
 
         hbox_buttons = QHBoxLayout()
         self.play_button = QPushButton("Play")
@@ -183,7 +212,7 @@ class ClarkeFFTWidget(QWidget):
         hbox_speed = QHBoxLayout()
         hbox_speed.addWidget(QLabel("Speed:"))
         self.combo_speed = QComboBox()
-        self.combo_speed.addItems(["0.25x", "0.5x", "1x", "2x", "5x", "10x"])
+        self.combo_speed.addItems(["0.25x", "0.5x", "1x", "2x", "5x", "10x", "20x", "50x", "100x"])
         self.combo_speed.setCurrentIndex(2) # Default 1x
         self.combo_speed.currentIndexChanged.connect(self.on_speed_changed)
         hbox_speed.addWidget(self.combo_speed)
@@ -316,9 +345,32 @@ class ClarkeFFTWidget(QWidget):
             "Complex Vector (α + jβ)"
         ])
         self.fft_signal_combo.setCurrentText("Complex Vector (α + jβ)") # Default
-        self.fft_signal_combo.currentIndexChanged.connect(self.compute_fft)
+        self.fft_signal_combo.currentIndexChanged.connect(self.scheduler.marker(DIRTY_SPECTRUM))
         layout_fft.addWidget(self.fft_signal_combo)
         
+        # Analytic: exact lines from the amplitudes. Measured: full-band windowed FFT peaks of the sampled
+        # record (interharmonics and imported data included). Harmonic bins: windowed DFT of the same record
+        # at the displayed harmonic orders only. Zooming the plot into a narrow band adds the record's zoom spectrum.
+        # Coherent: unwindowed FFT of the shortest record of whole cycles that resolves the harmonics.
+        # Interpolated: windowed FFT of a few cycles, each peak moved between the bins to its line.
+        layout_fft.addWidget(QLabel("Spectrum:"))
+        self.fft_mode_combo = QComboBox()
+        self.fft_mode_combo.addItems([
+            "Analytic (exact)", "Measured (FFT)", "Harmonic bins (DFT)", "Coherent (FFT)", "Interpolated (short FFT)"
+        ])
+        self.fft_mode_combo.currentIndexChanged.connect(self.scheduler.marker(DIRTY_SIGNALS))
+        layout_fft.addWidget(self.fft_mode_combo)
+        # Window of the measured, harmonic-bin and interpolated records (the coherent record needs none, the analytic lines no record)
+        self.fft_window_label = QLabel("Window:")
+        layout_fft.addWidget(self.fft_window_label)
+        self.fft_window_combo = QComboBox()
+        self.fft_window_combo.addItems(WINDOW_NAMES)
+        self.fft_window_combo.currentIndexChanged.connect(self.scheduler.marker(DIRTY_SIGNALS))
+        layout_fft.addWidget(self.fft_window_combo)
+        self.fft_record_label = QLabel()
+        self.fft_record_label.setWordWrap(True)
+        layout_fft.addWidget(self.fft_record_label)
+        
         group_fft.setLayout(layout_fft)
         sidebar_layout.addWidget(group_fft)
 
@@ -331,21 +383,21 @@ class ClarkeFFTWidget(QWidget):
 
         self.decomposition_checkbox = QCheckBox("Decomposition Mode")
         self.decomposition_checkbox.setChecked(True) # Default Checked
-        self.decomposition_checkbox.stateChanged.connect(self.update_plots)
+        self.decomposition_checkbox.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
         
         self.trajectory_checkbox = QCheckBox("Show Trajectory")
         self.trajectory_checkbox.setChecked(True) # Default Checked
         self.trajectory_checkbox.stateChanged.connect(self.toggle_trajectory)
 
         self.show_rotating_fields_checkbox = QCheckBox("Show Pos/Neg in Combined")
-        self.show_rotating_fields_checkbox.stateChanged.connect(self.update_plots)
+        self.show_rotating_fields_checkbox.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
 
         self.extra_trajectory_checkbox = QCheckBox("Trajectory for Extra Fields")
         self.extra_trajectory_checkbox.setEnabled(False)
         self.extra_trajectory_checkbox.stateChanged.connect(self.toggle_extra_trajectory)
 
         self.chk_harmonic_rot = QCheckBox("Rot. Each Harm")
-        self.chk_harmonic_rot.stateChanged.connect(self.update_plots)
+        self.chk_harmonic_rot.stateChanged.connect(self.scheduler.marker(DIRTY_FRAME))
         self.chk_harmonic_rot.stateChanged.connect(self.toggle_show_harmonics_btn)
 
         self.btn_show_harmonics = QPushButton("Show My Harmonics")
@@ -412,22 +464,20 @@ class ClarkeFFTWidget(QWidget):
         main_layout.addWidget(content_widget)
 
         # --- Initialization of Graphics Items ---
+
+        # Pens and brushes are built once per (color, width, size, style); see on_color_changed
+        self.style_cache = StyleCache()
         
         # --- ABC Items ---
-        # Vectors
-        self.lines_combined, self.tips_combined = self.create_vectors(self.field_combined, COLOR_POS_SEQ + COLOR_NEG_SEQ)
-        self.resultant_line_combined, self.resultant_tip_combined = self.create_resultant(self.field_combined)
+        # Vectors: one renderer draws all lines and tips of the field, in every mode
+        self.renderer_combined = FieldRenderer(self.field_combined)
+        self.styles_combined = self.create_vector_styles(COLOR_POS_SEQ + COLOR_NEG_SEQ)
 
         # Extra rotating fields for combined
-        self.extra_line_pos = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=2, style=Qt.DashLine))
-        self.extra_tip_pos = pg.ScatterPlotItem(size=10, brush=COLOR_RES_POS)
-        self.field_combined.addItem(self.extra_line_pos)
-        self.field_combined.addItem(self.extra_tip_pos)
-
-        self.extra_line_neg = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_NEG, width=2, style=Qt.DashLine))
-        self.extra_tip_neg = pg.ScatterPlotItem(size=10, brush=COLOR_RES_NEG)
-        self.field_combined.addItem(self.extra_line_neg)
-        self.field_combined.addItem(self.extra_tip_neg)
+        self.styles_extra = [
+            self.style_cache.get(COLOR_RES_POS, width=2, size=10, style=Qt.DashLine),
+            self.style_cache.get(COLOR_RES_NEG, width=2, size=10, style=Qt.DashLine)
+        ]
 
         # Trajectories ABC
         self.trajectory_combined = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=1))
@@ -439,73 +489,82 @@ class ClarkeFFTWidget(QWidget):
         self.extra_trajectory_neg = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_NEG, width=1, style=Qt.DotLine))
         self.field_combined.addItem(self.extra_trajectory_neg)
 
-        # Harmonic Rotating Vectors (Pool for up to 20 vectors)
-        self.lines_harmonics = []
-        self.tips_harmonics = []
-        for _ in range(20):
-            line = pg.PlotDataItem(pen=pg.mkPen('w', width=2))
-            tip = pg.ScatterPlotItem(size=10, brush='w', pen=None)
-            self.field_combined.addItem(line)
-            self.field_combined.addItem(tip)
-            line.setVisible(False)
-            tip.setVisible(False)
-            self.lines_harmonics.append(line)
-            self.tips_harmonics.append(tip)
-        
         # --- Clarke Items ---
         # Vectors (Alpha, Beta)
         COLOR_ALPHA = '#FFA500'
         COLOR_BETA = '#00FFFF'
-        self.lines_clarke, self.tips_clarke = self.create_vectors(self.field_clarke, [COLOR_ALPHA, COLOR_BETA])
-        self.resultant_line_clarke, self.resultant_tip_clarke = self.create_resultant(self.field_clarke)
+        self.renderer_clarke = FieldRenderer(self.field_clarke)
+        self.styles_clarke = self.create_vector_styles([COLOR_ALPHA, COLOR_BETA])
         
         # Trajectory Clarke
         self.trajectory_clarke = pg.PlotDataItem(pen=pg.mkPen(COLOR_RES_POS, width=1))
         self.field_clarke.addItem(self.trajectory_clarke)
 
-        self.traj_points_combined = []
-        self.traj_points_extra_pos = []
-        self.traj_points_extra_neg = []
-        self.traj_points_clarke = []
-
-        self.traj_points_clarke = []
+        self.traj_combined = Trajectory()
+        self.traj_extra_pos = Trajectory()
+        self.traj_extra_neg = Trajectory()
+        self.traj_clarke = Trajectory()
+        # Frame of t that last added trajectory points (None: none since the last clear)
+        self.trajectory_frame = None
 
         # FFT Curve (Stem Plot)
-        # Vertical lines (Pool for individual coloring)
-        self.fft_lines_pool = []
-        for _ in range(50): # Pool of 50 lines
-            line = pg.PlotDataItem(pen=pg.mkPen('#007acc', width=2))
-            self.plot_fft.addItem(line)
-            line.setVisible(False)
-            self.fft_lines_pool.append(line)
-            
-        # Markers (Red Circles)
-        self.fft_stem_markers = pg.ScatterPlotItem(size=10, brush='#FF0000', pen=None)
-        self.plot_fft.addItem(self.fft_stem_markers)
+        # All stems in one multi-segment item and all heads in one scatter, colored per line
+        self.stem_renderer = FieldRenderer(self.plot_fft)
+
+        # Zoom spectrum of the visible band, redrawn when the view range changes
+        self.zoom_curve = pg.PlotDataItem(pen=pg.mkPen(COLOR_TEXT, width=1))
+        self.plot_fft.addItem(self.zoom_curve)
+        self.plot_fft.getViewBox().sigXRangeChanged.connect(self.scheduler.marker(DIRTY_ZOOM))
+
+        # Time vector for FFT (more cycles to improve resolution/windowing)
+        # Original t is 0-2s (2 cycles). We use 100s (100 cycles) for FFT.
+        self.t_fft = np.arange(0, 100, dt)
+        
+        # Unit harmonic components on t_fft, so a spinbox change only updates its own harmonic
+        self.pos_cache = HarmonicCache(self.t_fft, np.arange(1, 14), min_amplitude=0.001)
+        self.neg_cache = HarmonicCache(self.t_fft, [1], sequence=-1)
 
         # Initialize signals (Computes signals and FFT, so must be after curve_fft is created)
-        self.compute_signals()
+        self.update_stem_styles()
+        self.apply_result(self.compute(self.snapshot()))
+        self.show_spectrum()
+
+        # Later recomputes run on a worker thread; stale results are dropped
+        self.worker = ComputeWorker(self.compute, parent=self)
+        self.worker.resultReady.connect(self.on_compute_done)
 
         # Signal curves and markers (ABC)
         self.curves_combined = [self.plot_combined.plot(t, self.signals_combined[:, i], pen=pg.mkPen(c, width=2), name=f"{chr(65+i)}") for i, c in enumerate(COLOR_POS_SEQ)]
-        self.marker_combined = [self.plot_combined.plot([t[0]], [self.signals_combined[0, i]], pen=None, symbol='o', symbolBrush=c, symbolSize=8) for i, c in enumerate(COLOR_POS_SEQ)]
+        self.marker_combined = time_markers(self.plot_combined, COLOR_POS_SEQ)
+        self.marker_combined.setPoints(t[0], self.signals_combined[0])
 
         # Signal curves and markers (Clarke)
         self.curves_clarke = []
         self.curves_clarke.append(self.plot_clarke.plot(t, self.signals_alpha, pen=pg.mkPen(COLOR_ALPHA, width=2), name="α"))
         self.curves_clarke.append(self.plot_clarke.plot(t, self.signals_beta, pen=pg.mkPen(COLOR_BETA, width=2), name="β"))
         
-        self.marker_clarke = []
-        self.marker_clarke.append(self.plot_clarke.plot([t[0]], [self.signals_alpha[0]], pen=None, symbol='o', symbolBrush=COLOR_ALPHA, symbolSize=8))
-        self.marker_clarke.append(self.plot_clarke.plot([t[0]], [self.signals_beta[0]], pen=None, symbol='o', symbolBrush=COLOR_BETA, symbolSize=8))
-
-        # Timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.advance_frame)
+        self.marker_clarke = time_markers(self.plot_clarke, [COLOR_ALPHA, COLOR_BETA])
+        self.marker_clarke.setPoints(t[0], [self.signals_alpha[0], self.signals_beta[0]])
+
+        # Playback clock: redraws at display rate, 1x = 20 frames of t per second
+        self.clock = PlaybackClock(len(t), parent=self)
+        self.clock.set_loop(self.loop_checkbox.isChecked())
+        self.clock.set_speed(self.playback_speed())
+        self.clock.frameChanged.connect(self.slider.setValue)
+        self.clock.positionChanged.connect(self.on_clock_position)
+        self.clock.wrapped.connect(self.on_clock_wrapped)
+        self.clock.finished.connect(self.on_playback_finished)
+        self.loop_checkbox.toggled.connect(self.clock.set_loop)
+        self.slider.sliderMoved.connect(self.clock.seek)
         self.is_playing = False
+        self.play_position = 0.0
 
         self.update_plots(0)
 
+        # Performance HUD, toggled with F12; the hot paths are only instrumented while it is shown
+        self.perf_hud = PerfHud(self)
+        QShortcut(QKeySequence(Qt.Key_F12), self, self.perf_hud.toggle)
+
     def apply_stylesheet(self):
         self.setStyleSheet(f"""
             QWidget {{
@@ -616,153 +675,183 @@ class ClarkeFFTWidget(QWidget):
         plot.getPlotItem().setTitle(title, color=COLOR_TEXT, size='11pt')
         return plot
 
-    def create_vectors(self, field, colors):
-        lines = [pg.PlotDataItem(pen=pg.mkPen(c, width=3)) for c in colors]
-        tips = [pg.ScatterPlotItem(size=12, brush=c, pen=None) for c in colors]
-        for line, tip in zip(lines, tips):
-            field.addItem(line)
-            field.addItem(tip)
-        return lines, tips
-
-    def create_resultant(self, field):
-        line = pg.PlotDataItem(pen=pg.mkPen('w', width=4))
-        tip = pg.ScatterPlotItem(size=16, brush='w', pen=None)
-        field.addItem(line)
-        field.addItem(tip)
-        return line, tip
-
-    def compute_signals(self):
-        # Create time vector for FFT (more cycles to improve resolution/windowing)
-        # Original t is 0-2s (2 cycles). We use 100s (100 cycles) for FFT.
-        self.t_fft = np.arange(0, 100, dt)
-        
-        # Positive Sequence: Sum of Harmonics 1-5
-        self.signals_pos_fft = np.zeros((len(self.t_fft), 3))
-        
-        for h_idx, amp in enumerate(self.amp_pos_harmonics):
-            h_order = h_idx + 1
-            if amp > 0.001:
-                component = np.array([[amp * np.cos(h_order * (omega * ti - angle)) for angle in angles] for ti in self.t_fft])
-                self.signals_pos_fft += component
-
-        self.signals_neg_fft = np.array([[self.amp_neg * np.cos(omega * ti + angle) for angle in angles] for ti in self.t_fft])
-        self.signals_combined_fft = self.signals_pos_fft + self.signals_neg_fft
-        
-        # Clarke Transform FFT
-        a = self.signals_combined_fft[:, 0]
-        b = self.signals_combined_fft[:, 1]
-        c = self.signals_combined_fft[:, 2]
-        
-        if self.radio_amp_inv.isChecked():
-            k = 2/3
-        else:
-            k = np.sqrt(2/3)
-            
-        self.signals_alpha_fft = k * (a - 0.5*b - 0.5*c)
-        self.signals_beta_fft  = k * (np.sqrt(3)/2 * b - np.sqrt(3)/2 * c)
+    def create_vector_styles(self, colors):
+        # Styles of the field vectors, followed by the resultant
+        return [self.style_cache.get(c) for c in colors] + [self.style_cache.get('w', width=4, size=16)]
+
+    def snapshot(self):
+        return ComputeRequest(
+            tuple(self.amp_pos_harmonics),
+            self.amp_neg,
+            clarke_k(power_invariant=not self.radio_amp_inv.isChecked()),
+            self.fft_mode_combo.currentText(),
+            self.fft_window_combo.currentText()
+        )
+
+    def request_compute(self):
+        self.worker.submit(self.snapshot())
+
+    def compute(self, request):
+        # Runs on the worker thread: only touches the caches and the immutable request
+        signals_fft = self.compute_signals(request)
+        spectra, sources, record = self.compute_fft(request, signals_fft)
         
-        # Slice for display (first N points corresponding to t)
+        # Slice for display (first N points corresponding to t), copied out of the caches
         n_display = len(t)
-        self.signals_pos = self.signals_pos_fft[:n_display]
-        self.signals_neg = self.signals_neg_fft[:n_display]
-        self.signals_combined = self.signals_combined_fft[:n_display]
-        self.signals_alpha = self.signals_alpha_fft[:n_display]
-        self.signals_beta = self.signals_beta_fft[:n_display]
+        signals = Signals(*(signal[:n_display].copy() for signal in signals_fft))
+        # Phasor geometry of every displayed frame, plus the evaluator for positions between them
+        evaluator = PhasorEvaluator(request.amp_pos_harmonics, request.amp_neg, request.k)
+        # The measured record for zoom spectra; combined, alpha and beta are fresh arrays, not cache buffers
+        measured = None
+        if request.spectrum_mode in ("Measured (FFT)", "Harmonic bins (DFT)"):
+            measured = Signals(None, None, signals_fft.combined, signals_fft.alpha, signals_fft.beta)
+        elif request.spectrum_mode == "Interpolated (short FFT)":
+            measured = self.short_record(signals_fft)
+        return ComputeResult(request, signals, spectra, sources, record, measured, evaluator, evaluator.evaluate(t))
+
+    def compute_signals(self, request):
+        # Positive Sequence: Sum of Harmonics 1-13 (incremental), plus Clarke Transform
+        signals_pos_fft = self.pos_cache.update(request.amp_pos_harmonics)
+        signals_neg_fft = self.neg_cache.update([request.amp_neg])
+        return sequence_signals(signals_pos_fft, signals_neg_fft, request.k)
+
+    def short_record(self, signals_fft):
+        # First INTERPOLATED_SECONDS of the record, copied out of the caches
+        n = int(round(INTERPOLATED_SECONDS / dt))
+        return Signals(None, None, signals_fft.combined[:n].copy(), signals_fft.alpha[:n].copy(),
+                       signals_fft.beta[:n].copy())
+
+    def compute_fft(self, request, signals_fft):
+        # Compute stage: spectra of all selectable signals at once, plus the harmonic
+        # each line belongs to. Cached until the signals change; the combo and the
+        # color buttons only restyle/redraw from here. The coherent mode synthesizes
+        # its own short record and also returns it (None for the other modes).
+        record = None
+        if request.spectrum_mode == "Analytic (exact)":
+            spectra = analytic_spectra(request.amp_pos_harmonics, request.amp_neg, request.k)
+        elif request.spectrum_mode == "Coherent (FFT)":
+            spectra, record = coherent_spectra(request.amp_pos_harmonics, request.amp_neg, request.k)
+        elif request.spectrum_mode == "Interpolated (short FFT)":
+            spectra = interpolated_spectra(self.short_record(signals_fft), dt, window=request.window)
+        elif request.spectrum_mode == "Harmonic bins (DFT)":
+            spectra = harmonic_spectra(signals_fft, dt, window=request.window)
+        else:
+            spectra = measured_spectra(signals_fft, dt, window=request.window)
+        sources = {name: line_sources(freqs) for name, (freqs, _, _) in spectra.items()}
+        return spectra, sources, record
+
+    def apply_result(self, result):
+        self.signals_pos = result.signals.pos
+        self.signals_neg = result.signals.neg
+        self.signals_combined = result.signals.combined
+        self.signals_alpha = result.signals.alpha
+        self.signals_beta = result.signals.beta
+        self.spectra = result.spectra
+        self.spectra_sources = result.sources
+        self.measured = result.measured
+        self.measured_window = result.request.window
+        self.update_record_label(result.request, result.record)
+        self.evaluator = result.evaluator
+        self.frames = result.frames
+        self.update_chain_styles()
+
+    def update_record_label(self, request, record):
+        measured = request.spectrum_mode in ("Measured (FFT)", "Harmonic bins (DFT)")
+        interpolated = request.spectrum_mode == "Interpolated (short FFT)"
+        self.fft_window_label.setEnabled(measured or interpolated)
+        self.fft_window_combo.setEnabled(measured or interpolated)
+        if record is not None:
+            self.fft_record_label.setText(
+                f"Record: {record.cycles} cycle(s) x {record.samples_per_cycle} = {record.n_samples} samples, "
+                f"error {record.error:.0e}"
+            )
+        elif measured:
+            window = get_window(request.window, len(self.t_fft))
+            self.fft_record_label.setText(
+                f"Record: {len(self.t_fft)} samples, {window.name} window (ENBW {window.enbw:.2f} bins), "
+                f"{'full band' if request.spectrum_mode == 'Measured (FFT)' else 'harmonic bins only'}"
+            )
+        elif interpolated:
+            n_samples = int(round(INTERPOLATED_SECONDS / dt))
+            self.fft_record_label.setText(
+                f"Record: {n_samples} samples ({n_samples * dt:.1f} cycles), {request.window} window, "
+                f"interpolated peaks"
+            )
+        else:
+            self.fft_record_label.setText("Exact lines, no record")
+
+    def on_compute_done(self, result):
+        self.apply_result(result)
         
-        self.compute_fft()
+        # Update ABC curves
+        for i in range(3):
+            self.curves_combined[i].setData(t, self.signals_combined[:, i])
+            
+        # Update Clarke curves
+        self.curves_clarke[0].setData(t, self.signals_alpha)
+        self.curves_clarke[1].setData(t, self.signals_beta)
 
-    def compute_fft(self):
+        # The request was already paced by the scheduler: draw the rest of the result in the same
+        # repaint as the curves instead of waiting out another refresh interval. Newer input waiting
+        # for its own recompute keeps the pacing, so it cannot supersede the job now running.
+        self.scheduler.mark(DIRTY_SPECTRUM | DIRTY_FRAME)
+        if not self.scheduler.dirty & DIRTY_SIGNALS:
+            self.scheduler.flush()
+
+    def refresh_frame(self):
+        # While playing, draw at the exact clock position between the frames of t
+        self.update_plots(self.slider.value(), self.play_position if self.is_playing else None)
+
+    def on_clock_position(self, position):
+        self.play_position = position
+        self.scheduler.mark(DIRTY_FRAME)
+
+    def phasor_state(self, position):
+        # Frames of t are precomputed, positions between them are evaluated
+        position %= len(t)
+        if position == int(position):
+            return self.frames, int(position)
+        return self.evaluator.evaluate(position * dt), 0
+
+    def update_stem_styles(self):
+        # Styling stage: style lookup indexed by line source + 2, shared by the FFT stems
+        # and the rotating vectors of the harmonic chain
+        # (-2 = other lines, -1 = negative sequence, 0..12 = H1..H13)
+        colors = ['#FFFFFF', self.btn_neg_color.color()] + [btn.color() for btn in self.harmonic_color_btns]
+        self.harmonic_styles = [self.style_cache.get(color, width=2, size=10) for color in colors]
+
+    def update_chain_styles(self):
+        # Harmonic chain vectors colored by their harmonic, then the resultant
+        sources = self.evaluator.sources
+        self.styles_harmonics = [self.harmonic_styles[source + 2] for source in sources] + self.styles_combined[-1:]
+
+    def show_spectrum(self):
         selection = self.fft_signal_combo.currentText()
-        signal = None
+        freqs_filtered, mag_filtered, max_mag = self.spectra[selection]
+        sources = self.spectra_sources[selection]
         
-        if selection == "Phase A":
-            signal = self.signals_combined_fft[:, 0]
-        elif selection == "Phase B":
-            signal = self.signals_combined_fft[:, 1]
-        elif selection == "Phase C":
-            signal = self.signals_combined_fft[:, 2]
-        elif selection == "Alpha":
-            signal = self.signals_alpha_fft
-        elif selection == "Beta":
-            signal = self.signals_beta_fft
-        elif selection == "Complex Vector (α + jβ)":
-            signal = self.signals_alpha_fft + 1j * self.signals_beta_fft
-            
-        if signal is not None:
-            N = len(signal)
-            # Apply Hanning Window to reduce spectral leakage
-            window = np.hanning(N)
-            signal_windowed = signal * window
-            
-            # Compute FFT
-            F = np.fft.fft(signal_windowed)
-            # Shift so 0 frequency is in center
-            F_shifted = np.fft.fftshift(F)
-            # Frequencies
-            freqs = np.fft.fftshift(np.fft.fftfreq(N, d=dt))
-            
-            # Magnitude
-            # Normalize by sum of window weights (coherent gain correction)
-            mag = np.abs(F_shifted) / np.sum(window)
-            
-            # Filter low magnitudes (threshold 0.004)
-            # Also apply local maxima filtering to remove Hanning side lobes
-            mask_threshold = mag > 0.004
-            
-            # Find local maxima
-            # Compare each point to its neighbors
-            # Prepend/append smaller values to handle edges
-            mag_padded = np.pad(mag, 1, mode='constant', constant_values=0)
-            mask_peaks = (mag > mag_padded[:-2]) & (mag > mag_padded[2:])
-            
-            # Combine masks
-            mask = mask_threshold & mask_peaks
-            
-            freqs_filtered = freqs[mask]
-            mag_filtered = mag[mask]
-            
-            # Update Plot (Stem style)
-            # Hide all lines first
-            for line in self.fft_lines_pool:
-                line.setVisible(False)
-            
-            brushes = []
-            
-            if len(freqs_filtered) > 0:
-                for i, (freq, mag) in enumerate(zip(freqs_filtered, mag_filtered)):
-                    if i >= len(self.fft_lines_pool): break
-                    
-                    line = self.fft_lines_pool[i]
-                    
-                    # Determine Color
-                    h_order = int(round(abs(freq)))
-                    color = '#FFFFFF' # Default White
-                    
-                    if h_order == 1:
-                        if freq > 0: # Positive Sequence
-                            color = self.harmonic_color_btns[0].color()
-                        else: # Negative Sequence
-                            color = self.btn_neg_color.color()
-                    elif 1 < h_order <= 13:
-                        color = self.harmonic_color_btns[h_order-1].color()
-                    
-                    # Set Line
-                    line.setData([freq, freq], [0, mag])
-                    line.setPen(pg.mkPen(color, width=2))
-                    line.setVisible(True)
-                    
-                    brushes.append(pg.mkBrush(color))
-                
-                self.fft_stem_markers.setData(freqs_filtered, mag_filtered, symbolBrush=brushes)
-            else:
-                self.fft_stem_markers.setData([], [])
+        # Update Plot (Stem style): one segment from 0 to each magnitude, any number of lines
+        stems = segments(
+            np.stack([freqs_filtered, np.zeros_like(mag_filtered)], axis=-1),
+            np.stack([freqs_filtered, mag_filtered], axis=-1)
+        )
+        self.stem_renderer.draw(stems, [self.harmonic_styles[source + 2] for source in sources])
 
-            # Handle Y-Axis Range
-            max_mag = np.max(mag) if mag.size > 0 else 0
-            if max_mag > 1.0:
-                self.plot_fft.setYRange(0, max_mag * 1.1)
-            else:
-                self.plot_fft.setYRange(0, 1.0)
+        # Handle Y-Axis Range
+        if max_mag > 1.0:
+            self.plot_fft.setYRange(0, max_mag * 1.1)
+        else:
+            self.plot_fft.setYRange(0, 1.0)
+
+    def show_zoom(self):
+        # High-resolution spectrum of the visible band, only for a measured (or short interpolated) record and a narrow view
+        low, high = self.plot_fft.getViewBox().viewRange()[0]
+        if self.measured is None or high - low > ZOOM_MAX_ORDERS:
+            self.zoom_curve.setData([], [])
+            return
+        signal = select_signal(self.measured, self.fft_signal_combo.currentText())
+        freqs, mags = zoom_spectrum(signal, dt, low, high, ZOOM_POINTS, self.measured_window)
+        self.zoom_curve.setData(freqs, mags)
 
     def apply_preset(self):
         preset = self.combo_presets.currentText()
@@ -820,26 +909,19 @@ class ClarkeFFTWidget(QWidget):
 
         self.amp_pos_harmonics = [spin.value() for spin in self.amp_pos_inputs]
         self.amp_neg = self.amp_neg_input.value()
-        self.compute_signals()
-        
-        # Update ABC curves
-        for i in range(3):
-            self.curves_combined[i].setData(t, self.signals_combined[:, i])
-            
-        # Update Clarke curves
-        self.curves_clarke[0].setData(t, self.signals_alpha)
-        self.curves_clarke[1].setData(t, self.signals_beta)
-        
-        self.update_plots(self.slider.value())
+        self.scheduler.mark(DIRTY_SIGNALS)
 
-    def update_plots(self, frame):
+    def update_plots(self, frame, position=None):
         # Handle slider vs direct call
         if isinstance(frame, int):
             pass
         else:
             frame = self.slider.value()
             
-        self.slider_label.setText(f"Time: {t[frame]:.2f} s")
+        # position: fractional frame to draw instead of ``frame`` (playback, export)
+        state, i = self.phasor_state(frame if position is None else position)
+        crossed = self.crossed_frames(int((frame if position is None else position) % len(t)), position is not None)
+        self.slider_label.setText(f"Time: {state.time[i]:.2f} s")
 
         # Enable extra trajectory checkbox only if conditions are met
         self.extra_trajectory_checkbox.setEnabled(
@@ -849,157 +931,56 @@ class ClarkeFFTWidget(QWidget):
 
         # Handle "Rot. Each Harm" mode
         is_harmonic_rot_mode = self.chk_harmonic_rot.isChecked()
-        
-        if is_harmonic_rot_mode:
-            self.decomposition_checkbox.setEnabled(False)
-            self.show_rotating_fields_checkbox.setEnabled(False)
-            # Hide standard ABC vectors
-            for line in self.lines_combined: line.setVisible(False)
-            for tip in self.tips_combined: tip.setVisible(False)
-            self.extra_line_pos.setVisible(False)
-            self.extra_tip_pos.setVisible(False)
-            self.extra_line_neg.setVisible(False)
-            self.extra_tip_neg.setVisible(False)
-        else:
-            self.decomposition_checkbox.setEnabled(True)
-            self.show_rotating_fields_checkbox.setEnabled(True)
-            # Hide harmonic vectors
-            for line in self.lines_harmonics: line.setVisible(False)
-            for tip in self.tips_harmonics: tip.setVisible(False)
-            self.extra_line_pos.setVisible(True)
-            self.extra_tip_pos.setVisible(True)
-            self.extra_line_neg.setVisible(True)
-            self.extra_tip_neg.setVisible(True)
+        self.decomposition_checkbox.setEnabled(not is_harmonic_rot_mode)
+        self.show_rotating_fields_checkbox.setEnabled(not is_harmonic_rot_mode)
 
         decomposition = self.decomposition_checkbox.isChecked()
 
         # --- ABC Mode Updates ---
         # Update markers
-        for i in range(3):
-            self.marker_combined[i].setData([t[frame]], [self.signals_combined[frame, i]])
+        self.marker_combined.setPoints(state.time[i], state.signals.combined[i])
 
-        # Compute vectors
-        vectors_pos = [(self.signals_pos[frame, i]*np.cos(angles[i]), self.signals_pos[frame, i]*np.sin(angles[i])) for i in range(3)]
-        vectors_neg = [(self.signals_neg[frame, i]*np.cos(angles[i]), self.signals_neg[frame, i]*np.sin(angles[i])) for i in range(3)]
-        vectors_combined = vectors_pos + vectors_neg
-        
-        sum_pos = (sum(v[0] for v in vectors_pos), sum(v[1] for v in vectors_pos))
-        sum_neg = (sum(v[0] for v in vectors_neg), sum(v[1] for v in vectors_neg))
-        
-        # Update combined vectors
+        extra_pos, extra_neg = state.extra.chain[i]
         if not is_harmonic_rot_mode:
-            self.update_field_vectors(self.lines_combined, self.tips_combined, vectors_combined, self.resultant_line_combined, self.resultant_tip_combined, decomposition)
-
             # Fix for artifact when amplitude is 0: Hide vectors if amplitude is 0
+            # Positive Sequence (Indices 0-2), Negative Sequence (Indices 3-5), then the resultant
             total_pos_amp = sum(self.amp_pos_harmonics)
-            if total_pos_amp < 0.01:
-                for i in range(3):
-                    self.lines_combined[i].setVisible(False)
-                    self.tips_combined[i].setVisible(False)
-            else:
-                for i in range(3):
-                    self.lines_combined[i].setVisible(True)
-                    self.tips_combined[i].setVisible(True)
-
-            if self.amp_neg < 0.01:
-                for i in range(3, 6):
-                    self.lines_combined[i].setVisible(False)
-                    self.tips_combined[i].setVisible(False)
-            else:
-                for i in range(3, 6):
-                    self.lines_combined[i].setVisible(True)
-                    self.tips_combined[i].setVisible(True)
+            show_pos = total_pos_amp >= 0.01
+            show_neg = self.amp_neg >= 0.01
+            shown = [show_pos] * 3 + [show_neg] * 3 + [True]
+
+            # Combined vectors, plus the extra rotating fields (negative resultant added on top of positive)
+            geometry_combined = state.combined
+            segments_combined = frame_segments(geometry_combined, i, decomposition)
+            styles_combined = self.styles_combined
+            if self.show_rotating_fields_checkbox.isChecked():
+                segments_combined = (segments_combined, state.extra.chain[i])
+                styles_combined = styles_combined + self.styles_extra
+                shown += [show_pos, show_neg]
+            self.renderer_combined.draw(segments_combined, styles_combined, shown)
         else:
             # --- Harmonic Rotation Mode ---
-            # Calculate rotating vectors for each harmonic
+            # Rotating vector of each harmonic, drawn tip-to-tail, colored by harmonic
             # H1 Pos: CCW
             # H1 Neg: CW
             # H2: Neg Seq -> CW
             # H3: Zero Seq -> Skip
             # H4: Pos Seq -> CCW
             # ...
-            
-            harm_vectors = []
-            
-            # 1. Fundamental Positive Sequence (H1 Pos)
-            amp_h1 = self.amp_pos_harmonics[0]
-            vec_h1_pos = (0, 0)
-            s = 1.5 # Scaling factor to match Combined view
-            
-            if amp_h1 > 0.001:
-                # CCW
-                angle = omega * t[frame]
-                vec_h1_pos = (amp_h1 * s * np.cos(angle), amp_h1 * s * np.sin(angle))
-                harm_vectors.append({'vec': vec_h1_pos, 'color': self.harmonic_color_btns[0].color()})
-                
-            # 2. Fundamental Negative Sequence (H1 Neg)
-            vec_h1_neg = (0, 0)
-            if self.amp_neg > 0.001:
-                # CW
-                angle = -omega * t[frame]
-                vec_h1_neg = (self.amp_neg * s * np.cos(angle), self.amp_neg * s * np.sin(angle))
-                harm_vectors.append({'vec': vec_h1_neg, 'color': self.btn_neg_color.color()})
-                
-            # 3. Harmonics (H2 to H13)
-            for i in range(1, 13):
-                h_order = i + 1
-                amp = self.amp_pos_harmonics[i]
-                if amp > 0.001:
-                    rem = h_order % 3
-                    if rem == 1: # Positive Sequence -> CCW
-                        angle = h_order * omega * t[frame]
-                        vec = (amp * s * np.cos(angle), amp * s * np.sin(angle))
-                        harm_vectors.append({'vec': vec, 'color': self.harmonic_color_btns[i].color()})
-                    elif rem == 2: # Negative Sequence -> CW
-                        angle = -h_order * omega * t[frame]
-                        vec = (amp * s * np.cos(angle), amp * s * np.sin(angle))
-                        harm_vectors.append({'vec': vec, 'color': self.harmonic_color_btns[i].color()})
-                    # Zero sequence (rem == 0) is skipped
-            
-            # Draw vectors tip-to-tail
-            current_x, current_y = 0, 0
-            
-            # Hide all first
-            for line in self.lines_harmonics: line.setVisible(False)
-            for tip in self.tips_harmonics: tip.setVisible(False)
-            
-            for i, item in enumerate(harm_vectors):
-                if i >= len(self.lines_harmonics): break
-                
-                vec = item['vec']
-                color = item['color']
-                
-                line = self.lines_harmonics[i]
-                tip = self.tips_harmonics[i]
-                
-                line.setPen(pg.mkPen(color, width=2))
-                tip.setBrush(color)
-                
-                line.setData([current_x, current_x + vec[0]], [current_y, current_y + vec[1]])
-                tip.setData([current_x + vec[0]], [current_y + vec[1]])
-                
-                line.setVisible(True)
-                tip.setVisible(True)
-                
-                current_x += vec[0]
-                current_y += vec[1]
-                
-            # Update resultant to point to the end of the chain
-            self.resultant_line_combined.setData([0, current_x], [0, current_y])
-            self.resultant_tip_combined.setData([current_x], [current_y])
+            # The resultant points to the end of the chain
+            geometry_combined = state.harmonics
+            self.renderer_combined.draw(frame_segments(geometry_combined, i, chain=True), self.styles_harmonics)
 
             # Fundamental Trajectory (H1 Pos + H1 Neg)
             if self.extra_trajectory_checkbox.isChecked():
-                # Sum of H1 Pos and H1 Neg
-                vec_fund_x = vec_h1_pos[0] + vec_h1_neg[0]
-                vec_fund_y = vec_h1_pos[1] + vec_h1_neg[1]
-                
-                self.traj_points_extra_pos.append((vec_fund_x, vec_fund_y))
-                xs, ys = zip(*self.traj_points_extra_pos)
-                self.extra_trajectory_pos.setData(xs, ys)
-                # Ensure it's visible and styled
+                if len(crossed):
+                    fundamental = self.frames.fundamental[crossed]
+                    self.traj_extra_pos.extend(fundamental[:, 0], fundamental[:, 1])
+                    self.extra_trajectory_pos.setData(*self.traj_extra_pos.data())
+                # Ensure it's visible and styled (restyled only when switching into this mode)
                 self.extra_trajectory_pos.setVisible(True)
-                self.extra_trajectory_pos.setPen(pg.mkPen(COLOR_RES_POS, width=1, style=Qt.DashLine))
+                if self.extra_trajectory_pos.opts['pen'].style() != Qt.DashLine:
+                    self.extra_trajectory_pos.setPen(self.style_cache.get(COLOR_RES_POS, width=1, style=Qt.DashLine).pen)
                 
                 # Hide the neg trajectory in this mode
                 self.extra_trajectory_neg.setVisible(False)
@@ -1009,92 +990,38 @@ class ClarkeFFTWidget(QWidget):
 
         # --- Clarke Mode Updates ---
         # Update markers
-        self.marker_clarke[0].setData([t[frame]], [self.signals_alpha[frame]])
-        self.marker_clarke[1].setData([t[frame]], [self.signals_beta[frame]])
+        self.marker_clarke.setPoints(state.time[i], [state.signals.alpha[i], state.signals.beta[i]])
         
         # Vectors: Alpha is on X axis, Beta is on Y axis
-        val_alpha = self.signals_alpha[frame]
-        val_beta = self.signals_beta[frame]
-        
-        vec_alpha = (val_alpha, 0)
-        vec_beta = (0, val_beta)
-        vectors_clarke = [vec_alpha, vec_beta]
-        
-        self.update_field_vectors(self.lines_clarke, self.tips_clarke, vectors_clarke, self.resultant_line_clarke, self.resultant_tip_clarke, decomposition)
-        
-        # Extra rotating fields in combined
-        if self.show_rotating_fields_checkbox.isChecked() and not is_harmonic_rot_mode:
-            total_pos_amp = sum(self.amp_pos_harmonics) # Re-calculate for safety if not in scope
-            if total_pos_amp >= 0.01:
-                x_pos = sum_pos[0]
-                y_pos = sum_pos[1]
-                self.extra_line_pos.setData([0, x_pos], [0, y_pos])
-                self.extra_tip_pos.setData([x_pos], [y_pos])
-            else:
-                self.extra_line_pos.setData([], [])
-                self.extra_tip_pos.setData([], [])
-                x_pos, y_pos = 0, 0 
-
-            if self.amp_neg >= 0.01:
-                x_neg = sum_neg[0]
-                y_neg = sum_neg[1]
-                self.extra_line_neg.setData([x_pos, x_pos + x_neg], [y_pos, y_pos + y_neg])
-                self.extra_tip_neg.setData([x_pos + x_neg], [y_pos + y_neg])
-            else:
-                self.extra_line_neg.setData([], [])
-                self.extra_tip_neg.setData([], [])
-        else:
-            self.extra_line_pos.setData([], [])
-            self.extra_tip_pos.setData([], [])
-            self.extra_line_neg.setData([], [])
-            self.extra_tip_neg.setData([], [])
+        self.renderer_clarke.draw(frame_segments(state.clarke, i, decomposition), self.styles_clarke)
 
         # Update trajectory if enabled
-        if self.trajectory_checkbox.isChecked():
-            self.update_trajectory(self.resultant_line_combined, self.traj_points_combined, self.trajectory_combined)
-            self.update_trajectory(self.resultant_line_clarke, self.traj_points_clarke, self.trajectory_clarke)
+        if self.trajectory_checkbox.isChecked() and len(crossed):
+            frames_combined = self.frames.harmonics if is_harmonic_rot_mode else self.frames.combined
+            self.update_trajectory(frames_combined.resultant[crossed], self.traj_combined, self.trajectory_combined)
+            self.update_trajectory(self.frames.clarke.resultant[crossed], self.traj_clarke, self.trajectory_clarke)
 
             if self.extra_trajectory_checkbox.isChecked() and self.show_rotating_fields_checkbox.isChecked():
-                x_pos = sum_pos[0]
-                y_pos = sum_pos[1]
-                self.traj_points_extra_pos.append((x_pos, y_pos))
-                xs, ys = zip(*self.traj_points_extra_pos)
-                self.extra_trajectory_pos.setData(xs, ys)
-
-                x_neg = sum_neg[0]
-                y_neg = sum_neg[1]
-                tip_x = x_pos + x_neg
-                tip_y = y_pos + y_neg
-                self.traj_points_extra_neg.append((tip_x, tip_y))
-                xs, ys = zip(*self.traj_points_extra_neg)
-                self.extra_trajectory_neg.setData(xs, ys)
-
-    def update_field_vectors(self, lines, tips, vectors, resultant_line, resultant_tip, decomposition):
-        if decomposition:
-            points = [(0, 0)]
-            for vec in vectors:
-                last = points[-1]
-                points.append((last[0] + vec[0], last[1] + vec[1]))
-            for i, (line, tip) in enumerate(zip(lines, tips)):
-                line.setData([points[i][0], points[i+1][0]], [points[i][1], points[i+1][1]])
-                tip.setData([points[i+1][0]], [points[i+1][1]])
-            resultant_line.setData([0, points[-1][0]], [0, points[-1][1]])
-            resultant_tip.setData([points[-1][0]], [points[-1][1]])
-        else:
-            x_sum = sum(v[0] for v in vectors)
-            y_sum = sum(v[1] for v in vectors)
-            for line, tip, vec in zip(lines, tips, vectors):
-                line.setData([0, vec[0]], [0, vec[1]])
-                tip.setData([vec[0]], [vec[1]])
-            resultant_line.setData([0, x_sum], [0, y_sum])
-            resultant_tip.setData([x_sum], [y_sum])
-
-    def update_trajectory(self, resultant_line, traj_points, trajectory_item):
-        x = resultant_line.xData[-1]
-        y = resultant_line.yData[-1]
-        traj_points.append((x, y))
-        xs, ys = zip(*traj_points)
-        trajectory_item.setData(xs, ys)
+                extra = self.frames.extra.chain[crossed]
+                self.update_trajectory(extra[:, 0], self.traj_extra_pos, self.extra_trajectory_pos)
+                self.update_trajectory(extra[:, 1], self.traj_extra_neg, self.extra_trajectory_neg)
+
+    def crossed_frames(self, frame, playing):
+        # Frames of t due a trajectory point: while playing, every frame passed since the
+        # last redraw (however often the clock redraws), otherwise the shown frame if it
+        # changed. Points come from the precomputed frames, so a loop holds len(t) exact points.
+        last = self.trajectory_frame
+        self.trajectory_frame = frame
+        if last == frame:
+            return np.arange(0)
+        if last is None or not playing:
+            return np.array([frame])
+        return (last + 1 + np.arange((frame - last) % len(t))) % len(t)
+
+    def update_trajectory(self, resultants, traj, trajectory_item):
+        # resultants: segments from the origin to the resultant tips, one per frame
+        traj.extend(resultants[:, 0, 1], resultants[:, 1, 1])
+        trajectory_item.setData(*traj.data())
 
     def toggle_trajectory(self):
         if not self.trajectory_checkbox.isChecked():
@@ -1102,73 +1029,62 @@ class ClarkeFFTWidget(QWidget):
 
     def toggle_extra_trajectory(self):
         if not self.extra_trajectory_checkbox.isChecked():
-            self.traj_points_extra_pos.clear()
-            self.traj_points_extra_neg.clear()
+            self.traj_extra_pos.clear()
+            self.traj_extra_neg.clear()
             self.extra_trajectory_pos.setData([], [])
             self.extra_trajectory_neg.setData([], [])
 
+    def on_clock_wrapped(self):
+        # A new loop: its trajectory starts from frame 0, whichever frame is drawn first
+        self.clear_trajectories()
+        self.trajectory_frame = -1
+
     def clear_trajectories(self):
-        self.traj_points_combined.clear()
-        self.traj_points_extra_pos.clear()
-        self.traj_points_extra_neg.clear()
-        self.traj_points_clarke.clear()
+        self.trajectory_frame = None
+        self.traj_combined.clear()
+        self.traj_extra_pos.clear()
+        self.traj_extra_neg.clear()
+        self.traj_clarke.clear()
         self.trajectory_combined.setData([], [])
         self.extra_trajectory_pos.setData([], [])
         self.extra_trajectory_neg.setData([], [])
         self.trajectory_clarke.setData([], [])
 
     def reset_all(self):
-        self.timer.stop()
+        self.clock.stop()
         self.is_playing = False
         self.play_button.setText("Play")
         self.slider.setValue(0)
         self.clear_trajectories()
 
-    def advance_frame(self):
-        current = self.slider.value()
-        if current < self.slider.maximum():
-            self.slider.setValue(current + 1)
-        else:
-            if self.loop_checkbox.isChecked():
-                self.slider.setValue(0)
-                self.clear_trajectories()
-            else:
-                self.timer.stop()
-                self.play_button.setText("Play")
-                self.is_playing = False
-
     def toggle_play(self):
         if self.is_playing:
-            self.timer.stop()
+            self.clock.stop()
             self.play_button.setText("Play")
         else:
-            interval = self.get_interval()
-            self.timer.start(interval)
+            self.clock.start(self.slider.value())
             self.play_button.setText("Pause")
         self.is_playing = not self.is_playing
 
-    def get_interval(self):
-        speed_mult = float(self.combo_speed.currentText().replace('x', ''))
-        # Base interval 50ms (20 FPS) for 1x speed
-        interval = int(50 / speed_mult)
-        if interval < 1: interval = 1
-        return interval
-
-    def update_timer_interval(self):
-        interval = self.get_interval()
-        if self.timer.isActive():
-            self.timer.start(interval)
+    def on_playback_finished(self):
+        # Reached the last frame with looping off
+        self.play_button.setText("Play")
+        self.is_playing = False
 
-    def on_speed_changed(self):
-        self.update_timer_interval()
+    def playback_speed(self):
+        return float(self.combo_speed.currentText().replace('x', ''))
 
     def on_speed_changed(self):
-        if self.is_playing:
-            self.update_timer_interval()
+        # The clock keeps its position, only the rate of simulated time changes
+        self.clock.set_speed(self.playback_speed())
 
     def on_color_changed(self):
-        self.compute_fft()
-        self.update_plots(self.slider.value())
+        # Recolor only: no FFT and no work on the long signal record
+        # The palette changed, so this is the one place cached styles go stale
+        self.style_cache.clear()
+        self.update_stem_styles()
+        self.update_chain_styles()
+        self.scheduler.mark(DIRTY_SPECTRUM | DIRTY_FRAME)
 
     def resizeEvent(self, event):
         if hasattr(self, 'overlay'):
@@ -1185,26 +1101,12 @@ class ClarkeFFTWidget(QWidget):
         # Capture current view range to restore later
         self.pre_anim_view_range = self.field_combined.viewRange()
 
-        # 1. Identify active harmonics
+        # 1. Identify active harmonics (chain order, zero sequence skipped)
         self.active_harmonics_seq = []
-        
-        # H1 Pos
-        if self.amp_pos_harmonics[0] > 0.001:
-            self.active_harmonics_seq.append({'type': 'h1_pos', 'freq': 1, 'color': self.harmonic_color_btns[0].color(), 'index': 0})
-            
-        # H1 Neg
-        if self.amp_neg > 0.001:
-            self.active_harmonics_seq.append({'type': 'h1_neg', 'freq': -1, 'color': self.btn_neg_color.color(), 'index': 1})
-            
-        # Others
-        for i in range(1, 13):
-            h_order = i + 1
-            amp = self.amp_pos_harmonics[i]
-            if amp > 0.001:
-                rem = h_order % 3
-                freq = h_order if rem == 1 else -h_order
-                if rem != 0: # Skip zero seq
-                    self.active_harmonics_seq.append({'type': 'harm', 'freq': freq, 'color': self.harmonic_color_btns[i].color(), 'index': len(self.active_harmonics_seq)})
+        freqs, amps, sources = chain_terms(self.amp_pos_harmonics, self.amp_neg)
+        for index, (freq, source) in enumerate(zip(freqs, sources)):
+            color = self.btn_neg_color.color() if source < 0 else self.harmonic_color_btns[source].color()
+            self.active_harmonics_seq.append({'freq': int(freq), 'color': color, 'index': index})
 
         if not self.active_harmonics_seq:
             return
@@ -1236,10 +1138,9 @@ class ClarkeFFTWidget(QWidget):
         fft_point = QPointF(freq, 0) # Fallback
         
         # Try to find actual point in scatter plot
-        scatter_points = self.fft_stem_markers.points()
-        for p in scatter_points:
-            if abs(p.pos().x() - freq) < 0.1:
-                fft_point = p.pos()
+        for x, y in self.stem_renderer.tips.points:
+            if abs(x - freq) < 0.1:
+                fft_point = QPointF(x, y)
                 break
         
         # Map FFT point to global
@@ -1253,51 +1154,11 @@ class ClarkeFFTWidget(QWidget):
         frame = self.slider.value()
         
         # Re-simulate the chain calculation
-        # 1. H1 Pos
-        vec_h1_pos = (0,0)
-        s = 1.5 # Scaling factor
+        freqs, amps, sources = chain_terms(self.amp_pos_harmonics, self.amp_neg)
+        points = tip_to_tail(chain_vectors(freqs, amps, t[frame]))
+        target_vec_start = points[item['index']]
+        target_vec_end = points[item['index'] + 1]
         
-        if self.amp_pos_harmonics[0] > 0.001:
-            angle = omega * t[frame]
-            vec_h1_pos = (self.amp_pos_harmonics[0] * s * np.cos(angle), self.amp_pos_harmonics[0] * s * np.sin(angle))
-            
-        # 2. H1 Neg
-        vec_h1_neg = (0,0)
-        if self.amp_neg > 0.001:
-            angle = -omega * t[frame]
-            vec_h1_neg = (self.amp_neg * s * np.cos(angle), self.amp_neg * s * np.sin(angle))
-            
-        chain_vectors = []
-        if self.amp_pos_harmonics[0] > 0.001: chain_vectors.append(vec_h1_pos)
-        if self.amp_neg > 0.001: chain_vectors.append(vec_h1_neg)
-        
-        for i in range(1, 13):
-            h_order = i + 1
-            amp = self.amp_pos_harmonics[i]
-            if amp > 0.001:
-                rem = h_order % 3
-                if rem == 1: # Pos
-                    angle = h_order * omega * t[frame]
-                    chain_vectors.append((amp * s * np.cos(angle), amp * s * np.sin(angle)))
-                elif rem == 2: # Neg
-                    angle = -h_order * omega * t[frame]
-                    chain_vectors.append((amp * s * np.cos(angle), amp * s * np.sin(angle)))
-        
-        # Calculate position
-        target_vec_start = (0, 0)
-        target_vec_end = (0, 0)
-        
-        curr = (0, 0)
-        found = False
-        for i, vec in enumerate(chain_vectors):
-            next_pos = (curr[0] + vec[0], curr[1] + vec[1])
-            if i == item['index']: # Use stored index
-                target_vec_start = curr
-                target_vec_end = next_pos
-                found = True
-                break
-            curr = next_pos
-            
         # Midpoint of the vector
         phasor_point_x = (target_vec_start[0] + target_vec_end[0]) / 2
         phasor_point_y = (target_vec_start[1] + target_vec_end[1]) / 2
@@ -1332,5 +1193,12 @@ class ClarkeFFTWidget(QWidget):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     win = ClarkeFFTWidget()
+    if '--export' in sys.argv or '--pipe' in sys.argv:
+        # Offscreen frame export instead of the interactive window
+        sys.exit(export_main(win, sys.argv[1:]))
+    if '--record' in sys.argv:
+        # Log control changes for benchmarks/replay_session.py
+        recorder = SessionRecorder(win, sys.argv[sys.argv.index('--record') + 1])
+        app.aboutToQuit.connect(recorder.close)
     win.show()
     sys.exit(app.exec_())
@@ -0,0 +1,72 @@
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def add_repository_to_path():
+    """Put the repository root on ``sys.path``, so ``pslab`` imports from this checkout."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+# The widget helpers below load the labs, which import pslab
+add_repository_to_path()
+
+# Lab scripts live in numbered folders, so they are loaded by path
+WIDGETS = {
+    'rotation': ('01/rotation_last_version.py', 'SequenceVisualizer'),
+    'clarke': ('02/clarke_transform_widget.py', 'ClarkeTransformWidget'),
+    'clarke_fft': ('03/clarke_fft_widget.py', 'ClarkeFFTWidget'),
+}
+
+_modules = {}
+
+
+def ensure_app():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv[:1])
+    return app
+
+
+def load_module(name):
+    if name not in _modules:
+        path, _ = WIDGETS[name]
+        spec = importlib.util.spec_from_file_location(f"lab_{name}", os.path.join(ROOT, path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def create_widget(name, show=True):
+    app = ensure_app()
+    module = load_module(name)
+    widget = getattr(module, WIDGETS[name][1])()
+    if show:
+        widget.show()
+        app.processEvents()
+    return widget
+
+
+def amplitude_spinboxes(widget):
+    if hasattr(widget, 'amp_pos_inputs'):
+        return list(widget.amp_pos_inputs) + [widget.amp_neg_input]
+    return [widget.amp_pos_input, widget.amp_neg_input]
+
+
+def destroy_widget(widget):
+    """Close ``widget`` and delete it right away, so none of its timers fire later on."""
+    import pyqtgraph as pg
+    from PyQt5.QtCore import QCoreApplication, QEvent
+    # Shut the plots down the pyqtgraph way first: deleted along with their parent, their
+    # menus get freed twice, which corrupts the heap and crashes a later widget
+    for plot in widget.findChildren(pg.PlotWidget):
+        plot.close()
+    widget.close()
+    widget.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
@@ -0,0 +1,81 @@
+"""Coherent-sampling spectrum against the fixed 100 s Hann-windowed record.
+
+Usage: python benchmarks/coherent_fft.py [--repeat N]
+
+For several amplitude sets, times synthesis plus spectrum of every signal
+with ``pslab.measured_spectra`` on the 100 s record ClarkeFFTWidget keeps
+(``np.arange(0, 100, dt)``) and with ``pslab.coherent_spectra`` on the
+record ``pslab.coherent_record`` picks, and compares both with the exact
+line spectrum: the largest line magnitude error, lines missed and spurious
+peaks (a measured peak more than half an order away from every line).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import add_repository_to_path
+
+add_repository_to_path()
+from pslab import (  # noqa: E402
+    SIGNAL_NAMES, analytic_spectra, clarke_k, coherent_spectra, dt, measured_spectra, three_phase_signals
+)
+
+# (name, positive harmonic amplitudes H1..H13, negative sequence fundamental)
+CASES = (
+    ('fundamental', (1.0,), 0.1),
+    ('5th and 7th', (1.0, 0, 0, 0, 0.2, 0, 0.14), 0.0),
+    ('all 13', (1.0,) + (0.1,) * 12, 0.3),
+    ('small lines', (1.0, 0.01, 0.005, 0, 0.02), 0.0),
+)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def line_errors(spectra, exact):
+    """Largest magnitude error, missed lines and spurious peaks over all signals."""
+    worst, missed, spurious = 0.0, 0, 0
+    for name in SIGNAL_NAMES:
+        freqs, mags, _ = spectra[name]
+        exact_freqs, exact_mags, _ = exact[name]
+        for freq, mag in zip(exact_freqs, exact_mags):
+            near = np.abs(freqs - freq) < 0.5
+            if not near.any():
+                missed += 1
+                worst = max(worst, mag)
+            else:
+                worst = max(worst, abs(mags[near].max() - mag))
+        spurious += sum(np.min(np.abs(exact_freqs - freq), initial=np.inf) >= 0.5 for freq in freqs)
+    return worst, missed, spurious
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    k = clarke_k()
+    t_fft = np.arange(0, 100, dt)
+    print(f"Synthesis + spectra of all {len(SIGNAL_NAMES)} signals (best of {args.repeat})")
+    for name, amps, amp_neg in CASES:
+        exact = analytic_spectra(amps, amp_neg, k)
+        fixed_time, fixed = best_of(lambda: measured_spectra(three_phase_signals(amps, amp_neg, t_fft, k), dt),
+                                    args.repeat)
+        coherent_time, (coherent, record) = best_of(lambda: coherent_spectra(amps, amp_neg, k), args.repeat)
+
+        print(f"  {name}")
+        for label, samples, seconds, spectra in (
+            ("fixed 100 s, Hann", len(t_fft), fixed_time, fixed),
+            (f"coherent {record.cycles}x{record.samples_per_cycle}", record.n_samples, coherent_time, coherent),
+        ):
+            worst, missed, spurious = line_errors(spectra, exact)
+            print(f"    {label:<18} {samples:>6} samples {seconds * 1e3:8.3f} ms | "
+                  f"max error {worst:.1e}, {missed} missed, {spurious} spurious")
+        print(f"    speedup x{fixed_time / coherent_time:.0f}")
@@ -0,0 +1,160 @@
+"""Per-frame cost of the phasor fields.
+
+Usage: python benchmarks/frame_time.py [--repeat N]
+
+Times ``pslab.field_geometry`` building the segments of all frames at once
+and ``pslab.PhasorEvaluator`` evaluating every field at one time between
+frames. Then times the whole ``update_plots`` of each lab with all harmonics
+active, in each drawing mode, both on every frame (paused, slider) and half
+way between frames (playback), which is what has to stay under ``TARGET_MS``;
+it includes the marker, field and trajectory item updates but not the
+repaint. Finally compares a pool of per-vector line and tip items with
+``pslab.qt.FieldRenderer`` on a tip-to-tail chain of ``--vectors`` rotating
+vectors, update against the same target plus repaint.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import amplitude_spinboxes, create_widget, ensure_app
+from pslab import (
+    PhasorEvaluator, chain_vectors, clarke_k, dt, field_geometry, frame_segments, phase_vectors, synthesize, t
+)
+
+TARGET_MS = 1.0
+
+
+def verdict(timings):
+    return "ok" if np.median(timings) * 1e3 < TARGET_MS else "over target"
+
+
+def bench_geometry(repeat):
+    signals = synthesize([1.0] + [0.1] * 12, t, min_amplitude=0.001)
+    vectors = np.concatenate([phase_vectors(signals), phase_vectors(-signals)], axis=1)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        field_geometry(vectors)
+        timings.append(time.perf_counter() - start)
+    print(f"Geometry of {len(t)} frames x {vectors.shape[1]} vectors: {min(timings) * 1e3:.3f} ms (best of {repeat})")
+
+    # Sub-frame playback: everything at one continuous time, no table
+    evaluator = PhasorEvaluator([1.0] + [0.1] * 12, 0.3, clarke_k())
+    evaluations = []
+    for frame in range(len(t)):
+        start = time.perf_counter()
+        evaluator.evaluate((frame + 0.5) * dt)
+        evaluations.append(time.perf_counter() - start)
+    median = np.median(evaluations) * 1e3
+    print(f"Evaluate between frames: {median:.4f} ms median, {max(evaluations) * 1e3:.4f} ms max  {verdict(evaluations)} (target {TARGET_MS} ms)")
+
+
+def frame_modes(widget):
+    yield 'star', {'decomposition_checkbox': False}
+    yield 'chain', {'decomposition_checkbox': True}
+    if hasattr(widget, 'chk_harmonic_rot'):
+        yield 'harmonics', {'decomposition_checkbox': False, 'chk_harmonic_rot': True}
+
+
+def bench_frames(repeat):
+    from pslab.qt import settle
+
+    app = ensure_app()
+    print(f"update_plots per frame, all harmonics active (median / p95 over {repeat} sweeps, target {TARGET_MS} ms)")
+    for name in ('rotation', 'clarke', 'clarke_fft'):
+        widget = create_widget(name)
+        for spin in amplitude_spinboxes(widget):
+            spin.setValue(0.2 if spin.value() == 0 else spin.value())
+        widget.show_rotating_fields_checkbox.setChecked(True)
+        for mode, checks in frame_modes(widget):
+            for attr, checked in checks.items():
+                getattr(widget, attr).setChecked(checked)
+            settle(widget)
+            app.processEvents()
+
+            # Paused on each frame, then playing half way between frames
+            for label, position in (('frame', None), ('playback', 0.5)):
+                timings = []
+                for _ in range(repeat):
+                    for frame in range(len(t)):
+                        start = time.perf_counter()
+                        widget.update_plots(frame, None if position is None else frame + position)
+                        timings.append(time.perf_counter() - start)
+                median = np.median(timings) * 1e3
+                p95 = np.percentile(timings, 95) * 1e3
+                print(f"  {name:<11} {mode:<10} {label:<9} {median:6.3f} ms / {p95:6.3f} ms  {verdict(timings)}")
+            widget.clear_trajectories()
+            for attr in checks:
+                getattr(widget, attr).setChecked(False)
+        widget.close()
+
+
+def bench_renderer(repeat, n_vectors):
+    import pyqtgraph as pg
+    from pslab.qt import FieldRenderer, vector_style
+
+    app = ensure_app()
+    freqs = np.arange(1, n_vectors + 1) * np.where(np.arange(n_vectors) % 2, -1, 1)
+    geometry = field_geometry(chain_vectors(freqs, 1.0 / np.arange(1, n_vectors + 1), t))
+    colors = [pg.intColor(i, n_vectors) for i in range(n_vectors)]
+    styles = [vector_style(color, width=2, size=10) for color in colors] + [vector_style('w', width=4, size=16)]
+
+    def make_plot():
+        plot = pg.PlotWidget()
+        plot.setXRange(-3, 3)
+        plot.setYRange(-3, 3)
+        plot.resize(600, 600)
+        plot.show()
+        app.processEvents()
+        return plot
+
+    # Old layout: one line and one tip item per vector, restyled every frame
+    pool_plot = make_plot()
+    lines = [pool_plot.plot() for _ in styles]
+    tips = [pg.ScatterPlotItem(pen=None) for _ in styles]
+    for tip in tips:
+        pool_plot.addItem(tip)
+
+    def draw_pool(frame):
+        for line, tip, segment, style in zip(lines, tips, frame_segments(geometry, frame, chain=True), styles):
+            line.setPen(style.pen)
+            line.setData(segment[0], segment[1])
+            tip.setBrush(style.brush)
+            tip.setSize(style.size)
+            tip.setData(segment[0, 1:], segment[1, 1:])
+            line.setVisible(True)
+            tip.setVisible(True)
+
+    renderer_plot = make_plot()
+    renderer = FieldRenderer(renderer_plot)
+
+    def draw_renderer(frame):
+        renderer.draw(frame_segments(geometry, frame, chain=True), styles)
+
+    print(f"Chain of {n_vectors} vectors + resultant, update + repaint per frame (median over {repeat} sweeps)")
+    for label, plot, draw in (('item pool', pool_plot, draw_pool), ('FieldRenderer', renderer_plot, draw_renderer)):
+        n_items = len(plot.getPlotItem().items)
+        updates = []
+        frames = []
+        for _ in range(repeat):
+            for frame in range(len(t)):
+                start = time.perf_counter()
+                draw(frame)
+                mid = time.perf_counter()
+                app.processEvents()
+                plot.viewport().repaint()
+                updates.append(mid - start)
+                frames.append(time.perf_counter() - start)
+        print(f"  {label:<14} {n_items:3d} items | update {np.median(updates) * 1e3:6.3f} ms  {verdict(updates):<11} | frame {np.median(frames) * 1e3:6.3f} ms")
+        plot.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--vectors', type=int, default=24)
+    args = parser.parse_args()
+    bench_geometry(args.repeat * 10)
+    bench_frames(args.repeat)
+    bench_renderer(args.repeat, args.vectors)
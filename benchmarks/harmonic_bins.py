@@ -0,0 +1,66 @@
+"""Harmonic-bin DFT against the full FFT with peak picking.
+
+Usage: python benchmarks/harmonic_bins.py [--repeat N]
+
+Times ``pslab.measured_spectra`` (an FFT over every bin, then the threshold
+and local-maximum search) and ``pslab.harmonic_spectra`` (only the bins at
+orders -13..13, one matrix product with a cached basis) on records of
+several lengths with all harmonics active. The error is the largest line
+magnitude error against the exact spectrum, inf when the reported lines
+differ from it (on 2 cycles the Hann main lobe spans adjacent orders).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import add_repository_to_path
+
+add_repository_to_path()
+from pslab import (  # noqa: E402
+    SIGNAL_NAMES, analytic_spectra, clarke_k, dt, harmonic_spectra, measured_spectra, three_phase_signals
+)
+
+RECORD_CYCLES = (2, 10, 100)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def max_error(spectra, exact):
+    """Largest line magnitude error; inf when the line sets differ."""
+    worst = 0.0
+    for name in SIGNAL_NAMES:
+        freqs, mags, _ = spectra[name]
+        exact_freqs, exact_mags, _ = exact[name]
+        if len(freqs) != len(exact_freqs) or np.max(np.abs(freqs - exact_freqs), initial=0) > 0.05:
+            return np.inf
+        worst = max(worst, np.max(np.abs(mags - exact_mags), initial=0))
+    return worst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    k = clarke_k()
+    amps, amp_neg = (1.0,) + (0.1,) * 12, 0.3
+    exact = analytic_spectra(amps, amp_neg, k)
+    print(f"Spectra of all {len(SIGNAL_NAMES)} signals, 13 harmonics (best of {args.repeat})")
+    for cycles in RECORD_CYCLES:
+        signals = three_phase_signals(amps, amp_neg, np.arange(0, cycles, dt), k)
+        n_samples = len(signals.alpha)
+        # First call builds the basis, as the first spectrum of a session would
+        harmonic_spectra(signals, dt)
+        fft_time, fft = best_of(lambda: measured_spectra(signals, dt), args.repeat)
+        bins_time, bins = best_of(lambda: harmonic_spectra(signals, dt), args.repeat)
+        print(f"  {cycles:>3} cycles, {n_samples:>5} samples: FFT + peaks {fft_time * 1e3:7.3f} ms "
+              f"(error {max_error(fft, exact):.1e}) | harmonic bins {bins_time * 1e3:7.3f} ms "
+              f"(error {max_error(bins, exact):.1e})  x{fft_time / bins_time:.1f}")
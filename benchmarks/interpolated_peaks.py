@@ -0,0 +1,86 @@
+"""Interpolated peaks of a short record against the 100 s measured spectrum.
+
+Usage: python benchmarks/interpolated_peaks.py [--repeat N]
+
+Times synthesis plus spectrum of every signal with ``pslab.measured_spectra``
+on the 100 s Hann-windowed record ClarkeFFTWidget measures, and with
+``pslab.interpolated_peaks`` on records of a few (not whole) cycles for every
+window, and compares both with the exact line spectrum: the largest line
+amplitude and frequency errors, lines missed and spurious peaks (a peak more
+than half an order away from every line).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import add_repository_to_path
+
+add_repository_to_path()
+from pslab import (  # noqa: E402
+    SIGNAL_NAMES, WINDOW_NAMES, analytic_spectra, clarke_k, dt, interpolated_spectra, measured_spectra,
+    three_phase_signals
+)
+
+RECORD_CYCLES = (5.3, 7.5, 10.2)
+AMPS, AMP_NEG = (1.0, 0.5, 0.3, 0.1, 0.2, 0.0, 0.14), 0.2
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def line_errors(spectra, exact):
+    """Largest amplitude and frequency errors, missed lines and spurious peaks over all signals."""
+    worst_mag, worst_freq, missed, spurious = 0.0, 0.0, 0, 0
+    for name in SIGNAL_NAMES:
+        freqs, mags, _ = spectra[name]
+        exact_freqs, exact_mags, _ = exact[name]
+        for freq, mag in zip(exact_freqs, exact_mags):
+            near = np.flatnonzero(np.abs(freqs - freq) < 0.5)
+            if not near.size:
+                missed += 1
+                worst_mag = max(worst_mag, mag)
+                continue
+            peak = near[np.argmax(mags[near])]
+            worst_mag = max(worst_mag, abs(mags[peak] - mag))
+            worst_freq = max(worst_freq, abs(freqs[peak] - freq))
+        spurious += sum(np.min(np.abs(exact_freqs - freq), initial=np.inf) >= 0.5 for freq in freqs)
+    return worst_mag, worst_freq, missed, spurious
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    k = clarke_k()
+    exact = analytic_spectra(AMPS, AMP_NEG, k)
+
+    def report(label, samples, seconds, spectra):
+        worst_mag, worst_freq, missed, spurious = line_errors(spectra, exact)
+        print(f"  {label:<40} {samples:>6} samples {seconds * 1e3:7.3f} ms | amplitude error {worst_mag:.1e}, "
+              f"frequency error {worst_freq:.1e}, {missed} missed, {spurious} spurious")
+
+    t_fft = np.arange(0, 100, dt)
+    print(f"Synthesis + spectra of all {len(SIGNAL_NAMES)} signals (best of {args.repeat})")
+    fixed_time, fixed = best_of(lambda: measured_spectra(three_phase_signals(AMPS, AMP_NEG, t_fft, k), dt),
+                                args.repeat)
+    report("measured 100 s, Hann", len(t_fft), fixed_time, fixed)
+    for cycles in RECORD_CYCLES:
+        t_short = np.arange(0, cycles, dt)
+        timings = {}
+        for window in WINDOW_NAMES:
+            short_time, short = best_of(
+                lambda: interpolated_spectra(three_phase_signals(AMPS, AMP_NEG, t_short, k), dt, window=window),
+                args.repeat
+            )
+            timings[window] = short_time
+            report(f"interpolated {cycles:g} cycles, {window}", len(t_short), short_time, short)
+        print(f"    Hann x{fixed_time / timings['Hann']:.0f} faster than the 100 s record, "
+              f"x{len(t_fft) / len(t_short):.0f} fewer samples")
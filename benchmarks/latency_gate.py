@@ -0,0 +1,234 @@
+"""End-to-end interaction latency of the labs, gated against a measured baseline.
+
+Usage: python benchmarks/latency_gate.py [--baseline FILE] [--tolerance X] [--slack MS] [--save-baseline]
+       [--budget MS] [--repeat N] [--retries N] [--labs NAME ...]
+
+Drives the real widgets offscreen with the interactions a lecture uses:
+spinbox key presses, preset switches (``apply_preset``), Clarke transform
+radio clicks, slider scrubs and ``start_harmonics_sequence`` steps. Each
+sample is the time from the input event, through the scheduler, the worker
+round trip and every redraw, to Qt having repainted the views that changed
+(not the whole window, which costs ~15 ms in software rasterization alone).
+Interactions are paced like a user, so the scheduler is not coalescing.
+
+Each sample is split into paint (every view repaint during the sample, timed
+by ``pslab.qt.PerfMonitor``) and compute (the rest: scheduler, worker,
+``setData``), gated separately along with their sum: software painting
+dominates offscreen and says little about the labs' own code. While the
+widget is busy the gate blocks on the worker or sleeps until the scheduler
+flushes, so it does not compete with the worker thread for the CPU.
+
+Exits with status 1 when an interaction is still over the gate after its lab
+has been measured again ``--retries`` times: the median of any part over its
+``--baseline`` entry by more than ``--tolerance`` (a fraction) plus
+``--slack`` ms, or the end-to-end p95 over the absolute ``--budget``
+(``BUDGET_MS`` unless given, 0 turns it off). Regressions are judged on
+medians because the p95 of 30 samples is their second worst, which doubles
+when the host is busy; the tail is what the budget bounds.
+``--save-baseline`` writes the measured medians and p95s as the new baseline
+instead; only save one from a clean tree after the gate passes repeatedly on
+it.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+
+from _widgets import WIDGETS, amplitude_spinboxes, create_widget, destroy_widget, ensure_app
+
+# The harmonics sequence schedules its next step 2 s ahead; stay clear of it
+SEQUENCE_SECONDS = 1.5
+# End-to-end p95 any interaction may take, whatever the baseline says (the usual 100 ms of "instant")
+BUDGET_MS = 100.0
+# Scheduling jitter of a one-core box, allowed on top of the relative tolerance (matters for the few ms parts)
+SLACK_MS = 5.0
+# Baseline measured on the headless target environment, next to this script
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'latency_baseline.json')
+
+
+def idle(widget):
+    worker = getattr(widget, 'worker', None)
+    scheduler = widget.scheduler
+    return not (scheduler.dirty or scheduler.timer.isActive() or (worker is not None and worker.busy))
+
+
+def wait_repainted(app, widget, timeout=2.0):
+    """Run the event loop until ``widget`` is settled and its views are repainted."""
+    # Let the event loop run the scheduler and the worker as it would for a user, but block while
+    # they have nothing for it: spinning on processEvents would take the core from the worker thread
+    worker = getattr(widget, 'worker', None)
+    timer = widget.scheduler.timer
+    start = time.perf_counter()
+    while not idle(widget):
+        app.processEvents()
+        left = timeout - (time.perf_counter() - start)
+        if left < 0:
+            raise RuntimeError(f"{type(widget).__name__} did not settle within {timeout} s")
+        if worker is not None and worker.busy:
+            # The completion is queued to this thread, the next processEvents delivers it
+            worker.pool.waitForDone(int(left * 1e3) + 1)
+        elif timer.isActive():
+            time.sleep(max(timer.remainingTime(), 0) / 1e3)
+    # Deliver the pending update requests: Qt repaints the dirty views, as on screen
+    app.processEvents()
+
+
+def pause(app, seconds=0.03):
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def spinbox_step(widget, i):
+    QTest.keyClick(amplitude_spinboxes(widget)[0], Qt.Key_Up if i % 2 == 0 else Qt.Key_Down)
+
+
+def preset_switch(widget, i):
+    widget.combo_presets.setCurrentIndex(1 + i % (widget.combo_presets.count() - 1))
+
+
+def transform_toggle(widget, i):
+    radio = widget.radio_power_inv if widget.radio_amp_inv.isChecked() else widget.radio_amp_inv
+    QTest.mouseClick(radio, Qt.LeftButton)
+
+
+def slider_scrub(widget, i):
+    slider = widget.slider
+    slider.setSliderDown(True)
+    slider.setSliderPosition((slider.value() + 7) % (slider.maximum() + 1))
+    slider.setSliderDown(False)
+
+
+def harmonics_step(widget, i):
+    if i == 0 or widget.seq_step >= len(widget.active_harmonics_seq):
+        widget.start_harmonics_sequence()
+    else:
+        widget.run_harmonics_step()
+
+
+# (name, action, attribute the widget needs for it)
+INTERACTIONS = (
+    ('spinbox', spinbox_step, 'scheduler'),
+    ('preset', preset_switch, 'combo_presets'),
+    ('transform', transform_toggle, 'radio_amp_inv'),
+    ('slider_scrub', slider_scrub, 'slider'),
+    ('harmonics_sequence', harmonics_step, 'start_harmonics_sequence'),
+)
+
+
+def run_lab(name, repeat):
+    from pslab.qt import PerfMonitor
+
+    app = ensure_app()
+    widget = create_widget(name)
+    # Times every view paint, also the ones Qt runs while the worker is still busy
+    monitor = PerfMonitor(widget)
+    monitor.enable()
+    pause(app, 0.2)
+    rows = []
+    for interaction, action, needs in INTERACTIONS:
+        if not hasattr(widget, needs):
+            continue
+        computes = []
+        paints = []
+        started = time.perf_counter()
+        for i in range(repeat):
+            if interaction == 'harmonics_sequence' and time.perf_counter() - started > SEQUENCE_SECONDS:
+                break
+            if interaction != 'harmonics_sequence':
+                pause(app)
+            monitor.reset()
+            start = time.perf_counter()
+            action(widget, i)
+            wait_repainted(app, widget)
+            paint = sum(seconds for _, seconds in monitor.timings['paint'])
+            computes.append(time.perf_counter() - start - paint)
+            paints.append(paint)
+        computes = np.array(computes) * 1e3
+        paints = np.array(paints) * 1e3
+        totals = computes + paints
+        rows.append((interaction, len(computes), {
+            'compute': (np.median(computes), np.percentile(computes, 95)),
+            'paint': (np.median(paints), np.percentile(paints, 95)),
+            'total': (np.median(totals), np.percentile(totals, 95)),
+        }))
+
+    # Drop the widget now, so the pending steps of the harmonics sequence never run
+    monitor.disable()
+    destroy_widget(widget)
+    return rows
+
+
+def check(parts, baseline, tolerance, budget, slack=SLACK_MS):
+    """What is over the gate: parts whose median is over their baseline median, and the end-to-end p95 over the budget."""
+    over = [part for part, (median, _) in parts.items()
+            if part in baseline and median > baseline[part] * (1 + tolerance) + slack]
+    if budget and parts['total'][1] > budget:
+        over.append('total p95')
+    return over
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', default=BASELINE, help="JSON of medians and p95s in ms per lab and interaction")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed median increase over the baseline")
+    parser.add_argument('--slack', type=float, default=SLACK_MS, help="allowed median increase in ms on top of --tolerance")
+    parser.add_argument('--save-baseline', action='store_true', help="write the measured medians and p95s to --baseline")
+    parser.add_argument('--budget', type=float, default=BUDGET_MS,
+                        help=f"absolute end-to-end p95 budget in ms, 0 to turn it off (default {BUDGET_MS:g})")
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--retries', type=int, default=1, help="times a lab over the gate is measured again")
+    parser.add_argument('--labs', nargs='+', choices=list(WIDGETS), default=list(WIDGETS))
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['median']
+    gate = f"baseline median +{args.tolerance:.0%} +{args.slack:g} ms" + (f", end-to-end p95 <= {args.budget:g} ms" if args.budget else "")
+    print(f"Input event to repainted views, median / p95 in ms ({'saving baseline' if args.save_baseline else gate})")
+
+    measured = {'median': {}, 'p95': {}}
+    failures = 0
+    for name in args.labs:
+        expected_lab = baseline.get(name, {})
+        # A lab over the gate is measured again: a regression stays, a burst of scheduling noise does not
+        for attempt in range(1 if args.save_baseline else 1 + args.retries):
+            rows = [
+                (interaction, samples, parts,
+                 check(parts, expected_lab[interaction], args.tolerance, args.budget, args.slack) if interaction in expected_lab else None)
+                for interaction, samples, parts in run_lab(name, args.repeat)
+            ]
+            if not any(over for *_, over in rows) or attempt == args.retries:
+                break
+            print(f"  {name:<11} over the gate, measuring again")
+
+        for interaction, samples, parts, over in rows:
+            for i, statistic in enumerate(('median', 'p95')):
+                measured[statistic].setdefault(name, {})[interaction] = {part: round(values[i], 2) for part, values in parts.items()}
+            expected = expected_lab.get(interaction)
+            if args.save_baseline:
+                status = ''
+            elif over is None:
+                status = 'no baseline'
+            else:
+                failures += bool(over)
+                status = f"OVER ({', '.join(over)})" if over else 'ok'
+            compute, paint, total = parts['compute'], parts['paint'], parts['total']
+            reference = f" [baseline median {expected['compute']:6.2f} / {expected['paint']:6.2f} / {expected['total']:6.2f}]" if expected else ''
+            print(f"  {name:<11} {interaction:<19} n={samples:<3} compute {compute[0]:6.2f} / {compute[1]:6.2f} | "
+                  f"paint {paint[0]:6.2f} / {paint[1]:6.2f} | total {total[0]:6.2f} / {total[1]:6.2f}{reference}  {status}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'repeat': args.repeat, **measured}, f, indent=2)
+        print(f"Wrote the baseline to {args.baseline}")
+    elif failures:
+        print(f"{failures} interaction(s) over the gate")
+        sys.exit(1)
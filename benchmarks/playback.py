@@ -0,0 +1,51 @@
+"""Playback speed accuracy and redraw rate.
+
+Usage: python benchmarks/playback.py [--seconds S]
+
+Plays ClarkeFFTWidget at several speeds for ``S`` seconds of wall time and
+reports the simulated frames per second against the target (20 x speed),
+how many redraws the scheduler ran per second, and the CPU time used. The
+redraw rate is bounded by the display refresh, whatever the speed.
+"""
+import argparse
+import time
+
+from _widgets import create_widget, ensure_app
+
+
+def bench_playback(seconds, speeds):
+    app = ensure_app()
+    widget = create_widget('clarke_fft')
+    print(f"Playback for {seconds:.1f} s per speed (refresh interval {widget.clock.timer.interval()} ms)")
+    for speed in speeds:
+        widget.reset_all()
+        widget.combo_speed.setCurrentText(f"{speed:g}x")
+        wraps = []
+        widget.clock.wrapped.connect(lambda: wraps.append(1))
+        app.processEvents()
+        widget.scheduler.reset_stats()
+
+        cpu = time.process_time()
+        start = time.perf_counter()
+        widget.toggle_play()
+        while time.perf_counter() - start < seconds:
+            app.processEvents()
+            time.sleep(0.001)
+        widget.toggle_play()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        widget.clock.wrapped.disconnect()
+
+        frames = len(wraps) * widget.clock.n_frames + widget.clock.position()
+        target = widget.clock.frames_per_second * speed
+        redraws = widget.scheduler.stats()['flushes']
+        print(f"  {speed:>6g}x  {frames / elapsed:8.1f} frames/s (target {target:7.1f}) | "
+              f"{redraws / elapsed:5.1f} redraws/s | CPU {100 * cpu / elapsed:5.1f} %")
+    widget.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+    bench_playback(args.seconds, [0.25, 1, 10, 100])
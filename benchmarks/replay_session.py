@@ -0,0 +1,60 @@
+"""Replay a recorded classroom session and report where the time went.
+
+Usage: python benchmarks/replay_session.py SESSION.jsonl [--realtime] [--output FILE]
+
+Sessions are recorded by starting a lab with ``--record SESSION.jsonl``.
+The log is fed into a headless instance of the same lab, as fast as
+possible (playback periods are compressed) or with the recorded pauses
+(``--realtime``), while ``pslab.qt.PerfMonitor`` times every stage. Prints
+count, median, p95 and total per stage; ``--output`` also writes them as
+JSON, so a session becomes a repeatable benchmark.
+"""
+import argparse
+import json
+
+import numpy as np
+
+from _widgets import WIDGETS, create_widget, ensure_app
+
+
+def stage_report(monitor):
+    report = {}
+    for stage, timings in monitor.timings.items():
+        durations = np.array([seconds for _, seconds in timings]) * 1e3
+        if len(durations):
+            report[stage] = {
+                'count': len(durations), 'median': float(np.median(durations)),
+                'p95': float(np.percentile(durations, 95)), 'total': float(durations.sum()),
+            }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('session')
+    parser.add_argument('--realtime', action='store_true')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    app = ensure_app()
+    from pslab.qt import PerfMonitor, SessionPlayer, load_session, settle
+
+    header, events = load_session(args.session)
+    names = {class_name: name for name, (_, class_name) in WIDGETS.items()}
+    widget = create_widget(names[header['widget']])
+    monitor = PerfMonitor(widget, history=None)
+    monitor.enable()
+    elapsed = SessionPlayer(widget, events, settle).replay(realtime=args.realtime)
+    monitor.disable()
+
+    report = stage_report(monitor)
+    mode = "real time" if args.realtime else "as fast as possible"
+    print(f"{header['widget']}: {len(events)} events recorded {header['started']}, replayed {mode} in {elapsed:.2f} s")
+    for stage, stats in report.items():
+        print(f"  {stage:<16} n={stats['count']:<5} median {stats['median']:7.3f} ms | "
+              f"p95 {stats['p95']:7.3f} ms | total {stats['total']:8.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'session': args.session, 'header': header, 'realtime': args.realtime,
+                       'elapsed': elapsed, 'stages': report}, f, indent=2)
+    widget.close()
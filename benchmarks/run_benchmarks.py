@@ -0,0 +1,219 @@
+"""Headless benchmark suite of the lab hot paths, written to JSON.
+
+Usage: python benchmarks/run_benchmarks.py [--repeat N] [--output FILE] [--compare OLD.json]
+
+Runs on the offscreen Qt platform and covers ``compute_signals`` of every
+lab, ``compute_fft`` of ClarkeFFTWidget in every spectrum mode across
+harmonic counts (and record lengths, for the modes that read the whole
+record), ``update_plots`` of every lab in each drawing mode (a sweep over
+all frames) and preset application through to a settled widget. Every case
+is stored with its median, p95 and min in milliseconds, plus the
+environment, so runs on one machine can be compared; results go to
+``benchmarks/benchmark-results.json`` unless ``--output`` says otherwise.
+``--compare`` prints the change of each median against an earlier file and
+exits with status 1 when one got slower than ``--threshold``.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from _widgets import ROOT, amplitude_spinboxes, create_widget, ensure_app, load_module
+from pslab import clarke_k, dt, sequence_signals, synthesize
+from pslab.qt import settle
+
+LABS = ('rotation', 'clarke', 'clarke_fft')
+RECORD_LENGTHS = (200, 1000, 10000)
+# Spectrum modes of ClarkeFFTWidget; only the measured and harmonic-bin ones read the whole record
+SPECTRUM_MODES = (
+    "Measured (FFT)", "Harmonic bins (DFT)", "Analytic (exact)", "Coherent (FFT)", "Interpolated (short FFT)"
+)
+SWEPT_MODES = ("Measured (FFT)", "Harmonic bins (DFT)")
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark-results.json')
+HARMONIC_COUNTS = (1, 5, 13)
+# Checkboxes of each drawing mode; every other one is unchecked
+FRAME_MODES = {
+    'normal': (),
+    'decomposition': ('decomposition_checkbox',),
+    'rotating_fields': ('show_rotating_fields_checkbox',),
+    'harmonic_rotation': ('chk_harmonic_rot',),
+    'trajectories': ('trajectory_checkbox', 'show_rotating_fields_checkbox', 'extra_trajectory_checkbox'),
+}
+MODE_CHECKBOXES = ('decomposition_checkbox', 'show_rotating_fields_checkbox', 'chk_harmonic_rot',
+                   'trajectory_checkbox', 'extra_trajectory_checkbox')
+
+
+def measure(func, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def record(results, group, name, timings, **params):
+    timings = np.array(timings) * 1e3
+    results.append({
+        'group': group, 'name': name, 'params': params, 'unit': 'ms', 'samples': len(timings),
+        'median': float(np.median(timings)), 'p95': float(np.percentile(timings, 95)), 'min': float(timings.min()),
+    })
+    detail = ' '.join(f"{key}={value}" for key, value in params.items())
+    print(f"  {name:<11} {detail:<46} median {np.median(timings):8.3f} ms | p95 {np.percentile(timings, 95):8.3f} ms")
+
+
+def activate_all_harmonics(widget):
+    for spin in amplitude_spinboxes(widget):
+        spin.setValue(0.2 if spin.value() == 0 else spin.value())
+    settle(widget)
+
+
+def bench_compute_signals(results, repeat):
+    print("compute_signals, one amplitude changed per call")
+    for name in LABS:
+        widget = create_widget(name)
+        activate_all_harmonics(widget)
+        if name == 'rotation':
+            def step(i):
+                widget.amp_pos = 1.0 - 0.1 * (i % 2)
+                widget.compute_signals()
+        elif name == 'clarke':
+            def step(i):
+                widget.amp_pos_harmonics[4] = 0.2 + 0.1 * (i % 2)
+                widget.compute_signals()
+        else:
+            base = widget.snapshot()
+            requests = [base._replace(amp_pos_harmonics=base.amp_pos_harmonics[:4] + (amp,) + base.amp_pos_harmonics[5:])
+                        for amp in (0.2, 0.3)]
+
+            def step(i):
+                widget.compute_signals(requests[i % 2])
+        record(results, 'compute_signals', name, measure(step, repeat))
+        widget.close()
+
+
+def bench_compute_fft(results, repeat):
+    print("compute_fft per spectrum mode across active harmonics (and record lengths, measured modes)")
+    widget = create_widget('clarke_fft', show=False)
+    k = clarke_k()
+    # The interpolated mode analyses a fixed slice at the start of the widget's own record
+    interpolated_samples = int(round(load_module('clarke_fft').INTERPOLATED_SECONDS / dt))
+    for mode in SPECTRUM_MODES:
+        for n_samples in RECORD_LENGTHS if mode in SWEPT_MODES else (len(widget.t_fft),):
+            time_grid = np.arange(n_samples) * dt
+            for n_harmonics in HARMONIC_COUNTS:
+                amp_pos = (1.0,) + (0.1,) * (n_harmonics - 1) + (0.0,) * (13 - n_harmonics)
+                request = widget.snapshot()._replace(amp_pos_harmonics=amp_pos, amp_neg=0.1, k=k, spectrum_mode=mode)
+                signals = sequence_signals(
+                    synthesize(amp_pos, time_grid, min_amplitude=0.001), synthesize([0.1], time_grid, sequence=-1), k
+                )
+                params = {'mode': mode.split()[0].lower()}
+                if mode in SWEPT_MODES:
+                    params['samples'] = n_samples
+                elif mode == "Interpolated (short FFT)":
+                    params['samples'] = interpolated_samples
+                timings = measure(lambda i: widget.compute_fft(request, signals), repeat)
+                record(results, 'compute_fft', 'clarke_fft', timings, **params, harmonics=n_harmonics)
+    widget.close()
+
+
+def bench_update_plots(results, repeat):
+    app = ensure_app()
+    print("update_plots per frame, all harmonics active, sweep over every frame")
+    for name in LABS:
+        widget = create_widget(name)
+        activate_all_harmonics(widget)
+        n_frames = widget.slider.maximum() + 1
+        for mode, checked in FRAME_MODES.items():
+            if not all(hasattr(widget, attr) for attr in checked):
+                continue
+            for attr in MODE_CHECKBOXES:
+                if hasattr(widget, attr):
+                    getattr(widget, attr).setChecked(attr in checked)
+            settle(widget)
+            app.processEvents()
+            timings = measure(lambda i: widget.update_plots(i % n_frames), repeat * n_frames)
+            record(results, 'update_plots', name, timings, mode=mode)
+        widget.close()
+
+
+def bench_presets(results, repeat):
+    app = ensure_app()
+    print("Preset application, combo change to settled widget")
+    widget = create_widget('clarke_fft')
+    presets = [widget.combo_presets.itemText(i) for i in range(widget.combo_presets.count())]
+    presets = [preset for preset in presets if preset != "Custom"]
+
+    def step(i):
+        widget.combo_presets.setCurrentText(presets[i % len(presets)])
+        settle(widget)
+        app.processEvents()
+    timings = measure(step, repeat * len(presets))
+    record(results, 'apply_preset', 'clarke_fft', timings)
+    widget.close()
+
+
+def environment():
+    import pyqtgraph
+    from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'machine': platform.node(),
+        'platform': platform.platform(), 'python': platform.python_version(), 'numpy': np.__version__,
+        'pyqtgraph': pyqtgraph.__version__, 'qt': QT_VERSION_STR, 'pyqt': PYQT_VERSION_STR,
+    }
+
+
+def case_key(result):
+    return result['group'], result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, path, threshold):
+    """Print the median change of every case also in ``path``; True if none regressed past ``threshold``."""
+    with open(path) as f:
+        baseline = {case_key(result): result for result in json.load(f)['results']}
+    print(f"Change of the medians against {path} (regression above +{threshold:.0%})")
+    ok = True
+    for result in results:
+        old = baseline.get(case_key(result))
+        if old is None:
+            continue
+        change = result['median'] / old['median'] - 1
+        regressed = change > threshold
+        ok = ok and not regressed
+        detail = ' '.join(f"{key}={value}" for key, value in result['params'].items())
+        print(f"  {result['group']:<15} {result['name']:<11} {detail:<46} {old['median']:8.3f} -> "
+              f"{result['median']:8.3f} ms  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=OUTPUT)
+    parser.add_argument('--compare', metavar='OLD.json')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    app = ensure_app()
+    results = []
+    bench_compute_signals(results, args.repeat)
+    bench_compute_fft(results, args.repeat)
+    bench_update_plots(results, max(1, args.repeat // 10))
+    bench_presets(results, max(1, args.repeat // 5))
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'repeat': args.repeat, 'results': results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""Harmonic synthesis and spinbox-to-redraw latency.
+
+Usage: python benchmarks/synthesis_latency.py [--repeat N]
+
+Compares the old per-sample list comprehension with ``pslab.synthesize`` and
+a full synthesis with an incremental ``HarmonicCache`` update, then measures
+how long a spinbox change takes to reach a repainted widget for each lab
+(all harmonics active).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import amplitude_spinboxes, create_widget, ensure_app
+from pslab import HarmonicCache, angles, omega, synthesize
+from pslab.qt import settle
+
+
+def legacy_synthesize(amplitudes, t):
+    signals = np.zeros((len(t), 3))
+    for h_idx, amp in enumerate(amplitudes):
+        h_order = h_idx + 1
+        if amp > 0.001:
+            signals += np.array([[amp * np.cos(h_order * (omega * ti - angle)) for angle in angles] for ti in t])
+    return signals
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_synthesis(repeat):
+    amplitudes = [1.0] + [0.1] * 12
+    print("Synthesis of 13 harmonics (best of %d)" % repeat)
+    for n_samples in (200, 10000):
+        t = np.arange(n_samples) * 0.01
+        assert np.allclose(legacy_synthesize(amplitudes, t), synthesize(amplitudes, t, min_amplitude=0.001))
+        old = best_of(lambda: legacy_synthesize(amplitudes, t), max(1, repeat // 5))
+        new = best_of(lambda: synthesize(amplitudes, t, min_amplitude=0.001), repeat)
+        print(f"  N={n_samples:>6}: list comprehension {old * 1e3:8.2f} ms | broadcast {new * 1e3:6.2f} ms | x{old / new:.0f}")
+
+
+def bench_incremental(repeat):
+    t = np.arange(10000) * 0.01
+    amplitudes = np.array([1.0] + [0.1] * 12)
+    cache = HarmonicCache(t, np.arange(1, 14), min_amplitude=0.001)
+    cache.update(amplitudes)
+
+    def change_one():
+        amplitudes[4] = 0.3 if amplitudes[4] != 0.3 else 0.1
+        cache.update(amplitudes)
+
+    full = best_of(lambda: synthesize(amplitudes, t, min_amplitude=0.001), repeat)
+    incremental = best_of(change_one, repeat)
+    print("One harmonic changed, 13 active, N=10000 (best of %d)" % repeat)
+    print(f"  full synthesis {full * 1e3:6.2f} ms | HarmonicCache.update {incremental * 1e3:6.3f} ms | x{full / incremental:.0f}")
+
+
+def bench_latency(repeat):
+    app = ensure_app()
+    print("Spinbox-to-redraw latency, all harmonics active (median of %d)" % repeat)
+    for name in ('rotation', 'clarke', 'clarke_fft'):
+        widget = create_widget(name)
+        spins = amplitude_spinboxes(widget)
+        for spin in spins:
+            spin.setValue(0.2 if spin.value() == 0 else spin.value())
+        app.processEvents()
+
+        # Slot = scheduler flush + recompute (incl. worker round trip) + setData, paint = Qt repaint of the whole window
+        slot_times = []
+        paint_times = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            spins[0].setValue(1.0 + 0.1 * (i % 2))
+            settle(widget)
+            mid = time.perf_counter()
+            widget.repaint()
+            app.processEvents()
+            slot_times.append(mid - start)
+            paint_times.append(time.perf_counter() - mid)
+        print(f"  {name:<11} slot {np.median(slot_times) * 1e3:7.2f} ms | paint {np.median(paint_times) * 1e3:7.2f} ms")
+        widget.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    bench_synthesis(args.repeat)
+    bench_incremental(args.repeat)
+    bench_latency(args.repeat)
@@ -0,0 +1,67 @@
+"""Window functions: cached construction and amplitude accuracy.
+
+Usage: python benchmarks/windows.py [--repeat N]
+
+For every window in ``pslab.WINDOW_NAMES``, times building it for the
+9950-sample record against the cached ``pslab.get_window`` lookup, then
+measures the largest line amplitude error of ``pslab.measured_spectra``
+(FFT bins, so lines between bins lose amplitude to scalloping) on records
+of a whole and a non-whole number of cycles, with all harmonics active.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import add_repository_to_path
+
+add_repository_to_path()
+from pslab import (  # noqa: E402
+    WINDOW_NAMES, analytic_spectra, clarke_k, dt, get_window, measured_spectra, three_phase_signals
+)
+
+RECORD_CYCLES = (100, 10.5)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def amplitude_error(spectra, exact):
+    """Largest error of the line amplitudes, read as the largest peak within half an order."""
+    worst = 0.0
+    for name, (exact_freqs, exact_mags, _) in exact.items():
+        freqs, mags, _ = spectra[name]
+        for freq, mag in zip(exact_freqs, exact_mags):
+            near = np.abs(freqs - freq) < 0.5
+            worst = max(worst, abs(mags[near].max() - mag) if near.any() else mag)
+    return worst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    k = clarke_k()
+    amps, amp_neg = (1.0,) + (0.1,) * 12, 0.3
+    exact = analytic_spectra(amps, amp_neg, k)
+    records = {cycles: three_phase_signals(amps, amp_neg, np.arange(0, cycles, dt), k) for cycles in RECORD_CYCLES}
+    n_samples = len(records[100].alpha)
+
+    print(f"Windows of {n_samples} samples (best of {args.repeat}); amplitude error of the measured spectrum")
+    for name in WINDOW_NAMES:
+        window = get_window(name, n_samples)
+        build = best_of(lambda: get_window.__wrapped__(name, n_samples), args.repeat)
+        lookup = best_of(lambda: get_window(name, n_samples), args.repeat)
+        errors = ', '.join(
+            f"{cycles:g} cycles {amplitude_error(measured_spectra(signals, dt, window=name), exact):.1e}"
+            for cycles, signals in records.items()
+        )
+        print(f"  {name:<16} ENBW {window.enbw:5.2f} bins | build {build * 1e3:6.3f} ms, cached {lookup * 1e6:5.2f} us"
+              f" | error: {errors}")
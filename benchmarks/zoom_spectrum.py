@@ -0,0 +1,65 @@
+"""Chirp-z zoom spectrum against a longer full-band FFT.
+
+Usage: python benchmarks/zoom_spectrum.py [--repeat N] [--points N]
+
+Samples the band 4.8..5.2 x the fundamental of phase A (the 5th harmonic) at
+``--points`` frequencies with ``pslab.zoom_spectrum`` on the 100 s record
+ClarkeFFTWidget measures, and compares it with what a full-band FFT needs
+for the same spacing: a record lengthened until its bins are that dense
+(synthesis included, since the longer record has to be sampled too).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from _widgets import add_repository_to_path
+
+add_repository_to_path()
+from pslab import clarke_k, dt, select_signal, three_phase_signals, zoom_spectrum  # noqa: E402
+
+BAND = (4.8, 5.2)
+AMPS = (1.0, 0.5, 0.3, 0.1, 0.2, 0.0, 0.14)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def phase_a(t_record):
+    return select_signal(three_phase_signals(AMPS, 0.1, t_record, clarke_k()), "Phase A")
+
+
+def full_band(seconds):
+    signal = phase_a(np.arange(0, seconds, dt))
+    window = np.hanning(len(signal))
+    freqs = np.fft.fftfreq(len(signal), d=dt)
+    mags = np.abs(np.fft.fft(signal * window)) / np.sum(window)
+    band = (freqs >= BAND[0]) & (freqs <= BAND[1])
+    return freqs[band], mags[band]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--points', type=int, default=400)
+    args = parser.parse_args()
+
+    signal = phase_a(np.arange(0, 100, dt))
+    zoom_spectrum(signal, dt, *BAND, args.points)
+    zoom_time, (freqs, mags) = best_of(lambda: zoom_spectrum(signal, dt, *BAND, args.points), args.repeat)
+    spacing = freqs[1] - freqs[0]
+    print(f"Band {BAND[0]}..{BAND[1]}, {args.points} points ({spacing:.2e} orders apart), best of {args.repeat}")
+    print(f"  zoom, 100 s record  ({len(signal):>7} samples): {zoom_time * 1e3:8.3f} ms, "
+          f"peak {mags.max():.4f} at {freqs[np.argmax(mags)]:.4f}")
+
+    seconds = 1 / spacing
+    fft_time, (fft_freqs, fft_mags) = best_of(lambda: full_band(seconds), max(1, args.repeat // 5))
+    print(f"  FFT, {seconds:.0f} s record ({int(round(seconds / dt)):>7} samples): {fft_time * 1e3:8.3f} ms, "
+          f"{len(fft_freqs)} bins in the band, peak {fft_mags.max():.4f} at {fft_freqs[np.argmax(fft_mags)]:.4f}")
+    print(f"  zoom x{fft_time / zoom_time:.0f} faster")
@@ -0,0 +1,23 @@
+"""Headless power-systems core shared by the lab widgets.
+
+Only depends on NumPy, so it can be used in batch jobs and worker processes
+without a QApplication. Qt helpers live in the separate ``pslab.qt`` package.
+"""
+from .params import omega, t, dt, angles
+from .synthesis import (
+    HarmonicCache, Signals, harmonic_components, sequence_signals, synthesize,
+    three_phase_signals
+)
+from .clarke import clarke, clarke_k
+from .spectrum import (
+    SIGNAL_NAMES, CoherentRecord, HarmonicLines, SpectralPeaks, analytic_spectra, coherent_record,
+    coherent_spectra, fast_fft_size, harmonic_lines, harmonic_sequence, harmonic_spectra,
+    interpolated_peaks, interpolated_spectra, line_sources, line_spectra, measured_spectra,
+    next_fast_fft_size, select_signal, zoom_dft, zoom_spectrum
+)
+from .windows import WINDOW_NAMES, Window, get_window, window_response
+from .phasors import (
+    CHAIN_SCALE, FieldGeometry, PhasorEvaluator, PhasorState, chain_terms, chain_vectors, clarke_vectors,
+    field_geometry, frame_segments, phase_vectors, segments, tip_to_tail
+)
+from .trajectory import Trajectory
@@ -0,0 +1,19 @@
+import numpy as np
+
+
+def clarke_k(power_invariant=False):
+    """Scaling constant of the Clarke transform: 2/3 (amplitude) or sqrt(2/3) (power invariant)."""
+    return np.sqrt(2/3) if power_invariant else 2/3
+
+
+def clarke(abc, k):
+    """Clarke transform of an (..., 3) ABC array, returned as (alpha, beta)."""
+    abc = np.asarray(abc)
+    a = abc[..., 0]
+    b = abc[..., 1]
+    c = abc[..., 2]
+    # alpha = k * (a - 0.5b - 0.5c)
+    # beta  = k * (sqrt(3)/2 * b - sqrt(3)/2 * c)
+    alpha = k * (a - 0.5*b - 0.5*c)
+    beta = k * (np.sqrt(3)/2 * b - np.sqrt(3)/2 * c)
+    return alpha, beta
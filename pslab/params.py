@@ -0,0 +1,7 @@
+import numpy as np
+
+# Parameters shared by all labs
+omega = 2 * np.pi
+t = np.linspace(0, 2, 200)
+dt = t[1] - t[0]
+angles = np.array([0, 120, 240]) * np.pi / 180
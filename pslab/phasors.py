@@ -0,0 +1,158 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .params import omega, angles
+from .spectrum import harmonic_sequence
+from .synthesis import three_phase_signals
+
+# Scaling of the harmonic chain to match the Combined view
+CHAIN_SCALE = 1.5
+
+# Segments of one phasor field for every frame, see ``field_geometry``
+FieldGeometry = namedtuple('FieldGeometry', ['star', 'chain', 'resultant', 'frames'])
+
+# Signals and phasor fields at a set of times, see ``PhasorEvaluator``
+PhasorState = namedtuple('PhasorState', [
+    'time', 'signals', 'positive', 'negative', 'combined', 'clarke', 'extra', 'harmonics', 'fundamental'
+])
+
+
+def phase_vectors(values):
+    """Place (..., 3) phase values on their 0/120/240 degree axes, returned as (..., 3, 2)."""
+    values = np.asarray(values)[..., None]
+    return np.concatenate([values * np.cos(angles)[:, None], values * np.sin(angles)[:, None]], axis=-1)
+
+
+def tip_to_tail(vectors):
+    """Chain (..., n, 2) vectors from the origin, returned as the (..., n+1, 2) joint points."""
+    vectors = np.asarray(vectors)
+    origin = np.zeros(vectors.shape[:-2] + (1, 2))
+    return np.concatenate([origin, np.cumsum(vectors, axis=-2)], axis=-2)
+
+
+def segments(starts, ends):
+    """Pair (..., 2) start and end points into (..., 2, 2) segments ``[[x0, x1], [y0, y1]]``.
+
+    ``segment[0]`` and ``segment[1]`` go straight to ``setData`` and
+    ``segment[:, 1:]`` is the tip as one-point x and y arrays.
+    """
+    return np.stack([starts, ends], axis=-1)
+
+
+def field_geometry(vectors):
+    """Every segment of a phasor field for all frames in one pass.
+
+    ``vectors`` is (F, n, 2). Returns a ``FieldGeometry`` of ``segments``:
+    ``star`` (F, n, 2, 2) draws each vector from the origin, ``chain``
+    (F, n, 2, 2) draws them tip to tail and ``resultant`` (F, 2, 2) goes from
+    the origin to their sum, so a frame is drawn by indexing alone. With no
+    vectors (n = 0, every amplitude off) ``star`` and ``chain`` are empty and
+    the resultant is a zero-length segment at the origin.
+
+    All three are views into ``frames`` (F, 2, n+1, 2, 2), which holds the star
+    and then the chain of each frame, both followed by the resultant, so
+    ``frame_segments`` returns a view instead of building a new array.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    n = vectors.shape[-2]
+    # Written in place: segments start at the origin unless set, chain links start at the previous joint
+    frames = np.zeros(vectors.shape[:-2] + (2, n + 1, 2, 2))
+    frames[..., 0, :n, :, 1] = vectors
+    joints = np.cumsum(vectors, axis=-2)
+    frames[..., 1, 1:n, :, 0] = joints[..., :-1, :]
+    frames[..., 1, :n, :, 1] = joints
+    if n:
+        frames[..., :, n, :, 1] = joints[..., None, -1, :]
+    return FieldGeometry(frames[..., 0, :n, :, :], frames[..., 1, :n, :, :], frames[..., 0, n, :, :], frames)
+
+
+def frame_segments(geometry, frame, chain=False):
+    """Segments of one frame of a ``FieldGeometry``: its vectors (tip to tail if ``chain``), then the resultant.
+
+    The result is a view into ``geometry.frames``, so it must not be written to.
+    """
+    return geometry.frames[frame, int(chain)]
+
+
+def clarke_vectors(alpha, beta):
+    """Alpha on the x axis and beta on the y axis, returned as (..., 2, 2) vectors."""
+    alpha = np.asarray(alpha, dtype=float)
+    vectors = np.zeros(alpha.shape + (2, 2))
+    vectors[..., 0, 0] = alpha
+    vectors[..., 1, 1] = beta
+    return vectors
+
+
+def chain_terms(amp_pos_harmonics, amp_neg, min_amplitude=0.001):
+    """Active rotating terms of the harmonic chain.
+
+    Returns ``(freqs, amps, sources)``: signed frequencies (CCW > 0), amplitudes and
+    the index into ``amp_pos_harmonics`` each term comes from (-1 for the negative
+    sequence fundamental). Order is H1+, H1-, then H2..Hn; zero sequence is skipped.
+    """
+    terms = []
+    if amp_pos_harmonics[0] > min_amplitude:
+        terms.append((1, amp_pos_harmonics[0], 0))
+    if amp_neg > min_amplitude:
+        terms.append((-1, amp_neg, -1))
+    for i in range(1, len(amp_pos_harmonics)):
+        h_order = i + 1
+        seq = harmonic_sequence(h_order)
+        if amp_pos_harmonics[i] > min_amplitude and seq != 0:
+            terms.append((seq * h_order, amp_pos_harmonics[i], i))
+
+    freqs = np.array([term[0] for term in terms], dtype=float)
+    amps = np.array([term[1] for term in terms], dtype=float)
+    sources = np.array([term[2] for term in terms], dtype=int)
+    return freqs, amps, sources
+
+
+def chain_vectors(freqs, amps, time, scale=CHAIN_SCALE):
+    """Rotating chain vectors at ``time`` (scalar or array), shape time.shape + (K, 2)."""
+    angle = omega * np.multiply.outer(np.asarray(time, dtype=float), freqs)
+    return np.stack([amps * scale * np.cos(angle), amps * scale * np.sin(angle)], axis=-1)
+
+
+class PhasorEvaluator:
+    """Phasor fields of a lab evaluated at any continuous time.
+
+    Every signal is a finite harmonic sum of the amplitudes, so ``evaluate``
+    computes the ABC vectors, alpha/beta, the harmonic chain and all
+    resultants for any array of times in one vectorized pass. Playback can
+    then draw between the samples of ``t`` (high refresh rates, slow speeds)
+    while memory only grows with the number of times asked for.
+    """
+
+    def __init__(self, amp_pos_harmonics, amp_neg, k):
+        self.amp_pos_harmonics = tuple(amp_pos_harmonics)
+        self.amp_neg = amp_neg
+        self.k = k
+        # Zero sequence harmonics are skipped
+        self.freqs, self.amps, self.sources = chain_terms(self.amp_pos_harmonics, amp_neg)
+        self.fundamental = np.abs(self.freqs) == 1
+
+    def evaluate(self, time):
+        """``PhasorState`` at ``time`` (scalar or array of seconds); fields are indexed like ``time``.
+
+        ``positive``, ``negative`` and ``combined`` hold the ABC vectors of each
+        sequence, ``extra`` the negative resultant added on top of the positive
+        one, ``harmonics`` the chain of rotating harmonics and ``fundamental``
+        the sum of its H1 terms.
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=float))
+        signals = three_phase_signals(self.amp_pos_harmonics, self.amp_neg, time, self.k)
+        vectors_pos = phase_vectors(signals.pos)
+        vectors_neg = phase_vectors(signals.neg)
+        vectors_harm = chain_vectors(self.freqs, self.amps, time)
+        return PhasorState(
+            time,
+            signals,
+            field_geometry(vectors_pos),
+            field_geometry(vectors_neg),
+            field_geometry(np.concatenate([vectors_pos, vectors_neg], axis=1)),
+            field_geometry(clarke_vectors(signals.alpha, signals.beta)),
+            field_geometry(np.stack([vectors_pos.sum(axis=1), vectors_neg.sum(axis=1)], axis=1)),
+            field_geometry(vectors_harm),
+            vectors_harm[:, self.fundamental].sum(axis=1)
+        )
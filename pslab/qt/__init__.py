@@ -0,0 +1,8 @@
+"""Qt helpers shared by the lab widgets (requires PyQt5/pyqtgraph, unlike ``pslab``)."""
+from .worker import ComputeWorker
+from .scheduler import DIRTY_SIGNALS, DIRTY_SPECTRUM, DIRTY_FRAME, DIRTY_ZOOM, RecomputeScheduler, settle
+from .fields import DotsItem, FieldRenderer, SegmentsItem, StyleCache, VectorStyle, time_markers, vector_style
+from .playback import PlaybackClock
+from .perf import PerfHud, PerfMonitor
+from .export import FrameExporter, PipeSink, PngSink, export_main
+from .session import SessionPlayer, SessionRecorder, load_session, session_controls
@@ -0,0 +1,256 @@
+import argparse
+import os
+import queue
+import shlex
+import struct
+import subprocess
+import threading
+import time
+import zlib
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QCoreApplication, QPoint, QRectF, QSignalBlocker, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QGraphicsView, QWidget
+
+from .scheduler import settle
+
+
+def _rgb_rows(image):
+    # (image, rows): ``image`` as RGB888 and a (height, width x 3) uint8 view of its
+    # pixels without the scan line padding; the view is only valid while image lives
+    image = image.convertToFormat(QImage.Format_RGB888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return image, rows[:, :image.width() * 3]
+
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+class PngSink:
+    """Numbered PNG files, ``pattern % index`` (e.g. ``frames/lab_%04d.png``).
+
+    Encoded here as 8-bit RGB with unfiltered scan lines and zlib at level
+    ``compression`` rather than with ``QImage.save``, whose writer takes about
+    60 ms per 1280x720 frame at any level; this takes about 18 ms at level 1.
+    zlib releases the GIL, so with several cores the writers encode while the
+    next frames render.
+    """
+
+    # Writers may run in parallel, each file is independent
+    workers = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+    def __init__(self, pattern, compression=1):
+        self.pattern = pattern
+        self.compression = compression
+
+    def write(self, index, image):
+        image, rows = _rgb_rows(image)
+        # Filter type 0 (none) in front of every scan line
+        raw = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        raw[:, 0] = 0
+        raw[:, 1:] = rows
+        header = struct.pack('>IIBBBBB', image.width(), image.height(), 8, 2, 0, 0, 0)
+        with open(self.pattern % index, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(_png_chunk(b'IHDR', header))
+            f.write(_png_chunk(b'IDAT', zlib.compress(raw, self.compression)))
+            f.write(_png_chunk(b'IEND', b''))
+
+    def close(self):
+        pass
+
+
+class PipeSink:
+    """Raw RGB24 frames streamed to the stdin of an encoder command.
+
+    ``{width}``, ``{height}`` and ``{fps}`` in the command are filled in, e.g.
+    ``ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {fps} -i - out.mp4``.
+    """
+
+    # Frames must reach the pipe in order
+    workers = 1
+
+    def __init__(self, command, size, fps):
+        width, height = size
+        self.process = subprocess.Popen(shlex.split(command.format(width=width, height=height, fps=fps)),
+                                        stdin=subprocess.PIPE)
+
+    def write(self, index, image):
+        # Scan lines are padded to 4 bytes, keep the pixels only (no copy when there is no padding)
+        image, rows = _rgb_rows(image)
+        self.process.stdin.write(np.ascontiguousarray(rows))
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait():
+            raise OSError(f"encoder exited with status {self.process.returncode}")
+
+
+def fit(image, size):
+    """``image`` scaled into ``size`` keeping its aspect ratio, centered on black."""
+    width, height = size
+    if (image.width(), image.height()) == (width, height):
+        return image
+    scaled = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    canvas = QImage(width, height, QImage.Format_RGB32)
+    canvas.fill(QColor(0, 0, 0))
+    painter = QPainter(canvas)
+    painter.drawImage((width - scaled.width()) // 2, (height - scaled.height()) // 2, scaled)
+    painter.end()
+    return canvas
+
+
+class FrameExporter:
+    """Renders playback frames of a lab offscreen and streams them to a sink, without a timer.
+
+    Positions advance by ``frames_per_second x speed / fps`` frames of ``t``
+    per exported frame, drawn through ``update_plots`` like sub-frame playback.
+    The window is laid out at that size, hidden so the event loop never
+    repaints it, and rendered once; after that a frame only re-renders the
+    plot views whose scene changed and the time slider, on top of the
+    previous frame. Frames go through a bounded queue to writer threads, so rendering
+    the next frame overlaps encoding (and fitting to ``size`` when the window
+    cannot be resized to it) while memory stays at ``queue_size`` frames.
+
+    That overlap needs spare cores. On a single core a 1280x720 frame costs
+    about 20 ms to render, 8 ms to fit and 18 ms to encode as PNG, so a PNG
+    sequence exports at about x0.7 real time at 30 fps. Streaming raw frames
+    to an encoder with ``PipeSink`` skips the PNG encode, leaving rendering
+    and fitting (about x0.9 for ClarkeFFTWidget at that size).
+    """
+
+    def __init__(self, widget, size=(1920, 1080), queue_size=8):
+        self.widget = widget
+        self.size = size
+        self.queue_size = queue_size
+        self.changed = set()
+
+    def prepare(self):
+        widget = self.widget
+        if widget.is_playing:
+            widget.toggle_play()
+        widget.setAttribute(Qt.WA_DontShowOnScreen, True)
+        widget.resize(*self.size)
+        widget.show()
+        # Pending recomputes, worker results included, before the first frame
+        settle(widget)
+        QCoreApplication.processEvents()
+        widget.hide()
+
+        # Scenes report their changes on the next event loop turn
+        self.views = widget.findChildren(pg.GraphicsView)
+        for view in self.views:
+            view.scene().changed.connect(lambda rects, view=view: self.changed.add(view))
+        self.always = [widget.slider, widget.slider_label]
+        self.canvas = QImage(widget.size(), QImage.Format_RGB32)
+        widget.render(self.canvas)
+
+    def render(self):
+        """Copy of the window with the views changed since the last call re-rendered."""
+        QCoreApplication.processEvents()
+        painter = QPainter(self.canvas)
+        for view in self.views:
+            if view in self.changed:
+                # The scene straight into the view's place, same pixels as a widget render
+                origin = view.mapTo(self.widget, QPoint(0, 0))
+                painter.setRenderHints(view.renderHints())
+                QGraphicsView.render(view, painter, QRectF(origin.x(), origin.y(), view.width(), view.height()),
+                                     view.viewport().rect())
+        for child in self.always:
+            QWidget.render(child, painter, child.mapTo(self.widget, QPoint(0, 0)))
+        painter.end()
+        self.changed.clear()
+        return self.canvas.copy()
+
+    def export(self, sink, n_frames, speed=1.0, fps=30, start=0.0):
+        """Write ``n_frames`` frames to ``sink``; returns (seconds, seconds spent rendering)."""
+        self.prepare()
+        widget = self.widget
+        n_positions = len(widget.frames.time)
+        step = widget.clock.frames_per_second * speed / fps
+
+        frames = queue.Queue(self.queue_size)
+        errors = []
+
+        def writer():
+            while True:
+                item = frames.get()
+                if item is None:
+                    break
+                try:
+                    if not errors:
+                        index, image = item
+                        sink.write(index, fit(image, self.size))
+                except Exception as exc:
+                    errors.append(exc)
+
+        threads = [threading.Thread(target=writer, daemon=True) for _ in range(sink.workers)]
+        for thread in threads:
+            thread.start()
+
+        begin = time.perf_counter()
+        rendering = 0.0
+        loop = None
+        for index in range(n_frames):
+            if errors:
+                break
+            position = start + index * step
+            # Looping starts the trajectories over, as in playback
+            if loop is not None and position // n_positions != loop:
+                widget.clear_trajectories()
+            loop = position // n_positions
+            position %= n_positions
+
+            render_start = time.perf_counter()
+            # The slider follows, as in playback, but this frame is drawn right here
+            blocker = QSignalBlocker(widget.slider)
+            widget.slider.setValue(int(position))
+            blocker.unblock()
+            widget.update_plots(int(position), position)
+            image = self.render()
+            rendering += time.perf_counter() - render_start
+            frames.put((index, image))
+
+        for _ in threads:
+            frames.put(None)
+        for thread in threads:
+            thread.join()
+        sink.close()
+        if errors:
+            raise errors[0]
+        return time.perf_counter() - begin, rendering
+
+
+def export_main(widget, argv):
+    """Command line export for the ``__main__`` block of a lab; returns the exit status."""
+    parser = argparse.ArgumentParser(prog=type(widget).__name__, description="Export playback frames offscreen. "
+                                     "A PNG sequence is bound by rendering and encoding (about x0.7 real time "
+                                     "at 1280x720 and 30 fps on one core); --pipe to an encoder is faster.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--export', metavar='PATTERN', help="PNG sequence, e.g. frames/lab_%%04d.png")
+    target.add_argument('--pipe', metavar='COMMAND', help="encoder reading rgb24 frames on stdin, "
+                        "with {width}, {height} and {fps} filled in")
+    parser.add_argument('--frames', type=int, help="frames to write (default: one loop)")
+    parser.add_argument('--size', default='1920x1080', help="WIDTHxHEIGHT")
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--compression', type=int, default=1, choices=range(10), metavar='0-9',
+                        help="PNG zlib level (default 1; 0 writes fastest, larger files)")
+    args, _ = parser.parse_known_args(argv)
+
+    size = tuple(int(value) for value in args.size.lower().split('x'))
+    if args.frames is None:
+        # One loop of t at this speed
+        args.frames = int(round(len(widget.frames.time) / (widget.clock.frames_per_second * args.speed) * args.fps))
+    sink = PngSink(args.export, args.compression) if args.export else PipeSink(args.pipe, size, args.fps)
+
+    elapsed, rendering = FrameExporter(widget, size).export(sink, args.frames, args.speed, args.fps)
+    duration = args.frames / args.fps
+    print(f"{args.frames} frames ({duration:.1f} s of video) in {elapsed:.2f} s: "
+          f"x{duration / elapsed:.1f} real time, {rendering / elapsed:.0%} of it rendering")
+    return 0
@@ -0,0 +1,240 @@
+from collections import namedtuple
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt5.QtGui import QPainter, QPen
+
+# How one segment and its tip are drawn
+VectorStyle = namedtuple('VectorStyle', ['pen', 'brush', 'size'])
+
+
+def vector_style(color, width=3, size=12, style=Qt.SolidLine):
+    """``VectorStyle`` of a phasor: a ``width`` px line and a ``size`` px tip in ``color``."""
+    return VectorStyle(pg.mkPen(color, width=width, style=style), pg.mkBrush(color), size)
+
+
+class StyleCache:
+    """``vector_style`` results keyed by (color, width, size, style).
+
+    Frame code asks the cache instead of calling ``pg.mkPen``/``pg.mkBrush``, so
+    styles are only built when a new color shows up. Call ``clear`` when the
+    user palette changes to drop the ones that are no longer used.
+    """
+
+    def __init__(self):
+        self.styles = {}
+
+    def get(self, color, width=3, size=12, style=Qt.SolidLine):
+        key = (color, width, size, style)
+        if key not in self.styles:
+            self.styles[key] = vector_style(color, width, size, style)
+        return self.styles[key]
+
+    def clear(self):
+        self.styles.clear()
+
+
+def _same_styles(a, b):
+    # Styles come from caches, so identity tells whether anything was restyled
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+def _group_rows(keys):
+    # Rows of each distinct key, in order of first appearance; None keys are left out
+    groups = {}
+    for i, key in enumerate(keys):
+        if key is not None:
+            groups.setdefault(key, []).append(i)
+    return [(key, np.array(rows, dtype=int)) for key, rows in groups.items()]
+
+
+def _data_bounds(points, axis):
+    # Bounds of (..., 2) x/y ``points``, reduced over ``axis``
+    if not points.size:
+        return QRectF()
+    (x0, y0), (x1, y1) = points.min(axis=axis).tolist(), points.max(axis=axis).tolist()
+    return QRectF(x0, y0, x1 - x0, y1 - y0)
+
+
+class SegmentsItem(pg.GraphicsObject):
+    """Any number of line segments with per-segment pens, drawn by a single scene item.
+
+    ``setSegments`` only keeps the array and its bounds; the lines are drawn
+    straight from it when the item is painted, one pen at a time, so a frame
+    builds no paths and repeated updates between two repaints cost nothing.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.groups = []
+        self.segments = np.empty((0, 2, 2))
+        self.bounds = QRectF()
+        self.max_width = 0
+
+    def setPens(self, pens):
+        """One QPen per segment of the following ``setSegments`` calls, None to hide it."""
+        self.groups = [(pens[rows[0]], rows) for _, rows in _group_rows([id(pen) if pen is not None else None for pen in pens])]
+        self.max_width = max((pen.widthF() for pen, _ in self.groups), default=0)
+        self.update()
+
+    def setSegments(self, segments, pens=None):
+        """``segments`` is (n, 2, 2) as built by ``pslab.segments``.
+
+        ``pens`` has one QPen per segment; leave it out to keep the pens (and the
+        segment count) of the previous call. The array is kept, not copied, until
+        the next call.
+        """
+        if pens is not None:
+            self.setPens(pens)
+        self.prepareGeometryChange()
+        self.segments = segments
+        self.bounds = _data_bounds(segments, (0, 2))
+        self.update()
+
+    def boundingRect(self):
+        # Pens are cosmetic (width in pixels), so pad the data bounds by the widest one
+        px, py = self.pixelVectors()
+        if px is None:
+            return QRectF(self.bounds)
+        pad_x = px.length() * self.max_width
+        pad_y = py.length() * self.max_width
+        return self.bounds.adjusted(-pad_x, -pad_y, pad_x, pad_y)
+
+    def viewTransformChanged(self):
+        # The padding of boundingRect depends on the view scale
+        self.prepareGeometryChange()
+
+    def paint(self, p, *args):
+        p.setRenderHint(QPainter.Antialiasing, pg.getConfigOption('antialias'))
+        segments = self.segments.tolist()
+        for pen, rows in self.groups:
+            p.setPen(pen)
+            for (x0, x1), (y0, y1) in map(segments.__getitem__, rows.tolist()):
+                p.drawLine(QLineF(x0, y0, x1, y1))
+
+
+class DotsItem(pg.GraphicsObject):
+    """Round dots of a fixed pixel size at data positions (vector tips, time markers), drawn by a single scene item.
+
+    Takes the place of a ``ScatterPlotItem`` whose points move every frame:
+    ``setPoints`` copies the positions into a buffer that is only reallocated
+    when their count changes, and the dots are drawn from it on paint.
+    """
+
+    def __init__(self, pen=None, parent=None):
+        super().__init__(parent)
+        self.pen = pg.mkPen(pen) if pen is not None else QPen(Qt.NoPen)
+        self.groups = []
+        self.points = np.empty((0, 2))
+        self.bounds = QRectF()
+        self.max_size = 0
+
+    def setStyles(self, brushes, sizes):
+        """One QBrush and one diameter in pixels per dot of the following ``setPoints`` calls, None brushes hide it."""
+        keys = [(id(brush), size) if brush is not None else None for brush, size in zip(brushes, sizes)]
+        self.groups = [(brushes[rows[0]], sizes[rows[0]] / 2, rows) for _, rows in _group_rows(keys)]
+        self.max_size = max((2 * radius for _, radius, _ in self.groups), default=0) + self.pen.widthF()
+        self.update()
+
+    def setPoints(self, xs, ys):
+        """Move the dots to ``xs``, ``ys`` (arrays or scalars, broadcast together)."""
+        n = max(np.size(xs), np.size(ys))
+        if len(self.points) != n:
+            self.points = np.empty((n, 2))
+        self.prepareGeometryChange()
+        self.points[:, 0] = xs
+        self.points[:, 1] = ys
+        self.bounds = _data_bounds(self.points, 0)
+        self.informViewBoundsChanged()
+        self.update()
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if not len(self.points):
+            return None, None
+        return (self.bounds.left(), self.bounds.right()) if ax == 0 else (self.bounds.top(), self.bounds.bottom())
+
+    def pixelPadding(self):
+        return self.max_size / 2
+
+    def boundingRect(self):
+        # Dots are sized in pixels, so pad the data bounds by the largest radius
+        px, py = self.pixelVectors()
+        if px is None:
+            return QRectF(self.bounds)
+        pad_x = px.length() * self.pixelPadding()
+        pad_y = py.length() * self.pixelPadding()
+        return self.bounds.adjusted(-pad_x, -pad_y, pad_x, pad_y)
+
+    def viewTransformChanged(self):
+        self.prepareGeometryChange()
+
+    def paint(self, p, *args):
+        if not self.groups or not len(self.points):
+            return
+        # Map to device pixels first so the dots stay round at any view scale
+        m = p.transform()
+        xs = self.points[:, 0] * m.m11() + self.points[:, 1] * m.m21() + m.dx()
+        ys = self.points[:, 0] * m.m12() + self.points[:, 1] * m.m22() + m.dy()
+        p.resetTransform()
+        p.setRenderHint(QPainter.Antialiasing, True)
+        p.setPen(self.pen)
+        for brush, radius, rows in self.groups:
+            p.setBrush(brush)
+            for x, y in zip(xs[rows].tolist(), ys[rows].tolist()):
+                p.drawEllipse(QPointF(x, y), radius, radius)
+
+
+class FieldRenderer:
+    """Every vector of a phasor field: one ``SegmentsItem`` for the lines, one ``DotsItem`` for the tips.
+
+    Replaces a ``PlotDataItem`` and a ``ScatterPlotItem`` per vector, so a frame
+    updates two scene items however many vectors the field shows. Also draws
+    spectrum stems, whose heads are the tips.
+    """
+
+    def __init__(self, plot):
+        self.lines = SegmentsItem()
+        self.tips = DotsItem()
+        plot.addItem(self.lines)
+        plot.addItem(self.tips)
+        self.styles = []
+        self.shown = None
+        self.segments = np.empty((0, 2, 2))
+
+    def draw(self, segments, styles, shown=None):
+        """Draw (n, 2, 2) ``segments`` with one ``VectorStyle`` each, keeping only the ``shown`` ones.
+
+        ``segments`` may also be a tuple of such arrays, drawn as one field. They
+        are copied into a buffer kept across frames, and pens, brushes and sizes
+        are only unpacked again when ``styles`` or ``shown`` differ from the
+        previous frame; hidden segments stay in the buffer and are skipped.
+        """
+        blocks = segments if isinstance(segments, tuple) else (segments,)
+        n = sum(len(block) for block in blocks)
+        if len(self.segments) != n:
+            self.segments = np.empty((n, 2, 2))
+        start = 0
+        for block in blocks:
+            self.segments[start:start + len(block)] = block
+            start += len(block)
+
+        if not _same_styles(styles, self.styles) or shown != self.shown:
+            self.styles = list(styles)
+            self.shown = None if shown is None else list(shown)
+            keep = [True] * n if shown is None else shown
+            self.lines.setPens([style.pen if k else None for style, k in zip(styles, keep)])
+            self.tips.setStyles([style.brush if k else None for style, k in zip(styles, keep)], [style.size for style in styles])
+        self.lines.setSegments(self.segments)
+        self.tips.setPoints(self.segments[:, 0, 1], self.segments[:, 1, 1])
+
+    def clear(self):
+        self.draw(np.empty((0, 2, 2)), [])
+
+
+def time_markers(plot, colors, size=8):
+    """``DotsItem`` on ``plot`` marking the current time on one curve per color, moved with ``setPoints``."""
+    markers = DotsItem(pen=(200, 200, 200))
+    markers.setStyles([pg.mkBrush(color) for color in colors], [size] * len(colors))
+    plot.addItem(markers)
+    return markers
@@ -0,0 +1,219 @@
+import functools
+import time
+from collections import deque
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QRectF, Qt, QTimer
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen
+from PyQt5.QtWidgets import QWidget
+
+from .fields import DotsItem, SegmentsItem
+from .scheduler import refresh_interval
+
+# Stages timed on the widget itself, when it has them
+WIDGET_STAGES = ('compute_signals', 'compute_fft', 'update_plots')
+# Stages timed on every pyqtgraph item and view: (class, method, stage)
+CLASS_STAGES = (
+    (pg.PlotDataItem, 'setData', 'setData'),
+    (pg.ScatterPlotItem, 'setData', 'setData'),
+    (SegmentsItem, 'setSegments', 'setData'),
+    (DotsItem, 'setPoints', 'setData'),
+    (pg.GraphicsView, 'paintEvent', 'paint'),
+)
+STAGES = WIDGET_STAGES + ('setData', 'paint')
+
+# Enabled monitors, fed by the class hooks while at least one is enabled
+_monitors = []
+_originals = {}
+# Nesting of hooked calls (PlotDataItem.setData calls ScatterPlotItem.setData), only the outer one is timed
+_depth = dict.fromkeys(STAGES, 0)
+
+
+def _class_hook(stage, func):
+    @functools.wraps(func)
+    def hook(*args, **kwargs):
+        if _depth[stage]:
+            return func(*args, **kwargs)
+        _depth[stage] += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _depth[stage] -= 1
+            elapsed = time.perf_counter() - start
+            for monitor in _monitors:
+                monitor.add(stage, elapsed)
+    return hook
+
+
+def _hook_classes():
+    for cls, name, stage in CLASS_STAGES:
+        _originals[cls, name] = cls.__dict__[name]
+        setattr(cls, name, _class_hook(stage, _originals[cls, name]))
+
+
+def _unhook_classes():
+    for (cls, name), func in _originals.items():
+        setattr(cls, name, func)
+    _originals.clear()
+
+
+class PerfMonitor:
+    """Rolling per-stage timings of a lab widget, instrumented only while enabled.
+
+    ``enable`` shadows the widget's stage methods with timing wrappers and
+    hooks pyqtgraph's ``setData`` and view painting; ``disable`` removes every
+    wrapper again, so a disabled monitor leaves the hot paths untouched. Frame
+    times are the intervals between ``update_plots`` calls. Stages nest:
+    ``update_plots`` includes the ``setData`` calls it makes.
+    """
+
+    def __init__(self, widget, history=240):
+        self.widget = widget
+        self.history = history
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.timings = {stage: deque(maxlen=self.history) for stage in STAGES}
+        self.frames = deque(maxlen=self.history)
+
+    def add(self, stage, seconds):
+        # deque.append is atomic, so the worker thread can record compute stages too
+        self.timings[stage].append((time.perf_counter(), seconds))
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.reset()
+        for stage in WIDGET_STAGES:
+            method = getattr(self.widget, stage, None)
+            if method is not None:
+                setattr(self.widget, stage, self.timed(stage, method))
+        if not _monitors:
+            _hook_classes()
+        _monitors.append(self)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for stage in WIDGET_STAGES:
+            # Drop the instance attribute, so lookups reach the plain method again
+            self.widget.__dict__.pop(stage, None)
+        _monitors.remove(self)
+        if not _monitors:
+            _unhook_classes()
+
+    def timed(self, stage, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.add(stage, end - start)
+                if stage == 'update_plots':
+                    self.frames.append(end)
+        return wrapper
+
+    def fps(self, window=1.0):
+        """Frames drawn during the last ``window`` seconds, per second."""
+        now = time.perf_counter()
+        return sum(1 for stamp in self.frames if now - stamp <= window) / window
+
+    def frame_times(self):
+        """Intervals between the recent frames, in seconds."""
+        return np.diff(np.array(self.frames))
+
+    def stage_times(self, window=1.0):
+        """Per stage: mean recent duration in seconds and the share of the last ``window`` seconds spent in it.
+
+        ``None`` for stages that have not run yet.
+        """
+        now = time.perf_counter()
+        stats = {}
+        for stage, timings in self.timings.items():
+            if not timings:
+                stats[stage] = None
+                continue
+            durations = np.array([seconds for _, seconds in timings])
+            recent = sum(seconds for stamp, seconds in timings if now - stamp <= window)
+            stats[stage] = (durations.mean(), recent / window)
+        return stats
+
+
+class PerfHud(QWidget):
+    """Overlay with achieved FPS vs the display rate, a frame-time histogram and per-stage timings.
+
+    Owns a ``PerfMonitor`` on its parent widget that is only enabled while the
+    HUD is shown; ``toggle`` is meant for a keyboard shortcut.
+    """
+
+    BINS_MS = np.arange(0, 52, 2)
+
+    def __init__(self, parent, refresh_rate=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.resize(300, 250)
+        self.target_fps = 1.0 / refresh_interval(refresh_rate)
+        self.monitor = PerfMonitor(parent)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.monitor.disable()
+            self.hide()
+        else:
+            self.monitor.enable()
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start()
+
+    def refresh(self):
+        # Keep to the top right corner of the parent
+        self.move(self.parentWidget().width() - self.width() - 10, 10)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 190))
+        painter.setFont(QFont('monospace', 9))
+        painter.setPen(QColor('#d4d4d4'))
+        line = 16
+
+        fps = self.monitor.fps()
+        color = '#55FF55' if fps >= 0.9 * self.target_fps else '#FFFF55'
+        painter.setPen(QColor(color))
+        painter.drawText(8, line, f"FPS {fps:5.1f} / {self.target_fps:.0f}   (F12 hides)")
+        painter.setPen(QColor('#d4d4d4'))
+        for stage, stats in self.monitor.stage_times().items():
+            line += 15
+            value = "     -" if stats is None else f"{stats[0] * 1e3:6.2f} ms/call {stats[1]:6.1%}"
+            painter.drawText(8, line, f"{stage:<16}{value}")
+
+        # Histogram of the recent frame times, with the refresh budget marked
+        frame_ms = self.monitor.frame_times() * 1e3
+        counts, _ = np.histogram(np.clip(frame_ms, 0, self.BINS_MS[-1] - 1e-9), bins=self.BINS_MS)
+        area = QRectF(8, line + 12, self.width() - 16, self.height() - line - 32)
+        bar_width = area.width() / len(counts)
+        peak = max(counts.max(), 1)
+        for i, count in enumerate(counts):
+            height = area.height() * count / peak
+            bar = QRectF(area.left() + i * bar_width, area.bottom() - height, bar_width - 1, height)
+            painter.fillRect(bar, QColor('#007acc'))
+        budget_x = area.left() + area.width() * (1000 / self.target_fps) / self.BINS_MS[-1]
+        painter.setPen(QPen(QColor('#FF5555'), 1, Qt.DashLine))
+        painter.drawLine(int(budget_x), int(area.top()), int(budget_x), int(area.bottom()))
+        painter.setPen(QColor('#d4d4d4'))
+        painter.drawText(8, self.height() - 6, f"frame time 0-{self.BINS_MS[-1]} ms, budget {1000 / self.target_fps:.1f} ms")
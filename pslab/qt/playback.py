@@ -0,0 +1,92 @@
+import time
+
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+from .scheduler import refresh_interval
+
+
+class PlaybackClock(QObject):
+    """Playback position driven by a monotonic clock instead of one timer tick per frame.
+
+    The timer runs at the display refresh rate and the position is elapsed wall
+    time x ``frames_per_second`` x ``speed``, so fast playback skips frames
+    instead of asking Qt for ever shorter intervals, and slow playback does not
+    redraw a frame that has not changed. ``frameChanged`` is only emitted when
+    the integer frame moves; ``positionChanged`` carries the fractional
+    position on every tick, for views that draw between frames.
+    """
+
+    frameChanged = pyqtSignal(int)
+    positionChanged = pyqtSignal(float)
+    # Looped back to the start / stopped on the last frame (loop off)
+    wrapped = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, n_frames, frames_per_second=20, refresh_rate=None, parent=None):
+        super().__init__(parent)
+        self.n_frames = n_frames
+        self.frames_per_second = frames_per_second
+        self.speed = 1.0
+        self.loop = True
+
+        self.running = False
+        self.anchor_frame = 0.0
+        self.anchor_time = 0.0
+        self.frame = 0
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(max(1, round(refresh_interval(refresh_rate) * 1000)))
+        self.timer.timeout.connect(self.tick)
+
+    def position(self):
+        """Current (fractional) frame position."""
+        if not self.running:
+            return self.anchor_frame
+        return self.anchor_frame + (time.perf_counter() - self.anchor_time) * self.frames_per_second * self.speed
+
+    def seek(self, frame):
+        # Re-anchor, so the next ticks continue from ``frame``
+        self.anchor_frame = float(frame)
+        self.anchor_time = time.perf_counter()
+        self.frame = int(frame)
+
+    def set_loop(self, loop):
+        self.loop = loop
+
+    def set_speed(self, speed):
+        # Re-anchor first, so changing speed does not make the position jump
+        self.seek(self.position())
+        self.speed = speed
+
+    def start(self, frame=None):
+        self.seek(self.anchor_frame if frame is None else frame)
+        self.running = True
+        self.timer.start()
+
+    def stop(self):
+        self.anchor_frame = min(self.position(), self.n_frames - 1)
+        self.running = False
+        self.timer.stop()
+
+    def tick(self):
+        position = self.position()
+        if position >= self.n_frames:
+            if not self.loop:
+                self.stop()
+                self.show(self.n_frames - 1)
+                self.finished.emit()
+                return
+            # Keep the overshoot, so looping does not slow fast playback down
+            position %= self.n_frames
+            self.seek(position)
+            self.wrapped.emit()
+            self.frameChanged.emit(self.frame)
+        else:
+            self.show(int(position))
+        self.positionChanged.emit(position)
+
+    def show(self, frame):
+        if frame != self.frame:
+            self.frame = frame
+            self.frameChanged.emit(frame)
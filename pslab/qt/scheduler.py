@@ -0,0 +1,88 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QGuiApplication
+
+# Parts of a widget that can go stale
+DIRTY_SIGNALS = 1
+DIRTY_SPECTRUM = 2
+DIRTY_FRAME = 4
+DIRTY_ZOOM = 8
+
+
+def refresh_interval(refresh_rate=None):
+    """Seconds between display refreshes; the primary screen's rate unless ``refresh_rate`` is given."""
+    if refresh_rate is None:
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None and screen.refreshRate() > 0 else 60
+    return 1.0 / refresh_rate
+
+
+class RecomputeScheduler(QObject):
+    """Coalesces control events into at most one recompute per display refresh.
+
+    Slots only ``mark`` what became dirty; ``flush`` then runs the handler of every
+    dirty part once, in the order given. An isolated event is flushed on the next
+    event loop turn, while a burst (held spinbox arrow, slider drag) is folded into
+    one flush per refresh interval.
+    """
+
+    def __init__(self, handlers, refresh_rate=None, parent=None):
+        super().__init__(parent)
+        # handlers: list of (flag, callable), run in list order
+        self.handlers = handlers
+        self.min_interval = refresh_interval(refresh_rate)
+
+        self.dirty = 0
+        self.last_flush = 0.0
+        self.events = 0
+        self.coalesced = 0
+        self.flushes = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def mark(self, flags):
+        self.events += 1
+        if self.dirty:
+            self.coalesced += 1
+        self.dirty |= flags
+        if not self.timer.isActive():
+            wait = self.min_interval - (time.perf_counter() - self.last_flush)
+            self.timer.start(max(0, int(wait * 1000)))
+
+    def marker(self, flags):
+        """Slot-compatible callable that marks ``flags`` and ignores the signal arguments."""
+        return lambda *args: self.mark(flags)
+
+    def flush(self):
+        self.timer.stop()
+        dirty = self.dirty
+        self.dirty = 0
+        if not dirty:
+            return
+        self.flushes += 1
+        self.last_flush = time.perf_counter()
+        for flag, handler in self.handlers:
+            if dirty & flag:
+                handler()
+
+    def stats(self):
+        return {'events': self.events, 'coalesced': self.coalesced, 'flushes': self.flushes}
+
+    def reset_stats(self):
+        self.events = 0
+        self.coalesced = 0
+        self.flushes = 0
+
+
+def settle(widget):
+    """Run every pending scheduler flush and worker job of ``widget`` right away."""
+    worker = getattr(widget, 'worker', None)
+    while True:
+        widget.scheduler.flush()
+        if worker is not None and worker.busy:
+            worker.wait_for_done()
+        if not widget.scheduler.dirty and (worker is None or not worker.busy):
+            break
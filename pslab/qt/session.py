@@ -0,0 +1,141 @@
+import json
+import time
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+from PyQt5.QtWidgets import QAbstractSpinBox, QCheckBox, QComboBox, QPushButton, QRadioButton, QSlider
+
+SESSION_VERSION = 1
+
+
+def session_controls(widget):
+    """Controls of a lab by attribute name, e.g. ``'amp_neg_input'`` or ``'amp_pos_inputs[3]'``.
+
+    Spinboxes, checkboxes, radio buttons, combos, sliders and push buttons
+    (play, reset, ...). Color buttons are left out, they open a modal dialog.
+    """
+    kinds = (QAbstractSpinBox, QCheckBox, QRadioButton, QComboBox, QSlider, QPushButton)
+    controls = {}
+    for name, value in vars(widget).items():
+        items = [(f"{name}[{i}]", item) for i, item in enumerate(value)] if isinstance(value, list) else [(name, value)]
+        for key, item in items:
+            if isinstance(item, kinds) and not hasattr(item, 'color'):
+                controls[key] = item
+    return controls
+
+
+class SessionRecorder:
+    """Timestamped log of the control changes of a lab, written as JSON lines.
+
+    The first line describes the session, then each line is
+    ``[seconds, control, value]``. A user action often changes other
+    controls from its handler (a preset sets every spinbox): those nested
+    changes reach the recorder first, in the same event loop turn, and only
+    the last (outermost) change of the turn is kept, since replaying it
+    reproduces the rest. Lines are flushed as they come, so a crash still
+    leaves a usable log.
+    """
+
+    def __init__(self, widget, path):
+        self.widget = widget
+        self.file = open(path, 'w', buffering=1)
+        self.start = time.perf_counter()
+        self.pending = None
+        self.file.write(json.dumps({
+            'widget': type(widget).__name__, 'version': SESSION_VERSION, 'started': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }) + '\n')
+
+        for name, control in session_controls(widget).items():
+            if isinstance(control, QAbstractSpinBox):
+                control.valueChanged.connect(self.recorder(name))
+            elif isinstance(control, QRadioButton):
+                # Only the button that became checked, its group unchecks the other
+                control.toggled.connect(lambda checked, name=name: checked and self.record(name, True))
+            elif isinstance(control, QCheckBox):
+                control.toggled.connect(self.recorder(name))
+            elif isinstance(control, QComboBox):
+                control.currentTextChanged.connect(self.recorder(name))
+            elif isinstance(control, QSlider):
+                # User drags only; playback moves the slider through valueChanged
+                control.sliderMoved.connect(self.recorder(name))
+            else:
+                control.clicked.connect(lambda checked=False, name=name: self.record(name, None))
+
+    def recorder(self, name):
+        return lambda value: self.record(name, value)
+
+    def record(self, name, value):
+        if self.file is None:
+            return
+        if self.pending is None:
+            QTimer.singleShot(0, self.commit)
+        self.pending = [round(time.perf_counter() - self.start, 4), name, value]
+
+    def commit(self):
+        if self.pending is not None and self.file is not None:
+            self.file.write(json.dumps(self.pending) + '\n')
+        self.pending = None
+
+    def close(self):
+        if self.file is not None:
+            self.commit()
+            self.file.close()
+            self.file = None
+
+
+def load_session(path):
+    """``(header, events)`` of a log written by ``SessionRecorder``."""
+    with open(path) as f:
+        header = json.loads(f.readline())
+        events = [json.loads(line) for line in f if line.strip()]
+    if header.get('version') != SESSION_VERSION:
+        raise ValueError(f"{path}: unsupported session version {header.get('version')}")
+    return header, events
+
+
+class SessionPlayer:
+    """Feeds a recorded session back into a lab.
+
+    ``replay`` applies the events through the same Qt signals a user would
+    trigger. With ``realtime`` the recorded pauses are kept (playback runs as
+    long as it did); otherwise each event follows as soon as the previous one
+    has been handled, which compresses playback periods. ``settle(widget)``
+    should run the work an event left pending (scheduler, worker); by default
+    pending Qt events are processed.
+    """
+
+    def __init__(self, widget, events, settle=None):
+        self.widget = widget
+        self.events = events
+        self.settle = settle
+        self.controls = session_controls(widget)
+
+    def apply(self, name, value):
+        control = self.controls[name]
+        if isinstance(control, QAbstractSpinBox):
+            control.setValue(value)
+        elif isinstance(control, (QCheckBox, QRadioButton)):
+            control.setChecked(value)
+        elif isinstance(control, QComboBox):
+            control.setCurrentText(value)
+        elif isinstance(control, QSlider):
+            # Down while moving, so sliderMoved fires as for a drag
+            control.setSliderDown(True)
+            control.setSliderPosition(value)
+            control.setSliderDown(False)
+        else:
+            control.click()
+
+    def replay(self, realtime=False):
+        """Apply every event; returns the wall time taken in seconds."""
+        app = QCoreApplication.instance()
+        start = time.perf_counter()
+        for stamp, name, value in self.events:
+            if realtime:
+                while time.perf_counter() - start < stamp:
+                    app.processEvents()
+                    time.sleep(0.001)
+            self.apply(name, value)
+            if self.settle is not None:
+                self.settle(self.widget)
+            app.processEvents()
+        return time.perf_counter() - start
@@ -0,0 +1,90 @@
+import sys
+
+from PyQt5.QtCore import QCoreApplication, QEvent, QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class _Job(QRunnable):
+    def __init__(self, worker, generation, snapshot):
+        super().__init__()
+        self.worker = worker
+        self.generation = generation
+        self.snapshot = snapshot
+
+    def run(self):
+        try:
+            result = self.worker.func(self.snapshot)
+            error = None
+        except Exception as exc:
+            result = None
+            error = exc
+        # Queued back to the GUI thread (the worker object lives there)
+        self.worker._finished.emit(self.generation, result, error)
+
+
+class ComputeWorker(QObject):
+    """Runs ``func(snapshot)`` off the GUI thread and publishes the latest result.
+
+    Snapshots must be immutable. Jobs run one at a time, so ``func`` may keep
+    caches; while a job runs only the newest submitted snapshot is kept, and
+    every submission bumps a generation counter so results of superseded
+    snapshots are dropped instead of reaching ``resultReady``.
+    """
+    resultReady = pyqtSignal(object)
+    _finished = pyqtSignal(int, object, object)
+
+    def __init__(self, func, threaded=True, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.threaded = threaded
+        self.generation = 0
+        self.busy = False
+        self.pending = None
+        self.dropped = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._finished.connect(self._on_finished)
+
+    def submit(self, snapshot):
+        self.generation += 1
+        if not self.threaded:
+            self._on_finished(self.generation, *self._run_inline(snapshot))
+        elif self.busy:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = (self.generation, snapshot)
+        else:
+            self._start(self.generation, snapshot)
+        return self.generation
+
+    def _run_inline(self, snapshot):
+        self.busy = True
+        try:
+            return self.func(snapshot), None
+        except Exception as exc:
+            return None, exc
+
+    def _start(self, generation, snapshot):
+        self.busy = True
+        self.pool.start(_Job(self, generation, snapshot))
+
+    def _on_finished(self, generation, result, error):
+        self.busy = False
+        if self.pending is not None:
+            next_generation, snapshot = self.pending
+            self.pending = None
+            self._start(next_generation, snapshot)
+        if error is not None:
+            # Report like an uncaught exception without tearing down the event loop
+            sys.excepthook(type(error), error, error.__traceback__)
+        elif generation == self.generation:
+            self.resultReady.emit(result)
+        else:
+            self.dropped += 1
+
+    def wait_for_done(self):
+        """Block until the newest snapshot has been computed and published."""
+        while self.busy:
+            self.pool.waitForDone()
+            # Deliver the queued completion (posted to this thread's slot proxy)
+            QCoreApplication.sendPostedEvents(None, QEvent.MetaCall)
@@ -0,0 +1,402 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .clarke import clarke, clarke_k
+from .params import angles, omega
+from .synthesis import three_phase_signals
+from .windows import get_window, window_response
+
+# Signals offered by the FFT panel, in combo box order
+SIGNAL_NAMES = [
+    "Phase A", "Phase B", "Phase C",
+    "Alpha", "Beta",
+    "Complex Vector (α + jβ)"
+]
+
+
+def select_signal(signals, name):
+    """Pick one of ``SIGNAL_NAMES`` out of a ``Signals`` tuple."""
+    if name == "Phase A":
+        return signals.combined[:, 0]
+    elif name == "Phase B":
+        return signals.combined[:, 1]
+    elif name == "Phase C":
+        return signals.combined[:, 2]
+    elif name == "Alpha":
+        return signals.alpha
+    elif name == "Beta":
+        return signals.beta
+    elif name == "Complex Vector (α + jβ)":
+        return signals.alpha + 1j * signals.beta
+    raise ValueError(f"Unknown signal: {name}")
+
+
+def harmonic_sequence(order):
+    """Sequence of a positive-sequence harmonic order: +1, -1 or 0 (zero sequence)."""
+    rem = order % 3
+    if rem == 1:
+        return 1
+    elif rem == 2:
+        return -1
+    return 0
+
+
+def line_sources(freqs, n_harmonics=13):
+    """Which harmonic each spectral line belongs to, for coloring.
+
+    Returns an int array: the index into the positive-sequence harmonics
+    (0 for H1+), -1 for the negative-sequence fundamental (H1 at a negative
+    frequency) and -2 for lines outside H1..Hn.
+    """
+    freqs = np.asarray(freqs)
+    orders = np.rint(np.abs(freqs)).astype(int)
+    sources = np.where((orders >= 1) & (orders <= n_harmonics), orders - 1, -2)
+    sources[(orders == 1) & (freqs <= 0)] = -1
+    return sources
+
+
+def _peak_mask(mag, threshold):
+    # Filter low magnitudes, then keep local maxima to remove window side lobes
+    mask_threshold = mag > threshold
+    pad = [(0, 0)] * (mag.ndim - 1) + [(1, 1)]
+    mag_padded = np.pad(mag, pad, mode='constant', constant_values=0)
+    mask_peaks = (mag > mag_padded[..., :-2]) & (mag > mag_padded[..., 2:])
+    return mask_threshold & mask_peaks
+
+
+def _peak_table(freqs, mags, mask):
+    # One (freqs, mags, max_mag) entry per row of ``mags``, keyed by signal name
+    table = {}
+    for i, name in enumerate(SIGNAL_NAMES):
+        max_mag = np.max(mags[i]) if mags.shape[1] > 0 else 0
+        table[name] = (freqs[mask[i]], mags[i][mask[i]], max_mag)
+    return table
+
+
+def _double_sided(signals, window):
+    # Shifted double-sided transforms of every signal in SIGNAL_NAMES, shape (6, N),
+    # with a cached Window, normalized by its coherent gain. The five real signals go through a single rfft;
+    # the α + jβ spectrum is assembled from the alpha and beta transforms.
+    real = np.stack([
+        signals.combined[:, 0], signals.combined[:, 1], signals.combined[:, 2],
+        signals.alpha, signals.beta
+    ])
+    N = real.shape[1]
+    half = np.fft.rfft(real * window.values, axis=-1) / (N * window.coherent_gain)
+
+    # Shifted bin numbers (-N/2 .. N/2-1); a real signal has X[-m] = conj(X[m])
+    bins = np.fft.fftshift(np.fft.fftfreq(N) * N).round().astype(int)
+    full = half[:, np.abs(bins)]
+    full[:, bins < 0] = np.conj(full[:, bins < 0])
+    return np.concatenate([full, full[3:4] + 1j * full[4:5]])
+
+
+def measured_spectra(signals, dt, threshold=0.004, window="Hann"):
+    """Double-sided windowed spectrum peaks of every signal in ``SIGNAL_NAMES`` from one batched transform.
+
+    Peaks are the local maxima above ``threshold``, normalized by the coherent
+    gain of ``window`` (from ``WINDOW_NAMES``). The five real signals go through
+    a single ``rfft`` along the time axis; the double-sided spectra are mirrored
+    from it, and the α + jβ spectrum is assembled from the alpha and beta
+    transforms without another FFT. Returns a dict of name -> ``(freqs, mags,
+    max_mag)``, max_mag being the largest magnitude of the whole spectrum.
+    """
+    N = len(signals.alpha)
+    mags = np.abs(_double_sided(signals, get_window(window, N)))
+    freqs = np.fft.fftshift(np.fft.fftfreq(N, d=dt))
+    return _peak_table(freqs, mags, _peak_mask(mags, threshold))
+
+
+# Lines at orders -H..H of one signal: sequence is +1, -1 or 0, phase in radians
+HarmonicLines = namedtuple('HarmonicLines', ['order', 'sequence', 'magnitude', 'phase'])
+
+
+@lru_cache(maxsize=8)
+def _harmonic_basis(n_samples, dt, max_order, window):
+    # Windowed DFT kernel at orders 0..H, normalized like measured_spectra, shape (N, H+1)
+    window = get_window(window, n_samples)
+    time = np.arange(n_samples) * dt
+    kernel = np.exp(-1j * omega * time[:, None] * np.arange(max_order + 1))
+    basis = window.values[:, None] * kernel / (n_samples * window.coherent_gain)
+    basis.flags.writeable = False
+    return basis
+
+
+def _harmonic_coeffs(signals, dt, max_order, window):
+    # Line phasors of every signal in SIGNAL_NAMES at orders -H..H, shape (6, 2H+1)
+    real = np.stack([
+        signals.combined[:, 0], signals.combined[:, 1], signals.combined[:, 2],
+        signals.alpha, signals.beta
+    ])
+    half = real @ _harmonic_basis(real.shape[1], float(dt), max_order, window)
+    # A real signal has X[-h] = conj(X[h])
+    full = np.concatenate([np.conj(half[:, :0:-1]), half], axis=1)
+    return np.concatenate([full, full[3:4] + 1j * full[4:5]])
+
+
+def harmonic_lines(signals, dt, max_order=13, window="Hann"):
+    """Measured lines at the harmonic orders -H..H only, one ``HarmonicLines`` per name.
+
+    Instead of an FFT over every bin and a peak search, each line is one
+    windowed DFT bin at ``order x`` the fundamental, computed for all
+    signals by a single matrix product with a cached basis (O(N x H) rather
+    than O(N log N) plus a scan of N bins). Magnitudes match ``measured_spectra``.
+    The sequence of an order comes from the symmetrical components of the
+    three phase lines (the largest of positive, negative and zero); in the
+    α + jβ spectrum it is the direction of rotation, the sign of the order.
+    """
+    coeffs = _harmonic_coeffs(signals, dt, max_order, window)
+    orders = np.arange(-max_order, max_order + 1)
+
+    # Symmetrical components of the phase lines at +h, a = e^{j120°}
+    a = np.exp(2j * np.pi / 3)
+    phases = coeffs[:3, max_order:]
+    components = np.abs(np.stack([
+        phases[0] + phases[1] + phases[2],
+        phases[0] + a * phases[1] + a * a * phases[2],
+        phases[0] + a * a * phases[1] + a * phases[2],
+    ]))
+    per_order = np.array([0, 1, -1])[np.argmax(components, axis=0)]
+    per_order[0] = 0
+    sequence = per_order[np.abs(orders)]
+
+    lines = {}
+    for i, name in enumerate(SIGNAL_NAMES):
+        lines[name] = HarmonicLines(
+            orders, np.sign(orders) if i == 5 else sequence, np.abs(coeffs[i]), np.angle(coeffs[i])
+        )
+    return lines
+
+
+def harmonic_spectra(signals, dt, max_order=13, min_magnitude=1e-4, window="Hann"):
+    """``harmonic_lines`` as ``measured_spectra``-style (freqs, mags, max_mag), lines above ``min_magnitude``."""
+    table = {}
+    for name, lines in harmonic_lines(signals, dt, max_order, window).items():
+        keep = lines.magnitude > min_magnitude
+        max_mag = np.max(lines.magnitude) if lines.magnitude.size else 0
+        table[name] = (lines.order[keep].astype(float), lines.magnitude[keep], max_mag)
+    return table
+
+
+def next_fast_fft_size(n):
+    """Smallest length >= ``n`` accepted by ``fast_fft_size``."""
+    while not fast_fft_size(n):
+        n += 1
+    return n
+
+
+@lru_cache(maxsize=4)
+def _chirp_kernel(N, n_points, step):
+    # Chirp w^(j²/2), w = e^{-j 2 pi step}, and the FFT of its conjugate at lags
+    # -(N-1)..n_points-1 (negative lags wrapped to the end). Only depends on the
+    # band width, so panning a zoomed view reuses it.
+    length = next_fast_fft_size(N + n_points - 1)
+    j = np.arange(max(N, n_points)).astype(float)
+    chirp = np.exp(-1j * np.pi * step * j ** 2)
+    kernel = np.zeros(length, dtype=complex)
+    kernel[:n_points] = np.conj(chirp[:n_points])
+    kernel[length - N + 1:] = np.conj(chirp[1:N][::-1])
+    kernel = np.fft.fft(kernel)
+    chirp.flags.writeable = False
+    kernel.flags.writeable = False
+    return chirp, kernel
+
+
+def zoom_dft(x, dt, f_low, f_high, n_points):
+    """DFT of ``x`` (last axis) at ``n_points`` frequencies evenly spaced over [f_low, f_high].
+
+    A chirp z-transform on an arc of the unit circle (Bluestein's algorithm):
+    the sum ``X(f) = sum x[n] e^{-j 2 pi f n dt}`` at every frequency becomes one
+    convolution with a chirp, done with three FFTs of a fast length
+    ``>= N + n_points - 1``. A narrow band is evaluated at any density with the
+    record as it is. Returns ``(freqs, X)``.
+    """
+    x = np.asarray(x)
+    N = x.shape[-1]
+    df = (f_high - f_low) / (n_points - 1)
+    chirp, kernel = _chirp_kernel(N, n_points, float(df * dt))
+    y = x * (np.exp(-2j * np.pi * f_low * dt * np.arange(N)) * chirp[:N])
+    X = np.fft.ifft(np.fft.fft(y, len(kernel), axis=-1) * kernel, axis=-1)[..., :n_points] * chirp[:n_points]
+    return f_low + df * np.arange(n_points), X
+
+
+def zoom_spectrum(signal, dt, f_low, f_high, n_points=400, window="Hann"):
+    """Windowed magnitude spectrum of ``signal`` over one band: ``(freqs, mags)``.
+
+    Normalized like ``measured_spectra``, through ``zoom_dft``, so the band can
+    be sampled far more densely than the full-band FFT bins without a longer
+    record (the resolution itself stays that of the record's window).
+    """
+    window = get_window(window, len(signal))
+    freqs, X = zoom_dft(signal * window.values, dt, f_low, f_high, n_points)
+    return freqs, np.abs(X) / (len(signal) * window.coherent_gain)
+
+
+# Peaks of one signal located between bins: frequency, amplitude and phase (radians) of each line
+SpectralPeaks = namedtuple('SpectralPeaks', ['freq', 'magnitude', 'phase'])
+
+
+@lru_cache(maxsize=8)
+def _offset_table(window, n_samples, points=2049):
+    # Ratio |W(d - 1)| / |W(d)| of the larger neighbour to the peak bin over offsets d in
+    # [0, 0.5] bins; it grows with d for every window, so np.interp inverts it
+    window = get_window(window, n_samples)
+    offsets = np.linspace(0, 0.5, points)
+    ratios = np.abs(window_response(window, offsets - 1)) / np.abs(window_response(window, offsets))
+    offsets.flags.writeable = False
+    ratios.flags.writeable = False
+    return ratios, offsets
+
+
+def interpolated_peaks(signals, dt, threshold=0.004, window="Hann", tolerance=0.1):
+    """Lines of every signal in ``SIGNAL_NAMES`` located between the FFT bins, one ``SpectralPeaks`` per name.
+
+    Each local maximum of the windowed spectrum is refined from its two
+    neighbours: the ratio of the larger one to the peak bin gives the
+    offset of the line from the bin (inverting the window's exact response,
+    so it holds for every window), and dividing the bin by that response
+    restores the amplitude and phase lost to scalloping. A short record of a
+    few, not necessarily whole, cycles then gives the line spectrum of a
+    much longer one. Peaks whose smaller neighbour does not fit the response
+    within ``tolerance`` x the peak bin (side lobes, merged lines) are dropped.
+    """
+    N = len(signals.alpha)
+    window = get_window(window, N)
+    coeffs = _double_sided(signals, window)
+    mags = np.abs(coeffs)
+    # A line above threshold reads at least threshold x the response half a bin off in its peak bin
+    rows, bins = np.nonzero(_peak_mask(mags, threshold * np.abs(window_response(window, 0.5))))
+
+    padded = np.pad(mags, [(0, 0), (1, 1)])
+    left, center, right = padded[rows, bins], mags[rows, bins], padded[rows, bins + 2]
+    side = np.where(right >= left, 1.0, -1.0)
+    offset = side * np.interp(np.maximum(left, right) / center, *_offset_table(window.name, N))
+    phasor = coeffs[rows, bins] / window_response(window, offset)
+    magnitude = np.abs(phasor)
+    # The smaller neighbour is one bin away on the other side, at offset + side from the line
+    predicted = magnitude * np.abs(window_response(window, offset + side))
+    keep = (magnitude > threshold) & (np.abs(predicted - np.minimum(left, right)) <= tolerance * center)
+
+    freqs = (bins - N // 2 + offset) / (N * dt)
+    peaks = {}
+    for i, name in enumerate(SIGNAL_NAMES):
+        row = keep & (rows == i)
+        peaks[name] = SpectralPeaks(freqs[row], magnitude[row], np.angle(phasor[row]))
+    return peaks
+
+
+def interpolated_spectra(signals, dt, threshold=0.004, window="Hann"):
+    """``interpolated_peaks`` as ``measured_spectra``-style (freqs, mags, max_mag)."""
+    table = {}
+    for name, peaks in interpolated_peaks(signals, dt, threshold, window).items():
+        max_mag = np.max(peaks.magnitude) if peaks.magnitude.size else 0
+        table[name] = (peaks.freq, peaks.magnitude, max_mag)
+    return table
+
+
+# A record of whole fundamental cycles; ``error`` is the largest line error measured on it
+CoherentRecord = namedtuple('CoherentRecord', ['cycles', 'samples_per_cycle', 'n_samples', 'dt', 'error'])
+
+
+def fast_fft_size(n):
+    """True if ``n`` has no prime factor above 5, the lengths FFTs handle fastest."""
+    for p in (2, 3, 5):
+        while n % p == 0:
+            n //= p
+    return n == 1
+
+
+def _coherent_coeffs(signals, record):
+    # No window: every harmonic sits on a bin of a whole number of cycles
+    coeffs = _double_sided(signals, get_window("Rectangular", record.n_samples))
+    freqs = np.fft.fftshift(np.fft.fftfreq(record.n_samples, d=record.dt))
+    return freqs, coeffs
+
+
+@lru_cache(maxsize=None)
+def coherent_record(max_order, accuracy=1e-9, resolution=1.0, max_samples=1 << 16):
+    """Smallest coherently sampled record for harmonics 1..``max_order`` of the fundamental.
+
+    ``cycles = ceil(1 / resolution)`` whole periods put every harmonic exactly on
+    a bin (``resolution`` is the bin spacing in harmonic orders), so neither a
+    window nor a long record is needed against leakage. Samples per cycle start
+    at the alias-free ``2 * max_order + 1`` and grow until the length is a fast
+    FFT size and a unit-amplitude probe of every harmonic, plus the negative
+    sequence fundamental, is measured within ``accuracy`` of its exact line
+    spectrum. Cached, since it only depends on its arguments.
+    """
+    cycles = int(np.ceil(1 / resolution - 1e-9))
+    period = 2 * np.pi / omega
+    k = clarke_k()
+    exact_freqs, exact = line_spectra(np.ones(max_order), 1.0, k)
+    for samples_per_cycle in range(2 * max_order + 1, max_samples // cycles + 1):
+        n_samples = cycles * samples_per_cycle
+        if not fast_fft_size(n_samples):
+            continue
+        record = CoherentRecord(cycles, samples_per_cycle, n_samples, period / samples_per_cycle, None)
+        probe = three_phase_signals(np.ones(max_order), 1.0, np.arange(n_samples) * record.dt, k)
+        _, coeffs = _coherent_coeffs(probe, record)
+
+        # Exact lines on their bins (harmonic h is shifted bin N/2 + h x cycles), zero
+        # everywhere else: aliases and leakage count as error
+        expected = np.zeros_like(coeffs)
+        expected[:, n_samples // 2 + exact_freqs * cycles] = exact
+        error = np.max(np.abs(coeffs - expected))
+        if error <= accuracy:
+            return record._replace(error=float(error))
+    raise ValueError(f"no coherent record of up to {max_samples} samples reaches an accuracy of {accuracy:g}")
+
+
+def coherent_spectra(amp_pos_harmonics, amp_neg, k, accuracy=1e-9, min_magnitude=1e-9):
+    """Window-free FFT of a coherently sampled record: ``(spectra, record)``.
+
+    The signals are synthesized on the ``coherent_record`` of the highest active
+    harmonic instead of a fixed 100 s grid. ``spectra`` maps name ->
+    ``(freqs, mags, max_mag)`` like ``measured_spectra``; since lines do not
+    leak, every bin above ``min_magnitude`` is a line, adjacent ones included.
+    """
+    active = [order for order, amp in enumerate(amp_pos_harmonics, 1) if amp > 0.001]
+    record = coherent_record(max(active, default=1), accuracy)
+    signals = three_phase_signals(amp_pos_harmonics, amp_neg, np.arange(record.n_samples) * record.dt, k)
+    freqs, coeffs = _coherent_coeffs(signals, record)
+    mags = np.abs(coeffs)
+    return _peak_table(freqs, mags, mags > min_magnitude), record
+
+
+def line_spectra(amp_pos_harmonics, amp_neg, k, min_amplitude=0.001):
+    """Exact double-sided line spectra of every signal in ``SIGNAL_NAMES``.
+
+    Each signal is a finite sum of known harmonics, so its spectrum is computed in
+    closed form instead of with an FFT. Returns ``(freqs, coeffs)`` where ``freqs``
+    are the harmonic orders -H..H and ``coeffs`` is a complex (6, 2H+1) array of
+    line phasors, scaled like the window-corrected FFT (a cosine of amplitude A
+    shows A/2 at +-f, a rotating vector of length A shows A at its frequency).
+    """
+    amps = np.asarray(amp_pos_harmonics, dtype=float)
+    amps = np.where(amps > min_amplitude, amps, 0.0)
+    H = len(amps)
+    orders = np.arange(1, H + 1)
+    freqs = np.arange(-H, H + 1)
+
+    # Per-phase coefficients, shape (2H+1, 3)
+    # A cos(h(wt - theta)) -> A/2 e^{-jh theta} at +h and A/2 e^{+jh theta} at -h
+    phase = np.exp(-1j * orders[:, None] * angles[None, :]) * (amps[:, None] / 2)
+    coeffs = np.zeros((2 * H + 1, 3), dtype=complex)
+    coeffs[H + 1:] += phase
+    coeffs[:H][::-1] += np.conj(phase)
+    # amp_neg cos(wt + theta) -> amp_neg/2 e^{+j theta} at +1 and e^{-j theta} at -1
+    coeffs[H + 1] += amp_neg / 2 * np.exp(1j * angles)
+    coeffs[H - 1] += amp_neg / 2 * np.exp(-1j * angles)
+
+    alpha, beta = clarke(coeffs, k)
+    spectra = np.stack([coeffs[:, 0], coeffs[:, 1], coeffs[:, 2], alpha, beta, alpha + 1j * beta])
+    return freqs, spectra
+
+
+def analytic_spectra(amp_pos_harmonics, amp_neg, k, min_magnitude=1e-9):
+    """Analytic counterpart of ``measured_spectra``: dict of name -> ``(freqs, mags, max_mag)``."""
+    freqs, spectra = line_spectra(amp_pos_harmonics, amp_neg, k)
+    mags = np.abs(spectra)
+    return _peak_table(freqs.astype(float), mags, mags > min_magnitude)
@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .clarke import clarke
+from .params import omega, angles
+
+
+def synthesize(amplitudes, t, orders=None, sequence=1, min_amplitude=0.0):
+    """Three-phase harmonic sum sampled on ``t``, returned with shape (len(t), 3).
+
+    Order ``h`` with amplitude ``A`` contributes ``A * cos(h * (omega*t - sequence*angle))``,
+    so ``sequence=1`` gives the positive (ABC) rotation and ``sequence=-1`` the negative one.
+    All orders, samples and phases are evaluated in a single broadcast pass.
+    """
+    amplitudes = np.atleast_1d(np.asarray(amplitudes, dtype=float))
+    if orders is None:
+        orders = np.arange(1, len(amplitudes) + 1)
+    orders = np.atleast_1d(np.asarray(orders, dtype=float))
+    t = np.asarray(t, dtype=float)
+
+    # Skip silent harmonics (same cut-off the widgets always used)
+    active = np.abs(amplitudes) > min_amplitude
+    if not np.any(active):
+        return np.zeros((len(t), 3))
+    amplitudes = amplitudes[active]
+    orders = orders[active]
+
+    return np.tensordot(amplitudes, harmonic_components(orders, t, sequence), axes=1)
+
+
+def harmonic_components(orders, t, sequence=1):
+    """Unit-amplitude three-phase components, shape (orders, time, phases)."""
+    orders = np.atleast_1d(np.asarray(orders, dtype=float))
+    t = np.asarray(t, dtype=float)
+    phase = orders[:, None, None] * (omega * t[None, :, None] - sequence * angles[None, None, :])
+    return np.cos(phase)
+
+
+class HarmonicCache:
+    """Running harmonic sum on a fixed time grid, updated only where amplitudes change.
+
+    The signal is linear in the amplitudes, so each order's unit-amplitude component
+    is synthesized once and a change of one amplitude costs a single
+    ``(new - old) * unit_component`` update of the (N, 3) sum. The sum is rebuilt
+    from the components every ``refresh_every`` updates to bound rounding drift.
+    """
+
+    def __init__(self, t, orders, sequence=1, min_amplitude=0.0, refresh_every=256):
+        self.t = np.asarray(t, dtype=float)
+        self.orders = np.atleast_1d(np.asarray(orders, dtype=float))
+        self.sequence = sequence
+        self.min_amplitude = min_amplitude
+        self.refresh_every = refresh_every
+
+        self.units = np.empty((len(self.orders), len(self.t), 3))
+        self.has_unit = np.zeros(len(self.orders), dtype=bool)
+        self.amplitudes = np.zeros(len(self.orders))
+        self.total = np.zeros((len(self.t), 3))
+        self.updates = 0
+
+    def _ensure_units(self, index):
+        missing = index[~self.has_unit[index]]
+        if missing.size:
+            self.units[missing] = harmonic_components(self.orders[missing], self.t, self.sequence)
+            self.has_unit[missing] = True
+
+    def update(self, amplitudes):
+        """Move to new amplitudes and return the (N, 3) sum (updated in place)."""
+        amplitudes = np.atleast_1d(np.asarray(amplitudes, dtype=float))
+        amplitudes = np.where(np.abs(amplitudes) > self.min_amplitude, amplitudes, 0.0)
+        changed = np.flatnonzero(amplitudes != self.amplitudes)
+        if changed.size == 0:
+            return self.total
+
+        self._ensure_units(changed)
+        self.updates += 1
+        active = np.flatnonzero(amplitudes)
+        if active.size == 0:
+            self.total[:] = 0.0
+        elif self.updates >= self.refresh_every or changed.size > active.size:
+            # Fresh sum: bounds drift, and is cheaper when most orders changed
+            self._ensure_units(active)
+            self.total[:] = np.tensordot(amplitudes[active], self.units[active], axes=1)
+            self.updates = 0
+        else:
+            delta = amplitudes[changed] - self.amplitudes[changed]
+            self.total += np.tensordot(delta, self.units[changed], axes=1)
+        self.amplitudes = amplitudes
+        return self.total
+
+
+# Time-domain view of one set of amplitudes (arrays are (N, 3) or (N,))
+Signals = namedtuple('Signals', ['pos', 'neg', 'combined', 'alpha', 'beta'])
+
+
+def three_phase_signals(amp_pos_harmonics, amp_neg, t, k):
+    """Positive harmonics 1..H plus a negative-sequence fundamental, with their Clarke transform."""
+    pos = synthesize(amp_pos_harmonics, t, min_amplitude=0.001)
+    neg = synthesize([amp_neg], t, sequence=-1)
+    return sequence_signals(pos, neg, k)
+
+
+def sequence_signals(pos, neg, k):
+    """Combine (N, 3) positive and negative sequence arrays and Clarke-transform the sum."""
+    combined = pos + neg
+    alpha, beta = clarke(combined, k)
+    return Signals(pos, neg, combined, alpha, beta)
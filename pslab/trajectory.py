@@ -0,0 +1,43 @@
+import numpy as np
+
+
+class Trajectory:
+    """Fixed-capacity history of 2-D points backed by a NumPy ring buffer.
+
+    Each point is stored twice, at ``i`` and ``i + capacity``, so the valid
+    points are always one contiguous slice: ``append`` is O(1) and ``data``
+    returns views without copying. Once full, the oldest point is overwritten.
+    """
+
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.buffer = np.zeros((2, 2 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, x, y):
+        if self.count < self.capacity:
+            i = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            i = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.buffer[0, i] = self.buffer[0, i + self.capacity] = x
+        self.buffer[1, i] = self.buffer[1, i + self.capacity] = y
+
+    def extend(self, xs, ys):
+        """Append points in order, as repeated ``append`` calls."""
+        for x, y in zip(xs, ys):
+            self.append(x, y)
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def data(self):
+        """(xs, ys) views of the stored points, oldest first."""
+        end = self.start + self.count
+        return self.buffer[0, self.start:end], self.buffer[1, self.start:end]
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pslab import PhasorEvaluator, chain_vectors, clarke_k, field_geometry, frame_segments, segments, tip_to_tail  # noqa: E402
+
+
+def test_field_geometry_without_vectors():
+    # Every amplitude off: no chain terms, K = 0
+    geometry = field_geometry(chain_vectors(np.zeros(0), np.zeros(0), np.linspace(0, 1, 4)))
+    assert geometry.star.shape == (4, 0, 2, 2)
+    assert geometry.chain.shape == (4, 0, 2, 2)
+    assert geometry.resultant.shape == (4, 2, 2)
+    assert not geometry.resultant.any()
+    assert frame_segments(geometry, 2, chain=True).shape == (1, 2, 2)
+
+
+def test_frame_segments_are_views():
+    vectors = np.random.default_rng(0).normal(size=(6, 4, 2))
+    geometry = field_geometry(vectors)
+    joints = tip_to_tail(vectors)
+    assert np.array_equal(geometry.star, segments(np.zeros_like(vectors), vectors))
+    assert np.array_equal(geometry.chain, segments(joints[:, :-1], joints[:, 1:]))
+    assert np.array_equal(geometry.resultant, segments(np.zeros((6, 2)), joints[:, -1]))
+    for chain, vectors_drawn in ((False, geometry.star), (True, geometry.chain)):
+        drawn = frame_segments(geometry, 3, chain)
+        assert np.array_equal(drawn, np.concatenate([vectors_drawn[3], geometry.resultant[3][None]]))
+        assert np.shares_memory(drawn, geometry.frames)
+
+
+def test_evaluator_with_every_amplitude_zero():
+    state = PhasorEvaluator((0.0,) * 13, 0.0, clarke_k()).evaluate(np.linspace(0, 2, 5))
+    assert state.harmonics.star.shape == (5, 0, 2, 2)
+    assert not state.harmonics.resultant.any()
+    assert not state.combined.resultant.any()
+    assert state.fundamental.shape == (5, 2) and not state.fundamental.any()